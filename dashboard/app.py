@@ -509,13 +509,20 @@ with tab_trades:
         limit_filter = st.selectbox("Show Last", [25, 50, 100, 500], key="limit_filter")
     with filter_col3:
         if st.button("🔄 Refresh", key="refresh_trades"):
+            st.session_state.pop("trades_before_id", None)
             st.rerun()
 
-    # Fetch trades
+    # Table columns only - the raw_webhook / broker_response blobs are fetched per trade
+    display_cols = ['timestamp', 'platform', 'symbol', 'action', 'volume', 'status',
+                   'expected_price', 'executed_price', 'slippage', 'latency_ms']
+
+    # Fetch trades (one page, keyset-paged by id)
     try:
-        params = {"limit": limit_filter}
+        params = {"limit": limit_filter, "columns": ",".join(display_cols)}
         if platform_filter != "All":
             params["platform"] = platform_filter
+        if st.session_state.get("trades_before_id"):
+            params["before_id"] = st.session_state["trades_before_id"]
 
         r = requests.get(f"{MT5_Url}/trades", params=params, timeout=5)
         if r.status_code == 200:
@@ -546,20 +553,34 @@ with tab_trades:
                 df = pd.DataFrame(trades)
 
                 # Select columns to display
-                display_cols = ['timestamp', 'platform', 'symbol', 'action', 'volume', 'status',
-                               'expected_price', 'executed_price', 'slippage', 'latency_ms']
                 available_cols = [c for c in display_cols if c in df.columns]
 
                 if available_cols:
                     st.dataframe(df[available_cols], use_container_width=True, height=400)
 
+                # Paging
+                page_col1, page_col2, _ = st.columns([1, 1, 2])
+                with page_col1:
+                    if st.session_state.get("trades_before_id") and st.button("⏮️ Newest", key="trades_newest"):
+                        st.session_state.pop("trades_before_id", None)
+                        st.rerun()
+                with page_col2:
+                    next_before_id = trade_data.get('next_before_id')
+                    if next_before_id and st.button("Older ▶", key="trades_older"):
+                        st.session_state["trades_before_id"] = next_before_id
+                        st.rerun()
+
                 # Export button
                 st.divider()
                 export_col1, export_col2 = st.columns([1, 3])
                 with export_col1:
                     if st.button("📥 Export to CSV", key="export_csv"):
                         try:
-                            csv_data = df.to_csv(index=False)
+                            # Same page as the table, but every column (the table only fetched display_cols)
+                            export_params = {k: v for k, v in params.items() if k != "columns"}
+                            full = requests.get(f"{MT5_Url}/trades", params=export_params, timeout=10)
+                            full.raise_for_status()
+                            csv_data = pd.DataFrame(full.json().get('trades', [])).to_csv(index=False)
                             st.download_button(
                                 label="Download CSV",
                                 data=csv_data,
@@ -575,7 +596,11 @@ with tab_trades:
                         trade_id = st.selectbox("Select Trade", range(len(trades)),
                                                format_func=lambda i: f"{trades[i].get('timestamp', 'N/A')} - {trades[i].get('action', 'N/A')} {trades[i].get('symbol', 'N/A')}")
                         if trade_id is not None:
-                            st.json(trades[trade_id])
+                            # Full row (including blobs) for just the selected trade
+                            detail = requests.get(f"{MT5_Url}/trades",
+                                                  params={"limit": 1, "before_id": trades[trade_id]['id'] + 1},
+                                                  timeout=5).json().get('trades', [])
+                            st.json(detail[0] if detail else trades[trade_id])
             else:
                 st.info("No trades found.")
         else:
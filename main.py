@@ -220,10 +220,14 @@ def main():
     print(f"{Fore.CYAN}[*] Opening TopStep Dashboard...{Style.RESET_ALL}")
     webbrowser.open("https://topstepx.com/trade")
     
-    # IBKR Bridge
+    # IBKR Bridge (not needed when the MT5 bridge hosts the IBKR client in-process)
+    ibkr_inprocess = config['ibkr'].get('execution_mode', 'process') == 'inprocess'
     ib_log = open('logs/ibkr.log', 'a')
     ibkr_cmd = f'"{sys.executable}" -u src/ibkr/bridge.py'
-    mgr.start_process("IBKR_Bridge", ibkr_cmd, stdout=ib_log, stderr=ib_log)
+    if ibkr_inprocess:
+        print(f"{Fore.CYAN}[*] IBKR in-process mode: client hosted by MT5 Bridge{Style.RESET_ALL}")
+    else:
+        mgr.start_process("IBKR_Bridge", ibkr_cmd, stdout=ib_log, stderr=ib_log)
 
     # MT5 Bridge
     mt5_log = open('logs/mt5.log', 'a')
@@ -233,8 +237,9 @@ def main():
     # Tunnels (Primary & Backup)
     ibkr_sub = config['tunnels']['ibkr_subdomain']
     ibkr_port = config['server']['ibkr_port']
-    mgr.start_tunnel(ibkr_port, ibkr_sub, "IBKR_Tunnel")
-    mgr.start_backup_tunnel(ibkr_port, "IBKR_Backup", type="serveo")
+    if not ibkr_inprocess:
+        mgr.start_tunnel(ibkr_port, ibkr_sub, "IBKR_Tunnel")
+        mgr.start_backup_tunnel(ibkr_port, "IBKR_Backup", type="serveo")
 
     mt5_sub = config['tunnels']['mt5_subdomain']
     mt5_port = config['server']['mt5_port']
@@ -245,12 +250,13 @@ def main():
     print(f"\n{Fore.CYAN}[*] Verifying tunnel connectivity...{Style.RESET_ALL}")
     time.sleep(5)  # Give bridges time to start
     verify_tunnel_forwarding(mt5_sub, timeout=30)
-    verify_tunnel_forwarding(ibkr_sub, timeout=30)
+    if not ibkr_inprocess:
+        verify_tunnel_forwarding(ibkr_sub, timeout=30)
 
     # Verify webhooks can actually be received (round-trip test)
     print(f"\n{Fore.CYAN}[*] Verifying webhook delivery (round-trip test)...{Style.RESET_ALL}")
     mt5_webhook_ok = verify_webhook_url(mt5_sub, mt5_port, "MT5", timeout=15)
-    ibkr_webhook_ok = verify_webhook_url(ibkr_sub, ibkr_port, "IBKR", timeout=15)
+    ibkr_webhook_ok = ibkr_inprocess or verify_webhook_url(ibkr_sub, ibkr_port, "IBKR", timeout=15)
 
     if not mt5_webhook_ok or not ibkr_webhook_ok:
         print(f"\n{Fore.YELLOW}[WARNING] Webhook verification failed for one or more bridges!{Style.RESET_ALL}")
@@ -276,7 +282,9 @@ def main():
             mgr.monitor()
             
             # --- Auto-Restart with Backoff ---
-            required = ["IBKR_Bridge", "MT5_Bridge", "IBKR_Tunnel", "MT5_Tunnel", "Dashboard"]
+            required = ["MT5_Bridge", "MT5_Tunnel", "Dashboard"]
+            if not ibkr_inprocess:
+                required += ["IBKR_Bridge", "IBKR_Tunnel"]
             for name in required:
                 if name not in mgr.processes:
                     if mgr.should_restart(name):
@@ -297,8 +305,13 @@ def main():
             if 'connection_states' not in locals():
                 connection_states = {"IBKR": False, "MT5": False}
 
-            # IBKR Check
-            ib_data = mgr.check_health("IBKR_Bridge", f"http://localhost:{config['server']['ibkr_port']}")
+            mt5_data = mgr.check_health("MT5_Bridge", f"http://localhost:{config['server']['mt5_port']}")
+
+            # IBKR Check (in-process mode reports through the MT5 bridge health)
+            if ibkr_inprocess:
+                ib_data = {"status": mt5_data.get("ibkr_status")} if mt5_data else None
+            else:
+                ib_data = mgr.check_health("IBKR_Bridge", f"http://localhost:{config['server']['ibkr_port']}")
             if ib_data:
                 is_connected = (ib_data.get("status") == "connected")
                 if is_connected and (not connection_states["IBKR"] or first_run):
@@ -311,7 +324,6 @@ def main():
                     connection_states["IBKR"] = False
             
             # MT5 Check
-            mt5_data = mgr.check_health("MT5_Bridge", f"http://localhost:{config['server']['mt5_port']}")
             if mt5_data:
                 is_connected = (mt5_data.get("status") == "connected")
                 if is_connected and not connection_states["MT5"]:
@@ -349,7 +361,8 @@ def main():
             if time.time() - last_tunnel_check > 60:
                 # Check if public tunnel URLs are actually reachable
                 mgr.check_public_health("MT5_Tunnel", f"https://{mt5_sub}.loca.lt")
-                mgr.check_public_health("IBKR_Tunnel", f"https://{ibkr_sub}.loca.lt")
+                if not ibkr_inprocess:
+                    mgr.check_public_health("IBKR_Tunnel", f"https://{ibkr_sub}.loca.lt")
                 last_tunnel_check = time.time()
 
     # --- External App Keep-Alive (Check every 60s) ---
@@ -5,11 +5,10 @@ import os
 import json
 import logging
 import asyncio
-import threading
 import time
 import datetime
-from concurrent.futures import Future
 from dotenv import load_dotenv
+from waitress import serve
 
 # Load environment variables from .env file
 load_dotenv()
@@ -24,8 +23,8 @@ except RuntimeError:
 # Add parent dir to path to find client
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.ibkr.client import IBKRClient
-from src.ibkr.rest_client import IBKRWebClient
+from src.ibkr.runtime import IBKRRuntime
+from src.utils.internal_channel import derive_internal_token, is_internal_request
 
 # Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [IBKR] %(message)s')
@@ -48,6 +47,8 @@ def load_config():
     return config
 
 config = load_config()
+# Accepted from the local MT5 bridge instead of the public webhook secret
+INTERNAL_TOKEN = derive_internal_token(config)
 app = Flask(__name__)
 CORS(app)
 
@@ -58,64 +59,28 @@ STATE = {
 }
 
 # --- ASYNCIO BACKGROUND THREAD ---
-# We create a specific loop for IBKR to run deeply in
-ibkr_loop = asyncio.new_event_loop()
-
-# Client holder
-client = None
-client_ready = threading.Event()
-
-def start_loop(loop):
-    asyncio.set_event_loop(loop)
-    logger.info("Starting AsyncIO Event Loop...")
-    
-    # Instantiate Client INSIDE the thread so IB() picks up this loop
-    global client
-    try:
-        # Client Factory Logic
-        mode = config['ibkr'].get('tws_login_mode', 'manual')
-        api_key = config['ibkr'].get('api_key', '')
-        
-        if mode == 'manual' and api_key:
-             logger.info("Initializing IBKR Web Client (REST Mode)...")
-             client = IBKRWebClient(config)
-        else:
-             logger.info("Initializing IBKR TWS Client (Socket Mode)...")
-             client = IBKRClient(config)
-             
-        client_ready.set()
-        logger.info("IBKR Client Initialized.")
-        
-        # Initial Connect
-        logger.info("Initiating Background Connection...")
-        loop.create_task(client.connect())
-        
-        loop.run_forever()
-    except Exception as e:
-        logger.error(f"Critical Loop Error: {e}")
-
-# Start background thread
-t = threading.Thread(target=start_loop, args=(ibkr_loop,), daemon=True)
-t.start()
+# IBKR loop + client live in the shared runtime (also hostable by the MT5 bridge)
+runtime = IBKRRuntime(config)
+runtime.start()
 
 # Helper to run async tasks from Flask
 def run_async(coro):
-    return asyncio.run_coroutine_threadsafe(coro, ibkr_loop).result()
+    return runtime.run(coro)
 
 @app.route('/health', methods=['GET'])
 def health():
-    if not client_ready.is_set():
+    if not runtime.client_ready.is_set():
         return jsonify({"status": "starting", "last_trade": STATE["last_trade"]})
 
     # Auto-Connect if disconnected
-    if not client.is_connected():
+    if not runtime.client.is_connected():
         try:
-            logger.info("Health Check: Attempting TWS Connection (Async)...")
-            asyncio.run_coroutine_threadsafe(client.connect(), ibkr_loop)
+            if runtime.reconnect(min_interval=config['ibkr'].get('reconnect_interval_seconds', 5)):
+                logger.info("Health Check: Attempting TWS Connection (Async)...")
         except Exception as e:
             logger.error(f"Auto-Connect Failed: {e}")
 
-    connected = client.is_connected()
+    connected = runtime.client.is_connected()
     STATE["connected"] = connected
     return jsonify({"status": "connected" if connected else "disconnected", "last_trade": STATE["last_trade"]})
 
@@ -182,15 +147,15 @@ def check_verification(token):
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
-    if not client_ready.is_set():
+    if not runtime.client_ready.is_set():
         return jsonify({"error": "Bridge Starting"}), 503
 
     data = request.json
     if not data: return jsonify({"error": "No data"}), 400
     
-    # Security
+    # Security: internal token from the MT5 bridge, or the public webhook secret
     secret = config['security']['webhook_secret']
-    if data.get('secret') != secret:
+    if not is_internal_request(request.headers, INTERNAL_TOKEN) and data.get('secret') != secret:
         logger.warning(f"Unauthorized: {request.remote_addr}")
         return jsonify({"error": "Unauthorized"}), 401
 
@@ -200,7 +165,7 @@ def webhook():
     try:
         start_time = time.time()
         # Blocks Flask thread until result is available
-        result = run_async(client.execute_trade(data))
+        result = run_async(runtime.client.execute_trade(data))
         duration = (time.time() - start_time) * 1000 # ms
         
         STATE["last_trade"] = f"{data.get('action')} {data.get('symbol')}"
@@ -218,6 +183,7 @@ def webhook():
 
 if __name__ == "__main__":
     port = config['server']['ibkr_port']
-    logger.info(f"Starting IBKR Bridge on {port}")
-    # Run Flask (blocks main thread)
-    app.run(host="0.0.0.0", port=port)
+    threads = config['server'].get('ibkr_threads', 8)
+    logger.info(f"Starting IBKR Bridge on {port} (Waitress Production Server, {threads} threads)")
+    # Waitress speaks HTTP/1.1 keep-alive, so the MT5 bridge's pooled connections are reused
+    serve(app, host="0.0.0.0", port=port, threads=threads)
@@ -4,10 +4,18 @@ import logging
 import json
 import os
 import random
-from datetime import datetime
+import time
+
+from src.ibkr.contract_cache import ContractCache
+from src.ibkr.position_index import PositionIndex
 
 logger = logging.getLogger("IBKR_Client")
 
+REJECTED_STATES = frozenset({'Cancelled', 'ApiCancelled', 'Inactive'})
+# Order states that count as a broker acknowledgement (working, filled or rejected).
+# REJECTED_STATES is added explicitly: not every ib_async release lists Inactive as done.
+ACK_STATES = frozenset({'PreSubmitted', 'Submitted'}) | OrderStatus.DoneStates | REJECTED_STATES
+
 class IBKRClient:
     def __init__(self, config):
         self.config = config
@@ -29,9 +37,48 @@ class IBKRClient:
         self.default_exchange = config['ibkr'].get('default_exchange', 'CME')
         self.default_currency = config['ibkr'].get('default_currency', 'USD')
 
-        # Contract cache to avoid repeated resolution (symbol -> (contract, expiry))
-        self._contract_cache = {}
-        
+        # Persistent, roll-aware futures contract cache (warmed at connect)
+        self.contract_cache = ContractCache(
+            config['ibkr'].get('contract_cache_path', 'ibkr_contracts.json'),
+            roll_days=config['ibkr'].get('contract_roll_days', 0)
+        )
+        self.contract_refresh_interval = config['ibkr'].get('contract_refresh_hours', 12) * 3600
+        self._contract_refresh_task = None
+
+        # Order acknowledgement deadline and recent per-order latencies (order_id -> dict)
+        self.order_ack_timeout = config['ibkr'].get('order_ack_timeout_ms', 2000) / 1000.0
+        self.order_latency = {}
+
+        # Live position index (seeded at connect, kept current by positionEvent)
+        self.positions = PositionIndex()
+        self.ib.positionEvent += self.positions.update
+        self.ib.disconnectedEvent += self._on_disconnected
+
+        # Account values (tag -> float, base/USD currency) kept current by accountValueEvent,
+        # and per-contract initial margin from whatIfOrder (conId -> $ per contract, per session)
+        self.account_values = {}
+        self.margin_cache = {}
+        # Failed/UNSET lookups (conId -> monotonic retry time) so trades don't repeat them
+        self.margin_misses = {}
+        self.margin_retry_seconds = self.equity_config.get('margin_retry_seconds', 60)
+        self.fallback_margin = self.equity_config.get('fallback_margin_per_contract', 500)
+        self.ib.accountValueEvent += self._on_account_value
+
+    def _on_disconnected(self):
+        # Positions may change while we're offline; reseed on the next connect
+        self.positions.synced = False
+        # Margin requirements are cached per session
+        self.margin_cache.clear()
+        self.margin_misses.clear()
+
+    def _on_account_value(self, av):
+        if av.currency not in ('BASE', 'USD'):
+            return
+        try:
+            self.account_values[av.tag] = float(av.value)
+        except (TypeError, ValueError):
+            pass
+
     async def connect(self):
         """Connects to TWS/Gateway."""
         if self.ib.isConnected():
@@ -44,6 +91,15 @@ class IBKRClient:
             
             await self.ib.connectAsync(self.host, self.port, clientId=cid)
             logger.info("✅ Connected to Interactive Brokers")
+
+            # connectAsync has already synced positions and account values; index them
+            self.positions.reset(self.ib.positions())
+            for av in self.ib.accountValues():
+                self._on_account_value(av)
+
+            # Keep front-month contracts resolved ahead of the first trade
+            if self._contract_refresh_task is None or self._contract_refresh_task.done():
+                self._contract_refresh_task = asyncio.ensure_future(self._contract_refresh_loop())
             return True
         except Exception as e:
             logger.error(f"Connection Failed: {e}")
@@ -59,14 +115,14 @@ class IBKRClient:
             logger.info(f"Symbol mapped: {symbol} -> {mapped}")
         return mapped
 
-    def calculate_quantity(self, requested_qty, symbol=None):
+    def calculate_quantity(self, requested_qty, symbol=None, margin_per_contract=None):
         """
         Calculate actual quantity based on position sizing config.
         - fixed mode: micros_per_mini conversion, capped at max_micros
         - equity mode: calculate based on account equity percentage
         """
-        if self.sizing_mode == 'equity' and self.equity_config.get('enabled', False):
-            return self._calculate_equity_based_qty(requested_qty, symbol)
+        if self.uses_equity_sizing():
+            return self._calculate_equity_based_qty(requested_qty, symbol, margin_per_contract)
 
         # Fixed mode: 1 mini = micros_per_mini micros
         qty = int(requested_qty * self.micros_per_mini)
@@ -74,7 +130,10 @@ class IBKRClient:
         logger.info(f"Position sizing: {requested_qty} -> {qty} contracts (mode={self.sizing_mode}, max={self.max_micros})")
         return max(1, qty)
 
-    def _calculate_equity_based_qty(self, requested_qty, symbol=None):
+    def uses_equity_sizing(self):
+        return self.sizing_mode == 'equity' and self.equity_config.get('enabled', False)
+
+    def _calculate_equity_based_qty(self, requested_qty, symbol=None, margin_per_contract=None):
         """Calculate quantity based on account equity percentage."""
         try:
             base_equity = self.equity_config.get('base_equity', 10000)
@@ -82,26 +141,20 @@ class IBKRClient:
             max_pos_pct = self.equity_config.get('max_position_pct', 5.0)
             scale_factor = self.equity_config.get('scale_factor', 1.0)
 
-            # Get current account equity (if connected)
-            account_equity = base_equity
-            if self.ib.isConnected():
-                account_values = self.ib.accountSummary()
-                for av in account_values:
-                    if av.tag == 'NetLiquidation':
-                        account_equity = float(av.value)
-                        break
+            # Current account equity from the streamed account values (if connected)
+            account_equity = self.account_values.get('NetLiquidation', base_equity)
 
             # Calculate position size based on equity
             risk_amount = account_equity * (risk_pct / 100.0)
             max_amount = account_equity * (max_pos_pct / 100.0)
 
-            # For futures, assume ~$500 margin per micro
-            margin_per_contract = 500
+            # Initial margin per contract from whatIfOrder, else the configured fallback
+            margin_per_contract = margin_per_contract or self.fallback_margin
             qty_from_risk = int(risk_amount / margin_per_contract * scale_factor)
             qty_from_max = int(max_amount / margin_per_contract)
 
             qty = min(qty_from_risk, qty_from_max, self.max_micros)
-            logger.info(f"Equity sizing: equity=${account_equity:.0f}, risk={risk_pct}%, qty={qty}")
+            logger.info(f"Equity sizing: equity=${account_equity:.0f}, margin=${margin_per_contract:.0f}, risk={risk_pct}%, qty={qty}")
             return max(1, qty)
 
         except Exception as e:
@@ -112,58 +165,98 @@ class IBKRClient:
         """Get current account net liquidation value."""
         if not self.ib.isConnected():
             return None
+        return self.account_values.get('NetLiquidation')
+
+    async def get_initial_margin(self, contract):
+        """
+        Initial margin for one contract, from whatIfOrder once per session.
+        Returns None if it can't be determined (caller uses the fallback margin);
+        a miss is remembered for margin_retry_seconds so the order path doesn't
+        repeat the what-if round-trip on every trade.
+        """
+        if contract.conId in self.margin_cache:
+            return self.margin_cache[contract.conId]
+        if not contract.conId or not self.ib.isConnected():
+            return None
+        if time.monotonic() < self.margin_misses.get(contract.conId, 0):
+            return None
         try:
-            account_values = self.ib.accountSummary()
-            for av in account_values:
-                if av.tag == 'NetLiquidation':
-                    return float(av.value)
+            state = await self.ib.whatIfOrderAsync(contract, MarketOrder('BUY', 1))
+            margin = float(state.initMarginChange)
+            if not 0 < margin < 1e300:  # UNSET_DOUBLE when TWS has no estimate
+                raise ValueError("no initial margin estimate")
         except Exception as e:
-            logger.error(f"Failed to get account equity: {e}")
-        return None
+            logger.warning(f"whatIfOrder margin lookup failed for {contract.localSymbol}: {e} "
+                           f"(using fallback margin for {self.margin_retry_seconds}s)")
+            self.margin_misses[contract.conId] = time.monotonic() + self.margin_retry_seconds
+            return None
+        self.margin_cache[contract.conId] = margin
+        self.margin_misses.pop(contract.conId, None)
+        logger.info(f"Initial margin for {contract.localSymbol}: ${margin:.2f}")
+        return margin
+
+    @staticmethod
+    def _futures_key(symbol, exchange, currency):
+        # For MNQ/MES, exchange should be CME/GLOBEX
+        fut_exchange = 'CME' if exchange in ['CME', 'GLOBEX', 'SMART'] else exchange
+        return fut_exchange, f"{symbol}_FUT_{fut_exchange}_{currency}"
+
+    async def _refresh_contract(self, symbol, exchange, currency):
+        """Resolve upcoming expiries for a future and store them in the contract cache."""
+        fut_exchange, cache_key = self._futures_key(symbol, exchange, currency)
+        contract = Future(symbol=symbol, exchange=fut_exchange, currency=currency)
+        logger.info(f"Resolving futures contract: {symbol} on {fut_exchange}")
+
+        details = await self.ib.reqContractDetailsAsync(contract)
+        if not details:
+            raise Exception(f"No contracts found for {symbol}")
+
+        active = self.contract_cache.put(cache_key, [d.contract for d in details])
+        if not active:
+            raise Exception(f"No valid future contracts for {symbol}")
+
+        self.contract_cache.save()
+        logger.info(f"Resolved {symbol} to front month: {active.localSymbol} (expires {active.lastTradeDateOrContractMonth})")
+        return active
+
+    async def warm_contracts(self, force=False):
+        """
+        Resolve every mapped futures symbol that is missing, stale or near its
+        last expiry, and prefetch initial margins when equity sizing is on.
+        """
+        for symbol in sorted(set(self.symbol_map.values())):
+            _, cache_key = self._futures_key(symbol, self.default_exchange, self.default_currency)
+            try:
+                if force or self.contract_cache.needs_refresh(cache_key, self.contract_refresh_interval):
+                    contract = await self._refresh_contract(symbol, self.default_exchange, self.default_currency)
+                else:
+                    contract = self.contract_cache.get(cache_key)
+                if contract and self.uses_equity_sizing():
+                    await self.get_initial_margin(contract)
+            except Exception as e:
+                logger.error(f"Contract warm-up failed for {symbol}: {e}")
+
+    async def _contract_refresh_loop(self):
+        """Background refresh so rolls are resolved before the current contract expires."""
+        while self.ib.isConnected():
+            await self.warm_contracts()
+            await asyncio.sleep(min(self.contract_refresh_interval, 3600))
 
     async def resolve_contract(self, symbol, sec_type, currency, exchange):
         """Resolves contract, supporting Futures Front Month with caching."""
         if sec_type == 'FUT':
-            # Check cache first
-            cache_key = f"{symbol}_{sec_type}_{exchange}"
-            if cache_key in self._contract_cache:
-                cached_contract, cached_expiry = self._contract_cache[cache_key]
-                today = datetime.now().strftime('%Y%m%d')
-                # Use cached contract if still valid (not expired)
-                if cached_expiry >= today:
-                    logger.info(f"Using cached contract for {symbol}: {cached_contract.localSymbol}")
-                    return cached_contract
-                else:
-                    logger.info(f"Cached contract for {symbol} expired, refreshing...")
-                    del self._contract_cache[cache_key]
-
-            # For MNQ/MES, exchange should be CME/GLOBEX
-            fut_exchange = 'CME' if exchange in ['CME', 'GLOBEX', 'SMART'] else exchange
-            # Create contract with proper parameters
-            contract = Future(symbol=symbol, exchange=fut_exchange, currency=currency)
-            logger.info(f"Resolving futures contract: {symbol} on {fut_exchange}")
-            try:
-                details = await self.ib.reqContractDetailsAsync(contract)
-                if not details:
-                    raise Exception(f"No contracts found for {symbol}")
+            # Cache first (pure in-memory; warmed at connect and refreshed in the background)
+            fut_exchange, cache_key = self._futures_key(symbol, exchange, currency)
+            cached = self.contract_cache.get(cache_key)
+            if cached:
+                logger.info(f"Using cached contract for {symbol}: {cached.localSymbol}")
+                return cached
 
-                today = datetime.now().strftime('%Y%m%d')
-                valid = [d.contract for d in details if d.contract.lastTradeDateOrContractMonth and d.contract.lastTradeDateOrContractMonth >= today]
-
-                if not valid:
-                    raise Exception(f"No valid future contracts for {symbol}")
-
-                valid.sort(key=lambda c: c.lastTradeDateOrContractMonth)
-                front_month = valid[0]
-                logger.info(f"Resolved {symbol} to front month: {front_month.localSymbol} (expires {front_month.lastTradeDateOrContractMonth})")
-
-                # Cache the resolved contract
-                self._contract_cache[cache_key] = (front_month, front_month.lastTradeDateOrContractMonth)
-
-                return front_month
+            try:
+                return await self._refresh_contract(symbol, exchange, currency)
             except Exception as e:
                 logger.error(f"Future resolution failed for {symbol}: {e}")
-                return contract
+                return Future(symbol=symbol, exchange=fut_exchange, currency=currency)
         
         # Standard Types
         if sec_type == 'CASH':
@@ -198,18 +291,13 @@ class IBKRClient:
         order_type = data.get('type', 'MARKET').upper()
         price = float(data.get('price', 0.0))
 
-        # Apply position sizing (1 mini = 1 micro, max 3)
         sec_type = data.get('secType', 'CASH')
-        if sec_type == 'FUT':
-            qty = self.calculate_quantity(raw_qty, symbol)
-        else:
-            qty = raw_qty
 
         # Use defaults from config if not specified
         exchange = data.get('exchange', self.default_exchange if sec_type == 'FUT' else 'SMART')
         currency = data.get('currency', self.default_currency)
 
-        # Contract
+        # Contract (resolved first so equity sizing can use its margin)
         contract = await self.resolve_contract(
             symbol,
             sec_type,
@@ -217,6 +305,13 @@ class IBKRClient:
             exchange
         )
 
+        # Apply position sizing (1 mini = 1 micro, max 3)
+        if sec_type == 'FUT':
+            margin = await self.get_initial_margin(contract) if self.uses_equity_sizing() else None
+            qty = self.calculate_quantity(raw_qty, symbol, margin)
+        else:
+            qty = raw_qty
+
         orders = []
         # Parent Order
         if order_type == 'LIMIT' and price > 0:
@@ -243,31 +338,89 @@ class IBKRClient:
         logger.info(f"IBKR CONTRACT: {contract.localSymbol or contract.symbol}, secType={contract.secType}, qty={qty}")
         logger.info(f"Placing {len(orders)} orders for {symbol}...")
 
-        trade = None
-        for o in orders:
-            trade = self.ib.placeOrder(contract, o)
+        placed_at = time.perf_counter()
+        trades = [self.ib.placeOrder(contract, o) for o in orders]
+
+        # Wait on the parent order: bracket children only go live once it fills
+        trade = trades[0]
+        latency = self._track_fill_latency(trade, placed_at)
+        order_status = await self._await_order_ack(trade, placed_at, latency)
+
+        order_id = trade.order.orderId
+        logger.info(f"IBKR RESULT: order_id={order_id}, status={order_status}, "
+                    f"ack={latency['ack_ms']}ms, fill={latency['fill_ms']}ms")
+
+        result = {
+            "status": "success",
+            "order_id": order_id,
+            "order_status": order_status,
+            "ack_latency_ms": latency['ack_ms'],
+            "fill_latency_ms": latency['fill_ms']
+        }
+        if order_status in REJECTED_STATES:
+            result["status"] = "error"
+            result["message"] = f"Order {order_status}"
+        elif latency['ack_ms'] is None:
+            result["ack_timeout"] = True
+        return result
+
+    def _track_fill_latency(self, trade, placed_at):
+        """Record fill latency when the order fills, even after execute_trade has returned."""
+        latency = {"ack_ms": None, "fill_ms": None}
+
+        def on_filled(t):
+            latency['fill_ms'] = round((time.perf_counter() - placed_at) * 1000, 2)
+            logger.info(f"IBKR FILL: order_id={t.order.orderId} in {latency['fill_ms']}ms")
+
+        if trade.orderStatus.status == 'Filled':
+            on_filled(trade)
+        else:
+            trade.filledEvent += on_filled
+
+        self.order_latency[trade.order.orderId] = latency
+        while len(self.order_latency) > 256:
+            self.order_latency.pop(next(iter(self.order_latency)))
+        return latency
 
-        await asyncio.sleep(0.5)
+    async def _await_order_ack(self, trade, placed_at, latency):
+        """
+        Wait until the order is acknowledged (Submitted, Filled or rejected)
+        or the ack deadline passes, whichever comes first.
 
-        # Log order result
-        order_id = trade.order.orderId if trade else 0
-        order_status = trade.orderStatus.status if trade and trade.orderStatus else 'Unknown'
-        logger.info(f"IBKR RESULT: order_id={order_id}, status={order_status}")
+        Returns:
+            str: The order status at that point
+        """
+        acked = asyncio.get_running_loop().create_future()
 
-        return {"status": "success", "order_id": order_id, "order_status": order_status}
+        def on_status(t):
+            if t.orderStatus.status in ACK_STATES and not acked.done():
+                latency['ack_ms'] = round((time.perf_counter() - placed_at) * 1000, 2)
+                acked.set_result(t.orderStatus.status)
+
+        on_status(trade)
+        trade.statusEvent += on_status
+        try:
+            return await asyncio.wait_for(acked, self.order_ack_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"IBKR order {trade.order.orderId} not acknowledged within "
+                           f"{self.order_ack_timeout * 1000:.0f}ms (status={trade.orderStatus.status})")
+            return trade.orderStatus.status or 'Unknown'
+        finally:
+            trade.statusEvent -= on_status
 
     async def close_position(self, symbol):
-        """Closes positions for a symbol."""
-        await self.ib.reqPositionsAsync()
+        """Closes positions for a symbol (exact symbol/localSymbol/conId match, empty = all)."""
+        if not self.positions.synced:
+            # Index not seeded yet (e.g. mid-reconnect): fall back to a positions request
+            await self.ib.reqPositionsAsync()
+            self.positions.reset(self.ib.positions())
+
         count = 0
-        for pos in self.ib.positions():
-            # Check symbol match (simple string match)
-            if symbol in pos.contract.symbol or symbol in pos.contract.localSymbol:
-                if pos.position == 0: continue
-                action = 'SELL' if pos.position > 0 else 'BUY'
-                qty = abs(pos.position)
-                logger.info(f"Closing {pos.contract.localSymbol}: {action} {qty}")
-                self.ib.placeOrder(pos.contract, MarketOrder(action, qty))
-                count += 1
-        
+        for pos in self.positions.match(symbol):
+            action = 'SELL' if pos.position > 0 else 'BUY'
+            qty = abs(pos.position)
+            logger.info(f"Closing {pos.contract.localSymbol}: {action} {qty}")
+            self.ib.placeOrder(pos.contract, MarketOrder(action, qty))
+            count += 1
+
         return {"status": "success", "closed_count": count}
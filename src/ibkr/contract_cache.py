@@ -0,0 +1,145 @@
+"""
+IBKR Contract Cache Module
+Persistent cache of resolved futures contracts so trades never wait on a
+reqContractDetails round-trip.
+- Stores every upcoming expiry per symbol (front month + next months)
+- Saved to disk as JSON and reloaded on startup
+- Roll-aware: the active contract switches to the next expiry roll_days
+  before the current one expires, without a network call
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from ib_async import Contract
+
+logger = logging.getLogger("IBKR_ContractCache")
+
+# Contract fields persisted to disk (enough to place orders without re-qualifying)
+CONTRACT_FIELDS = (
+    'secType', 'conId', 'symbol', 'lastTradeDateOrContractMonth', 'multiplier',
+    'exchange', 'currency', 'localSymbol', 'tradingClass'
+)
+
+
+def contract_to_dict(contract):
+    return {f: getattr(contract, f, '') for f in CONTRACT_FIELDS}
+
+
+def contract_from_dict(data):
+    return Contract(**{f: data[f] for f in CONTRACT_FIELDS if f in data})
+
+
+def _today():
+    return datetime.now().strftime('%Y%m%d')
+
+
+class ContractCache:
+    """Disk-backed map of cache key -> upcoming futures contracts."""
+
+    def __init__(self, path, roll_days=0, max_contracts=3):
+        """
+        Args:
+            path: JSON file the cache is persisted to
+            roll_days: Switch to the next expiry this many days before the current one expires
+            max_contracts: Upcoming expiries kept per key
+        """
+        self.path = path
+        self.roll_days = roll_days
+        self.max_contracts = max_contracts
+        self._entries = {}  # key -> {"contracts": [dict, ...], "resolved_at": epoch}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load the cache from disk (missing or unreadable file = empty cache)."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            with self._lock:
+                self._entries = data.get('entries', {})
+            logger.info(f"Loaded {len(self._entries)} cached contracts from {self.path}")
+        except Exception as e:
+            logger.warning(f"Could not load contract cache {self.path}: {e}")
+
+    def save(self):
+        """Write the cache to disk atomically."""
+        with self._lock:
+            data = {"saved_at": time.time(), "entries": self._entries}
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Could not save contract cache {self.path}: {e}")
+
+    def _roll_cutoff(self, today=None):
+        """Contracts expiring before this date (YYYYMMDD) are rolled out of."""
+        today = today or _today()
+        cutoff = datetime.strptime(today, '%Y%m%d') + timedelta(days=self.roll_days)
+        return cutoff.strftime('%Y%m%d')
+
+    def get(self, key, today=None):
+        """
+        Active contract for key, or None if nothing usable is cached.
+        Pure in-memory lookup, never touches the network.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry:
+            return None
+        cutoff = self._roll_cutoff(today)
+        for data in entry['contracts']:
+            if data['lastTradeDateOrContractMonth'] >= cutoff:
+                return contract_from_dict(data)
+        return None
+
+    def put(self, key, contracts, today=None):
+        """
+        Store the upcoming contracts for key (unexpired only, sorted by expiry).
+
+        Returns:
+            The active contract after the update, or None
+        """
+        today = today or _today()
+        upcoming = sorted(
+            (c for c in contracts if c.lastTradeDateOrContractMonth and c.lastTradeDateOrContractMonth >= today),
+            key=lambda c: c.lastTradeDateOrContractMonth
+        )[:self.max_contracts]
+        with self._lock:
+            self._entries[key] = {
+                "contracts": [contract_to_dict(c) for c in upcoming],
+                "resolved_at": time.time()
+            }
+        return self.get(key, today)
+
+    def needs_refresh(self, key, max_age_seconds, today=None):
+        """
+        True if key is missing, older than max_age_seconds, or about to run
+        out of contracts (no expiry left after the active one).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry or time.time() - entry.get('resolved_at', 0) > max_age_seconds:
+            return True
+        cutoff = self._roll_cutoff(today)
+        remaining = [d for d in entry['contracts'] if d['lastTradeDateOrContractMonth'] >= cutoff]
+        return len(remaining) < 2
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def status(self):
+        """Active contract per key for health reporting."""
+        return {key: getattr(self.get(key), 'localSymbol', None) for key in self.keys()}
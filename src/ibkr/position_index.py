@@ -0,0 +1,75 @@
+"""
+IBKR Position Index Module
+Live view of open IBKR positions maintained from ib_async positionEvent
+updates, so CLOSE can flatten without a reqPositions round-trip.
+- Keyed by conId, with symbol and localSymbol lookups
+- Exact matching only ("MNQ" never catches "MNQZ6" of another root)
+- Empty symbol means every open position
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger("IBKR_PositionIndex")
+
+
+class PositionIndex:
+    """Open positions keyed by conId, symbol and localSymbol."""
+
+    def __init__(self):
+        self._by_conid = {}
+        self._by_symbol = {}  # symbol / localSymbol -> set of conIds
+        self._lock = threading.Lock()
+        self.synced = False  # True once seeded from a full position list
+
+    def reset(self, positions):
+        """Replace the index with a full position snapshot."""
+        with self._lock:
+            self._by_conid.clear()
+            self._by_symbol.clear()
+            for pos in positions:
+                self._apply(pos)
+            self.synced = True
+
+    def update(self, pos):
+        """positionEvent handler: add, change or drop one position."""
+        with self._lock:
+            self._apply(pos)
+
+    def _apply(self, pos):
+        con_id = pos.contract.conId
+        self._drop(con_id)
+        if pos.position == 0:
+            return
+        self._by_conid[con_id] = pos
+        for key in (pos.contract.symbol, pos.contract.localSymbol):
+            if key:
+                self._by_symbol.setdefault(key.upper(), set()).add(con_id)
+
+    def _drop(self, con_id):
+        old = self._by_conid.pop(con_id, None)
+        if old is None:
+            return
+        for key in (old.contract.symbol, old.contract.localSymbol):
+            ids = self._by_symbol.get((key or '').upper())
+            if ids is not None:
+                ids.discard(con_id)
+                if not ids:
+                    del self._by_symbol[key.upper()]
+
+    def match(self, symbol):
+        """
+        Open positions whose symbol, localSymbol or conId equals `symbol`.
+        An empty symbol returns every open position.
+        """
+        with self._lock:
+            if not symbol:
+                return list(self._by_conid.values())
+            key = str(symbol).upper()
+            con_ids = set(self._by_symbol.get(key, ()))
+            if key.isdigit() and int(key) in self._by_conid:
+                con_ids.add(int(key))
+            return [self._by_conid[c] for c in con_ids]
+
+    def __len__(self):
+        return len(self._by_conid)
@@ -1,13 +1,30 @@
-import requests
+import asyncio
+import json
 import logging
-import urllib3
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
 
-# Disable self-signed cert warnings for localhost gateway
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import aiohttp
 
 logger = logging.getLogger("IBKR_Web")
 
+# Order replies (precautionary warnings) we confirm automatically before giving up
+MAX_REPLY_CONFIRMATIONS = 5
+
+
 class IBKRWebClient:
+    """
+    IBKR Client Portal (Web API) client.
+    - One pooled aiohttp session (keep-alive HTTPS to the local CP Gateway)
+    - symbol -> conid resolution with a persistent JSON cache
+    - Order placement that confirms /iserver/reply prompts automatically
+    - Background /tickle keeps the brokerage session alive
+    All I/O is non-blocking so it can share the ibkr_loop with other work.
+    """
+
     def __init__(self, config):
         self.config = config['ibkr']
         self.base_url = self.config.get('base_url', 'https://localhost:5000/v1/api')
@@ -15,69 +32,254 @@ class IBKRWebClient:
         self.api_key = self.config.get('api_key', '')
         self.connected = False
 
+        self.symbol_map = self.config.get('symbol_map', {})
+        sizing = self.config.get('position_sizing', {})
+        self.micros_per_mini = sizing.get('micros_per_mini', 1)
+        self.max_micros = sizing.get('max_micros', 3)
+
+        self.pool_size = self.config.get('web_pool_size', 4)
+        self.request_timeout = self.config.get('web_timeout_seconds', 5)
+        self.tickle_interval = self.config.get('web_tickle_seconds', 60)
+        self.conid_cache_path = self.config.get('conid_cache_path', 'ibkr_conids.json')
+        self.conid_cache = self._load_conid_cache()
+        self._save_lock = threading.Lock()  # Saves run on executor threads
+
+        self._session = None
+        self._tickle_task = None
+
+    # --- HTTP ---
+
+    def _get_session(self):
+        """Pooled session, created lazily on the running loop."""
+        if self._session is None or self._session.closed:
+            headers = {}
+            if self.api_key:
+                headers['Authorization'] = f"Bearer {self.api_key}"
+            # CP Gateway on localhost uses a self-signed certificate
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ssl=False, keepalive_timeout=120)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+        return self._session
+
+    async def _request(self, method, path, **kwargs):
+        """JSON request against the CP Gateway. Raises on HTTP errors."""
+        async with self._get_session().request(method, f"{self.base_url}{path}", **kwargs) as r:
+            if r.status != 200:
+                text = await r.text()
+                raise Exception(f"{method} {path} -> {r.status}: {text[:200]}")
+            return await r.json(content_type=None)
+
+    async def close(self):
+        if self._tickle_task:
+            self._tickle_task.cancel()
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    # --- Session ---
+
     async def connect(self):
         """Checks connection to CP Gateway and fetches Account ID."""
         try:
             logger.info("Connecting to IBKR Web API...")
-            # Headers - Some wrappers use Authorization: Bearer <Key>
-            headers = {}
-            if self.api_key:
-                headers['Authorization'] = f"Bearer {self.api_key}"
 
             # 1. Auth Status
-            r = requests.get(f"{self.base_url}/iserver/auth/status", verify=False, headers=headers, timeout=5)
-            if r.status_code == 200:
-                data = r.json()
-                if data.get('authenticated', False):
-                    self.connected = True
-                    logger.info("✅ IBKR Web API Authenticated")
-                    
-                    # 2. Get Account ID
-                    r_acc = requests.get(f"{self.base_url}/portfolio/accounts", verify=False, headers=headers, timeout=5)
-                    if r_acc.status_code == 200:
-                         acc_data = r_acc.json()
-                         if acc_data:
-                             self.account_id = acc_data[0].get('id') or acc_data[0].get('accountId')
-                             logger.info(f"Loaded Account: {self.account_id}")
-                    return True
-                else:
-                    logger.warning("IBKR Web API Connected but NOT Authenticated (Login required on Gateway)")
-                    return False
-            else:
-                logger.error(f"IBKR Web API Error: {r.status_code}")
+            data = await self._request('GET', '/iserver/auth/status')
+            if not data.get('authenticated', False):
+                self.connected = False
+                logger.warning("IBKR Web API Connected but NOT Authenticated (Login required on Gateway)")
                 return False
+
+            self.connected = True
+            logger.info("✅ IBKR Web API Authenticated")
+
+            # 2. Get Account ID
+            if not self.account_id:
+                acc_data = await self._request('GET', '/portfolio/accounts')
+                if acc_data:
+                    self.account_id = acc_data[0].get('id') or acc_data[0].get('accountId')
+                    logger.info(f"Loaded Account: {self.account_id}")
+
+            # 3. Keep the session alive in the background
+            if self._tickle_task is None or self._tickle_task.done():
+                self._tickle_task = asyncio.ensure_future(self._tickle_loop())
+            return True
         except Exception as e:
+            self.connected = False
             logger.error(f"IBKR Web Connection Failed: {e}")
             return False
 
     def is_connected(self):
         return self.connected
 
+    async def tickle(self):
+        """Ping /tickle; tracks whether the brokerage session is still authenticated."""
+        try:
+            data = await self._request('POST', '/tickle')
+            auth = data.get('iserver', {}).get('authStatus', {})
+            authenticated = auth.get('authenticated', True)
+            if self.connected and not authenticated:
+                logger.warning("IBKR Web session lost authentication")
+            self.connected = authenticated
+        except Exception as e:
+            if self.connected:
+                logger.warning(f"IBKR Web tickle failed: {e}")
+            self.connected = False
+        return self.connected
+
+    async def _tickle_loop(self):
+        while True:
+            await asyncio.sleep(self.tickle_interval)
+            await self.tickle()
+
+    # --- Contracts ---
+
+    def _load_conid_cache(self):
+        if not os.path.exists(self.conid_cache_path):
+            return {}
+        try:
+            with open(self.conid_cache_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load conid cache {self.conid_cache_path}: {e}")
+            return {}
+
+    def _save_conid_cache(self, cache=None):
+        try:
+            tmp_path = self.conid_cache_path + ".tmp"
+            with self._save_lock:
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.conid_cache if cache is None else cache, f, indent=2)
+                os.replace(tmp_path, self.conid_cache_path)
+        except Exception as e:
+            logger.error(f"Could not save conid cache: {e}")
+
+    def map_symbol(self, symbol):
+        """Maps incoming symbol to IBKR symbol (e.g., NQ -> MNQ)."""
+        return self.symbol_map.get(symbol.upper(), symbol.upper())
+
+    async def resolve_conid(self, symbol, sec_type):
+        """symbol -> conid, from the persistent cache when the entry hasn't expired."""
+        key = f"{symbol}_{sec_type}"
+        today = datetime.now().strftime('%Y%m%d')
+        cached = self.conid_cache.get(key)
+        if cached and (not cached.get('expiry') or cached['expiry'] >= today):
+            return cached['conid']
+
+        if sec_type == 'FUT':
+            # Front month: earliest unexpired contract
+            data = await self._request('GET', '/trsrv/futures', params={'symbols': symbol})
+            contracts = [c for c in data.get(symbol, []) if str(c.get('expirationDate', '')) >= today]
+            if not contracts:
+                raise Exception(f"No valid future contracts for {symbol}")
+            front = min(contracts, key=lambda c: str(c['expirationDate']))
+            entry = {"conid": front['conid'], "expiry": str(front['expirationDate'])}
+        else:
+            data = await self._request('GET', '/iserver/secdef/search', params={'symbol': symbol})
+            if not data:
+                raise Exception(f"No contract found for {symbol}")
+            entry = {"conid": data[0]['conid'], "expiry": None}
+
+        logger.info(f"Resolved {symbol} ({sec_type}) -> conid {entry['conid']}")
+        self.conid_cache[key] = entry
+        # File write stays off the ibkr_loop; save a snapshot the loop can't mutate mid-dump
+        await asyncio.get_running_loop().run_in_executor(None, self._save_conid_cache, dict(self.conid_cache))
+        return entry['conid']
+
+    # --- Orders ---
+
+    async def _place_orders(self, orders):
+        """POST orders and confirm any reply prompts. Returns the final order acks."""
+        result = await self._request('POST', f"/iserver/account/{self.account_id}/orders", json={"orders": orders})
+
+        for _ in range(MAX_REPLY_CONFIRMATIONS):
+            if not (isinstance(result, list) and result and 'id' in result[0] and 'order_id' not in result[0]):
+                return result
+            reply = result[0]
+            logger.info(f"Confirming order reply {reply['id']}: {reply.get('message')}")
+            result = await self._request('POST', f"/iserver/reply/{reply['id']}", json={"confirmed": True})
+
+        raise Exception("Order not confirmed after repeated reply prompts")
+
     async def execute_trade(self, data):
         """Executes trade via Web API."""
+        start = time.perf_counter()
         if not self.account_id:
             await self.connect()
             if not self.account_id:
                 return {"status": "error", "message": "No Account ID"}
 
-        symbol = data.get('symbol')
         action = data.get('action', 'BUY').upper()
+        symbol = self.map_symbol(data.get('symbol', ''))
+
+        if action in ['CLOSE', 'EXIT', 'FLATTEN']:
+            return await self.close_position(symbol)
+
+        sec_type = data.get('secType') or ('FUT' if symbol in self.symbol_map.values() else 'STK')
         volume = float(data.get('volume', 1))
-        
-        # 1. Resolve Contract (Search)
-        # Simplified: We assume we need a conid (Contract ID) for Web API
-        # This is complex, skipping strict resolution for this skeleton.
-        # We'll assume the user might need to map symbols to conids or we do a quick search.
-        
-        # NOTE: Proper Web API implementation requires searching symbol -> getting conid -> placing order.
-        # For this quick rebuild requested by user, we will stick to the architecture:
-        
-        logger.info(f"Placing Web Order: {action} {volume} {symbol}")
-        
-        # Placeholder for actual complex order payload
-        # url = f"{self.base_url}/iserver/account/{self.account_id}/order"
-        # payload = { ... }
-        # r = requests.post(url, json=payload, verify=False)
-        
-        return {"status": "success", "message": "Order Sent (Web Mode)"}
+        if sec_type == 'FUT':
+            qty = max(1, min(int(volume * self.micros_per_mini), self.max_micros))
+        else:
+            qty = volume
+
+        try:
+            conid = await self.resolve_conid(symbol, sec_type)
+
+            order = {
+                "conid": conid,
+                "side": action,
+                "quantity": qty,
+                "orderType": "MKT",
+                "tif": "DAY",
+                "cOID": f"ub-{uuid.uuid4().hex[:12]}"
+            }
+            price = float(data.get('price', 0.0))
+            if data.get('type', 'MARKET').upper() == 'LIMIT' and price > 0:
+                order.update({"orderType": "LMT", "price": price})
 
+            logger.info(f"Placing Web Order: {action} {qty} {symbol} (conid {conid})")
+            acks = await self._place_orders([order])
+            ack = acks[0] if acks else {}
+            latency = round((time.perf_counter() - start) * 1000, 2)
+            logger.info(f"IBKR Web RESULT: order_id={ack.get('order_id')}, status={ack.get('order_status')}, {latency}ms")
+
+            return {
+                "status": "success",
+                "order_id": ack.get('order_id'),
+                "order_status": ack.get('order_status'),
+                "ack_latency_ms": latency
+            }
+        except Exception as e:
+            logger.error(f"IBKR Web Order Failed: {e}")
+            return {"status": "error", "message": str(e)}
+
+    async def close_position(self, symbol):
+        """Flattens positions matching symbol exactly (ticker or contract description); empty = all."""
+        try:
+            positions = await self._request('GET', f"/portfolio/{self.account_id}/positions/0")
+            orders = []
+            for pos in positions or []:
+                qty = pos.get('position', 0)
+                if not qty:
+                    continue
+                names = {str(pos.get('ticker', '')).upper(), str(pos.get('contractDesc', '')).upper(), str(pos.get('conid'))}
+                if symbol and symbol.upper() not in names:
+                    continue
+                orders.append({
+                    "conid": pos['conid'],
+                    "side": 'SELL' if qty > 0 else 'BUY',
+                    "quantity": abs(qty),
+                    "orderType": "MKT",
+                    "tif": "DAY",
+                    "cOID": f"ub-close-{uuid.uuid4().hex[:12]}"
+                })
+
+            if orders:
+                logger.info(f"Closing {len(orders)} IBKR Web positions for '{symbol or 'ALL'}'")
+                await self._place_orders(orders)
+            return {"status": "success", "closed_count": len(orders)}
+        except Exception as e:
+            logger.error(f"IBKR Web Close Failed: {e}")
+            return {"status": "error", "message": str(e)}
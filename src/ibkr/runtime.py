@@ -0,0 +1,152 @@
+"""
+IBKR Runtime Module
+Owns the asyncio loop thread and the IBKR client so it can be hosted either
+by the standalone IBKR bridge or directly inside the MT5 bridge.
+- Client is created INSIDE the loop thread so IB() binds to that loop
+- submit() hands a coroutine to the loop and returns a concurrent Future
+- execute_trade() wraps the client call with timing for the broker fan-out
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+# FIX: multiple event loops issue with ib_async/eventkit
+# This must run before imports that might check for a loop
+try:
+    asyncio.get_event_loop()
+except RuntimeError:
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+from src.ibkr.client import IBKRClient
+from src.ibkr.rest_client import IBKRWebClient
+
+logger = logging.getLogger("IBKR_Runtime")
+
+
+def create_client(config):
+    """Client factory: REST client for manual login with an API key, TWS socket client otherwise."""
+    mode = config['ibkr'].get('tws_login_mode', 'manual')
+    api_key = config['ibkr'].get('api_key', '')
+
+    if mode == 'manual' and api_key:
+        logger.info("Initializing IBKR Web Client (REST Mode)...")
+        return IBKRWebClient(config)
+
+    logger.info("Initializing IBKR TWS Client (Socket Mode)...")
+    return IBKRClient(config)
+
+
+class IBKRRuntime:
+    """Background asyncio loop hosting one IBKR client."""
+
+    def __init__(self, config, client_factory=create_client):
+        """
+        Args:
+            config: Full bridge config (the 'ibkr' section is used by the client)
+            client_factory: Callable(config) -> client, called on the loop thread
+        """
+        self.config = config
+        self.client_factory = client_factory
+        self.loop = asyncio.new_event_loop()
+        self.client = None
+        self.client_ready = threading.Event()
+        self.thread = None
+        self._reconnect_lock = threading.Lock()
+        self._reconnect_future = None
+        self._last_reconnect = 0.0
+
+    def start(self):
+        """Start the loop thread; the client connects in the background."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run_loop, name="IBKR_Loop", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the loop thread."""
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def wait_ready(self, timeout=None):
+        return self.client_ready.wait(timeout)
+
+    def is_connected(self):
+        return self.client_ready.is_set() and self.client.is_connected()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the IBKR loop. Returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the IBKR loop and block for its result."""
+        return self.submit(coro).result(timeout)
+
+    def reconnect(self, min_interval=0.0):
+        """
+        Kick off a background connect (errors are logged by the client).
+        Skipped while a previous attempt is still running or started less
+        than min_interval seconds ago, so frequent /health polls don't pile
+        connect coroutines onto the loop.
+
+        Returns:
+            Future of the new attempt, or None if throttled
+        """
+        with self._reconnect_lock:
+            pending = self._reconnect_future
+            if pending is not None and not pending.done():
+                return None
+            if time.monotonic() - self._last_reconnect < min_interval:
+                return None
+            self._last_reconnect = time.monotonic()
+            self._reconnect_future = self.submit(self.client.connect())
+            return self._reconnect_future
+
+    def execute_trade(self, data, timeout=None):
+        """
+        Submit a trade to the client without waiting for it.
+
+        Args:
+            timeout: Optional budget in seconds (e.g. the webhook's remaining
+                     deadline); the trade coroutine is cancelled on the loop
+                     once it runs out
+
+        Returns:
+            concurrent.futures.Future resolving to the client's result dict
+            plus 'duration_ms' (time from submit to result)
+        """
+        return self.submit(self._timed_trade(data, time.time(), timeout))
+
+    async def _timed_trade(self, data, start_time, timeout=None):
+        try:
+            result = await asyncio.wait_for(self.client.execute_trade(data), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"IBKR Trade cancelled: exceeded {timeout * 1000:.0f}ms budget")
+            result = {"status": "timeout", "message": f"IBKR order exceeded {timeout * 1000:.0f}ms budget"}
+        except Exception as e:
+            logger.error(f"IBKR Trade Error: {e}")
+            result = {"status": "error", "message": str(e)}
+        result = dict(result) if isinstance(result, dict) else {"status": "error", "message": str(result)}
+        result['duration_ms'] = (time.time() - start_time) * 1000
+        return result
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        logger.info("Starting AsyncIO Event Loop...")
+
+        # Instantiate Client INSIDE the thread so IB() picks up this loop
+        try:
+            self.client = self.client_factory(self.config)
+            self.client_ready.set()
+            logger.info("IBKR Client Initialized.")
+
+            # Initial Connect
+            logger.info("Initiating Background Connection...")
+            self.loop.create_task(self.client.connect())
+
+            self.loop.run_forever()
+        except Exception as e:
+            logger.error(f"Critical Loop Error: {e}")
@@ -1,4 +1,6 @@
 import MetaTrader5 as mt5
+import csv
+import io
 import json
 import os
 import sys
@@ -6,7 +8,10 @@ import logging
 import datetime
 import time
 import atexit
-from flask import Flask, request, jsonify
+import threading
+import uuid
+import zlib
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import requests
 import concurrent.futures
@@ -18,18 +23,28 @@ load_dotenv()
 
 # Add parent dir to path to find client
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.topstep.async_client import AsyncTopStepClient
 from src.topstep.client import TopStepClient
 from src.utils.alerts import AlertManager
+from src.utils.bounded_executor import PoolSaturated, build_broker_pools
+from src.utils.config_store import ConfigStore
 from src.utils.database import DatabaseManager
+from src.utils.deadline import Deadline, DeadlineExceeded
+from src.utils.internal_channel import InternalChannel, derive_internal_token
 from src.utils.logger import LogManager
+from src.utils.loop_thread import LoopThread
 from src.utils.scheduler import TradingScheduler, WebhookValidator, is_broker_paused
+from src.mt5.gateway import MT5Gateway
+from src.mt5.position_book import PositionBook, symbol_aliases
 
 # Logging
 logger = LogManager.get_logger("MT5_Bridge", log_file="logs/mt5.log")
 
-def load_config():
+# Config file path for live updates
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.json')
+
+def load_config(path=CONFIG_PATH):
     # Load from parent dir
-    path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.json')
     with open(path, 'r') as f:
         config = json.load(f)
 
@@ -50,44 +65,73 @@ def load_config():
         config['security']['webhook_secret'] = os.environ.get('WEBHOOK_SECRET')
     if os.environ.get('DISCORD_WEBHOOK_URL'):
         config['alerts']['discord_webhook'] = os.environ.get('DISCORD_WEBHOOK_URL')
+    # IBKR credentials (used when the IBKR client is hosted in-process)
+    if os.environ.get('IBKR_API_KEY'):
+        config['ibkr']['api_key'] = os.environ.get('IBKR_API_KEY')
+    if os.environ.get('IBKR_USERNAME'):
+        config['ibkr']['username'] = os.environ.get('IBKR_USERNAME')
+    if os.environ.get('IBKR_PASSWORD'):
+        config['ibkr']['password'] = os.environ.get('IBKR_PASSWORD')
 
     return config
 
-CONFIG = load_config()
+# In-memory config snapshot, swapped when config.json changes on disk
+CONFIG_STORE = ConfigStore(CONFIG_PATH, loader=load_config)
+CONFIG = CONFIG_STORE.snapshot.data
 MT5_CONF = CONFIG['mt5']
 
+def _on_config_reload(snapshot):
+    """Rebind module-level config references to the new snapshot."""
+    global CONFIG, MT5_CONF
+    CONFIG = snapshot.data
+    MT5_CONF = CONFIG['mt5']
+CONFIG_STORE.add_listener(_on_config_reload)
+
 # Initialize TopStep Client
 ts_client = TopStepClient(CONFIG)
+
+# Optional asyncio TopStep client on its own loop: orders run as coroutines,
+# so in-flight TopStep orders don't each hold a fan-out thread
+ts_loop = None
+ts_async_client = None
+if CONFIG.get('topstep', {}).get('async_client', False):
+    ts_loop = LoopThread("TopStep_Loop")
+    ts_async_client = AsyncTopStepClient(CONFIG)
 # Initialize Utils
 alerts = AlertManager(CONFIG)
-db = DatabaseManager('trades.db')
+db = DatabaseManager('trades.db', CONFIG.get('database', {}))
 webhook_validator = WebhookValidator(CONFIG)
 
-# Global Executor for Parallel Tasks
-executor = concurrent.futures.ThreadPoolExecutor(max_workers=10)
+# One bounded pool per broker so a hung venue can't starve the others
+broker_pools = build_broker_pools(CONFIG)
 
-# Ensure executor is cleaned up on exit
-def _shutdown_executor():
-    executor.shutdown(wait=False)
-atexit.register(_shutdown_executor)
+# Off-critical-path post-trade work (position refresh for async_journal rows);
+# the rows themselves are written by db's background journal thread
+journal_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="Journal")
 
-# Config file path for live updates
-CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.json')
+# Ack-first mode: accepted webhooks are dispatched here so the ingress thread
+# can return 202 immediately (separate from broker_pools, which run the broker legs)
+dispatch_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=CONFIG.get('execution', {}).get('dispatch_workers', 4),
+    thread_name_prefix="Dispatch"
+)
 
-def reload_config():
-    """Reload config from disk for live settings updates."""
-    global CONFIG
-    try:
-        with open(CONFIG_PATH, 'r') as f:
-            CONFIG = json.load(f)
-        return CONFIG
-    except Exception as e:
-        logger.error(f"Failed to reload config: {e}")
-        return CONFIG
+# Ensure executors are cleaned up on exit (journal drains pending rows)
+def _shutdown_executor():
+    for pool in broker_pools.values():
+        pool.shutdown(wait=False)
+    dispatch_executor.shutdown(wait=False)
+    journal_executor.shutdown(wait=True)
+    db.close()
+atexit.register(_shutdown_executor)
 
 # Non-blocking validation on startup
 try:
-    ts_client.validate_connection()
+    if ts_async_client:
+        # Logs in and pre-resolves contracts in the background
+        ts_loop.submit(ts_async_client.validate_connection())
+    else:
+        ts_client.validate_connection()
 except Exception as e:
     logger.error(f"TopStep Setup Error: {e}")
 
@@ -101,13 +145,45 @@ STATE = {
     "last_trade": "None"
 }
 
+# All MetaTrader5 IPC goes through one gateway thread (the terminal pipe is not thread-safe)
+MT5_GATEWAY = MT5Gateway()
+atexit.register(MT5_GATEWAY.stop)
+
+def _mt5_call_timeout():
+    return MT5_CONF.get('gateway', {}).get('call_timeout_seconds', 10.0)
+
+def mt5_call(name, *args, deadline=None, **kwargs):
+    """
+    Runs mt5.<name>(*args, **kwargs) on the gateway thread and returns its result.
+    With a deadline the call waits at most the remaining budget (DeadlineExceeded
+    if it is already spent, so nothing is queued).
+    """
+    timeout = _mt5_call_timeout()
+    if deadline is not None:
+        deadline.check(f"MT5 {name}")
+        timeout = deadline.timeout(timeout)
+    return MT5_GATEWAY.call(name, getattr(mt5, name), *args, timeout=timeout, **kwargs)
+
+def mt5_submit(name, *args, **kwargs):
+    """Queues mt5.<name>(*args, **kwargs) on the gateway thread and returns a Future."""
+    return MT5_GATEWAY.submit(name, getattr(mt5, name), *args, **kwargs)
+
+# Cached positions/account info, refreshed in the background and after fills
+POSITION_BOOK = PositionBook(
+    fetch_positions=lambda: mt5_call('positions_get'),
+    fetch_account=lambda: mt5_call('account_info'),
+    refresh_interval_ms=MT5_CONF.get('position_book', {}).get('refresh_interval_ms', 500),
+    max_age_ms=MT5_CONF.get('position_book', {}).get('max_age_ms', 1000)
+)
+atexit.register(POSITION_BOOK.stop)
+
 # Optimization: Symbol Cache to avoid IPC calls for static data (Point, Digits)
 SYMBOL_CACHE = {}
 
 def warm_cache(symbols):
     """Pre-loads symbol info into cache."""
     for s in symbols:
-        info = mt5.symbol_info(s)
+        info = mt5_call('symbol_info', s)
         if info:
             SYMBOL_CACHE[s] = info
             logger.info(f"Cached Info for {s}: Point={info.point}")
@@ -117,17 +193,17 @@ def warm_cache(symbols):
 def initialize_mt5():
     """Connects to MT5 terminal."""
     try:
-        if not mt5.initialize(path=MT5_CONF['path']):
-            logger.error(f"Failed to init MT5: {mt5.last_error()}")
+        if not mt5_call('initialize', path=MT5_CONF['path']):
+            logger.error(f"Failed to init MT5: {mt5_call('last_error')}")
             return False
             
         # Login
-        if not mt5.login(
+        if not mt5_call('login',
             login=int(MT5_CONF['login']), 
             password=MT5_CONF['password'], 
             server=MT5_CONF['server']
         ):
-            logger.error(f"MT5 Login failed: {mt5.last_error()}")
+            logger.error(f"MT5 Login failed: {mt5_call('last_error')}")
             return False
             
         STATE["connected"] = True
@@ -136,7 +212,10 @@ def initialize_mt5():
         # Warm Cache
         common_symbols = ["NQ", "MNQ", "ES", "MES", "NQ_H", "ES_H"]
         warm_cache(common_symbols)
-        
+
+        # Keep positions/account cached for the trade path
+        POSITION_BOOK.start()
+
         return True
     except Exception as e:
         logger.error(f"Init Error: {e}")
@@ -144,77 +223,124 @@ def initialize_mt5():
 
 def validate_terminal_state():
     """Checks if MT5 is connected and ready before trading."""
-    if not mt5.terminal_info():
+    if not mt5_call('terminal_info'):
         logger.warning("MT5 Terminal Info failed. Attempting Reconnect...")
         return initialize_mt5()
     return True
 
-def safe_order_send(request, max_retries=3):
+def safe_order_send(request, max_retries=3, deadline=None):
     """Wraps order_send with retry logic for transient errors.
 
     Optimized delays for low-latency execution:
     - 0.1s, 0.3s, 0.5s for transient errors (reduced from 0.5s, 1.0s, 1.0s)
+
+    With a deadline, each attempt waits at most the remaining budget and no
+    retry is started (or slept for) once the budget is spent.
     """
     delays = [0.1, 0.3, 0.5]  # Progressive backoff, optimized for speed
 
+    def backoff(i):
+        delay = delays[i] if i < len(delays) else 0.5
+        if deadline is None:
+            time.sleep(delay)
+            return True
+        return deadline.sleep(delay)
+
     for i in range(max_retries):
+        if deadline is not None and deadline.expired:
+            logger.error(f"Order Send abandoned: webhook deadline exceeded before attempt {i+1}")
+            break
         try:
-            res = mt5.order_send(request)
+            res = mt5_call('order_send', request, deadline=deadline)
             if res is None:
                 logger.error(f"Order Send returned None (Attempt {i+1})")
-                time.sleep(delays[i] if i < len(delays) else 0.5)
+                if not backoff(i):
+                    break
                 continue
 
             if res.retcode == mt5.TRADE_RETCODE_DONE:
+                POSITION_BOOK.invalidate()
                 return res
             elif res.retcode in [mt5.TRADE_RETCODE_TIMEOUT, mt5.TRADE_RETCODE_CONNECTION]:
                 logger.warning(f"Transient Error {res.retcode}: {res.comment}. Retrying in {delays[i]}s...")
-                time.sleep(delays[i] if i < len(delays) else 0.5)
+                if not backoff(i):
+                    break
             else:
                 # Fatal error (e.g. Invalid Volume)
                 logger.error(f"Fatal Order Error {res.retcode}: {res.comment}")
                 return res
         except Exception as e:
             logger.error(f"Exception during order send: {e}")
-            time.sleep(delays[i] if i < len(delays) else 0.5)
+            if not backoff(i):
+                break
 
     return None
 
-def close_positions(symbol, raw_symbol=None):
+def close_positions(symbol, raw_symbol=None, deadline=None):
     """
     Closes all positions for a given symbol, using fuzzy matching to handle
     broker suffix mismatches (e.g. NQ1! vs NQ_H).
     """
-    # Build robust search set
-    search_symbols = {symbol}
-    if raw_symbol:
-        search_symbols.add(raw_symbol)
-        clean = raw_symbol.replace('1!', '').replace('2!', '')
-        search_symbols.add(clean)
-        search_symbols.add(clean + "_H")
-        
-    logger.info(f"Closing Positions for {symbol}. Scanning for: {search_symbols}")
+    # Alias lookup against the position book (no positions_get scan)
+    search_symbols = symbol_aliases(symbol, raw_symbol)
+    book = POSITION_BOOK.fresh()
+
+    logger.info(f"Closing Positions for {symbol}. Scanning for: {set(search_symbols)} (book age {book.age_ms():.0f}ms)")
 
-    all_positions = mt5.positions_get()
-    if not all_positions:
+    if not book.positions:
         return {"status": "success", "message": "No open positions to close."}
 
-    # Filter positions
-    target_positions = [p for p in all_positions if p.symbol in search_symbols]
-    
+    target_positions = book.positions_for(symbol, raw_symbol)
+
     if not target_positions:
-        return {"status": "success", "message": f"No positions found matching {search_symbols}"}
+        return {"status": "success", "message": f"No positions found matching {set(search_symbols)}"}
 
-    count = 0
-    for pos in target_positions:
-        tick = mt5.symbol_info_tick(pos.symbol) # Use the ACTUAL symbol of the position
-        if not tick: 
+    return flatten_positions(target_positions, deadline=deadline)
+
+def flatten_positions(positions, comment="Unified-Bridge-Close", deadline=None):
+    """
+    Closes the given positions as one pipelined batch:
+    - One tick per distinct symbol
+    - All close orders queued on the MT5 gateway at once (no per-order caller round-trip)
+    - Per-ticket outcome with submit-to-result timing
+    - Waits are capped by the webhook deadline when one is given, but queued work
+      always gets at least close_min_wait_seconds; closes still queued after that are
+      cancelled, and ones already sent to the terminal are reported as "pending"
+    """
+    min_wait = MT5_CONF.get('gateway', {}).get('close_min_wait_seconds', 2.0)
+
+    def wait_timeout():
+        timeout = deadline.timeout(_mt5_call_timeout()) if deadline else _mt5_call_timeout()
+        return max(timeout, min_wait)
+
+    if not positions:
+        return {"status": "success", "closed": 0, "results": []}
+
+    batch_start = time.perf_counter()
+
+    # 1. One tick per distinct symbol (queued together, served back-to-back)
+    tick_futures = {s: mt5_submit('symbol_info_tick', s) for s in {p.symbol for p in positions}}
+    ticks = {}
+    for s, future in tick_futures.items():
+        try:
+            ticks[s] = future.result(timeout=wait_timeout())
+        except Exception as e:
+            logger.error(f"Tick fetch failed for {s}: {e}")
+            ticks[s] = None
+
+    # 2. Queue every close order before waiting on any of them
+    results = []
+    pending = []
+    for pos in positions:
+        tick = ticks.get(pos.symbol) # Use the ACTUAL symbol of the position
+        if not tick:
             logger.warning(f"No tick for {pos.symbol}, skipping close.")
+            results.append({"ticket": pos.ticket, "symbol": pos.symbol, "status": "skipped", "error": "No tick"})
             continue
-        
+
         type_order = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
         price = tick.bid if pos.type == mt5.ORDER_TYPE_BUY else tick.ask
-        
+
         req = {
             "action": mt5.TRADE_ACTION_DEAL,
             "symbol": pos.symbol, # Use exact position symbol
@@ -223,18 +349,57 @@ def close_positions(symbol, raw_symbol=None):
             "position": pos.ticket, # CRITICAL: Close by Ticket
             "price": price,
             "magic": MT5_CONF.get('magic_number', 0),
-            "comment": "Unified-Bridge-Close",
+            "comment": comment,
             "type_time": mt5.ORDER_TIME_GTC,
             "type_filling": mt5.ORDER_FILLING_IOC,
         }
-        res = mt5.order_send(req)
-        if res.retcode == mt5.TRADE_RETCODE_DONE:
-            count += 1
-            logger.info(f"Closed position {pos.ticket} ({pos.symbol})")
-        else:
-            logger.error(f"Failed to close {pos.ticket}: {res.comment}")
-            
-    return {"status": "success", "closed": count}
+        submitted_at = time.perf_counter()
+        future = mt5_submit('order_send', req)
+        done_at = {}
+        future.add_done_callback(lambda f, d=done_at: d.setdefault('t', time.perf_counter()))
+        pending.append((pos, submitted_at, done_at, future))
+
+    # 3. Wait for the batch, then cancel whatever never reached the terminal
+    if pending:
+        concurrent.futures.wait([p[3] for p in pending], timeout=wait_timeout())
+
+    count = 0
+    for pos, submitted_at, done_at, future in pending:
+        outcome = {"ticket": pos.ticket, "symbol": pos.symbol, "volume": pos.volume}
+        if not future.done():
+            if future.cancel():
+                outcome.update(status="cancelled", error="Timed out before being sent")
+                logger.error(f"Close of {pos.ticket} cancelled: timed out while queued")
+            else:
+                # order_send is in flight; the position may or may not be closed
+                outcome.update(status="pending", error="Timed out waiting for result")
+                logger.warning(f"Close of {pos.ticket} still in flight, outcome unknown")
+                POSITION_BOOK.invalidate()
+            outcome["duration_ms"] = round((time.perf_counter() - submitted_at) * 1000, 2)
+            results.append(outcome)
+            continue
+        try:
+            res = future.result()
+            if res is not None and res.retcode == mt5.TRADE_RETCODE_DONE:
+                count += 1
+                outcome.update(status="closed", price=res.price)
+                logger.info(f"Closed position {pos.ticket} ({pos.symbol})")
+            else:
+                comment_text = res.comment if res is not None else "order_send returned None"
+                outcome.update(status="error", error=comment_text)
+                logger.error(f"Failed to close {pos.ticket}: {comment_text}")
+        except Exception as e:
+            outcome.update(status="error", error=str(e))
+            logger.error(f"Failed to close {pos.ticket}: {e}")
+        outcome["duration_ms"] = round((done_at.get('t', time.perf_counter()) - submitted_at) * 1000, 2)
+        results.append(outcome)
+
+    if count:
+        POSITION_BOOK.invalidate()
+
+    duration = (time.perf_counter() - batch_start) * 1000
+    logger.info(f"Flatten: closed {count}/{len(positions)} positions in {duration:.0f}ms")
+    return {"status": "success", "closed": count, "duration_ms": round(duration, 2), "results": results}
 
 def calculate_equity_volume(equity_pct, symbol):
     """
@@ -243,7 +408,7 @@ def calculate_equity_volume(equity_pct, symbol):
     Returns: volume (lot size)
     """
     try:
-        account_info = mt5.account_info()
+        account_info = mt5_call('account_info')
         if not account_info:
             logger.error("Cannot get account info for equity sizing")
             return 1.0  # Fallback to 1 lot
@@ -252,7 +417,7 @@ def calculate_equity_volume(equity_pct, symbol):
         balance = account_info.balance
 
         # Get symbol info for contract value
-        sym_info = mt5.symbol_info(symbol)
+        sym_info = mt5_call('symbol_info', symbol)
         if not sym_info:
             logger.error(f"Cannot get symbol info for {symbol}")
             return 1.0
@@ -263,7 +428,7 @@ def calculate_equity_volume(equity_pct, symbol):
         # Get contract specifications
         # For futures: contract_size * price = notional value
         # For forex: lot size * price = notional value
-        tick = mt5.symbol_info_tick(symbol)
+        tick = mt5_call('symbol_info_tick', symbol)
         if not tick:
             return 1.0
 
@@ -298,7 +463,7 @@ def calculate_equity_volume(equity_pct, symbol):
         logger.error(f"Equity calculation error: {e}")
         return 1.0  # Safe fallback
 
-def execute_trade(data):
+def execute_trade(data, deadline=None):
     # 1. Map Symbol
     raw = data.get('symbol', '').upper()
     mapping = MT5_CONF.get('symbol_map', {}).get(raw)
@@ -321,7 +486,7 @@ def execute_trade(data):
     # 2. Action
     action = data.get('action', '').upper()
     if action in ['CLOSE', 'EXIT', 'FLATTEN']:
-        return close_positions(symbol, raw_symbol=raw)
+        return close_positions(symbol, raw_symbol=raw, deadline=deadline)
 
     # 3. Volume - Support equity percentage OR fixed volume
     equity_pct = data.get('equity_pct', 0)
@@ -346,23 +511,16 @@ def execute_trade(data):
     # Check for opposite positions
     opposite_type = mt5.ORDER_TYPE_SELL if action == 'BUY' else mt5.ORDER_TYPE_BUY
     
-    # 4.1 Get all positions to debug mismatch
-    all_positions = mt5.positions_get()
-    if all_positions:
-        logger.info(f"Open Positions in MT5: {[p.symbol for p in all_positions]}")
+    # 4.1 Positions from the book (refreshed if stale or invalidated by a fill)
+    book = POSITION_BOOK.fresh()
+    if book.positions:
+        logger.info(f"Open Positions in MT5: {list(book.by_symbol)} (book age {book.age_ms():.0f}ms)")
     else:
         logger.info("No Open Positions in MT5.")
 
     # 4.2 specific symbol lookup (Try raw, mapped, and common variations)
-    search_symbols = {symbol, raw, raw.replace('1!', ''), raw.replace('1!', '') + "_H"}
-    positions = []
-    
-    # Filter all positions that match any of our search symbols
-    if all_positions:
-        for p in all_positions:
-            if p.symbol in search_symbols:
-                positions.append(p)
-    
+    positions = book.positions_for(symbol, raw)
+
     if positions:
         for pos in positions:
             if pos.type == opposite_type:
@@ -370,7 +528,7 @@ def execute_trade(data):
                 
                 # Close this position
                 # Determine close price
-                tick = mt5.symbol_info_tick(pos.symbol) # Use pos.symbol to be safe
+                tick = mt5_call('symbol_info_tick', pos.symbol, deadline=deadline) # Use pos.symbol to be safe
                 close_price = tick.ask if pos.type == mt5.ORDER_TYPE_SELL else tick.bid # Buy to close Sell (Ask), Sell to close Buy (Bid)
                 
                 req = {
@@ -385,10 +543,11 @@ def execute_trade(data):
                     "type_time": mt5.ORDER_TIME_GTC,
                     "type_filling": mt5.ORDER_FILLING_IOC,
                 }
-                res = mt5.order_send(req)
+                res = mt5_call('order_send', req, deadline=deadline)
                 if res.retcode != mt5.TRADE_RETCODE_DONE:
                     logger.error(f"Netting Fail: {res.comment}")
                 else:
+                    POSITION_BOOK.invalidate()
                     # Reduce incoming volume by closed volume
                     vol -= pos.volume
                     
@@ -404,7 +563,7 @@ def execute_trade(data):
     logger.info(f"Opening New Position: {action} {vol} {symbol}")
 
     # 5. Order Type & Price Logic
-    tick = mt5.symbol_info_tick(symbol)
+    tick = mt5_call('symbol_info_tick', symbol)
     if not tick: return {"error": f"No Price for {symbol}"}
 
     # Log tick data for slippage analysis
@@ -419,7 +578,7 @@ def execute_trade(data):
     # Optimization: Use Cache for Point
     info = SYMBOL_CACHE.get(symbol)
     if not info:
-         info = mt5.symbol_info(symbol)
+         info = mt5_call('symbol_info', symbol)
          if info: SYMBOL_CACHE[symbol] = info
 
     point = info.point if info else 0.0001
@@ -499,7 +658,7 @@ def execute_trade(data):
 
     # ... (Order Sending with Retry)
     try:
-        res = safe_order_send(req)
+        res = safe_order_send(req, deadline=deadline)
     except Exception as e:
         logger.error(f"MT5 Order Send Exception: {e}")
         return {"error": f"MT5 Exception: {e}"}
@@ -537,33 +696,59 @@ def execute_trade(data):
 app = Flask(__name__)
 CORS(app)
 
+# Pooled keep-alive channel to the local IBKR bridge (internal token, no webhook secret)
+def _ibkr_base_url():
+    return f"http://127.0.0.1:{CONFIG['server'].get('ibkr_port', 5001)}"
+
+IBKR_CHANNEL = InternalChannel(
+    base_url=_ibkr_base_url,
+    token=derive_internal_token(CONFIG),
+    pool_size=CONFIG['server'].get('ibkr_channel', {}).get('pool_size', 4),
+    keepalive_interval=CONFIG['server'].get('ibkr_channel', {}).get('keepalive_interval_seconds', 30)
+)
+atexit.register(IBKR_CHANNEL.stop)
+
+# In-process IBKR: host the IBKR loop + client here and skip the HTTP hop.
+# Mode is fixed at startup ("process" keeps the separate IBKR bridge for isolation).
+IBKR_RUNTIME = None
+if CONFIG.get('ibkr', {}).get('execution_mode', 'process') == 'inprocess':
+    from src.ibkr.runtime import IBKRRuntime
+    IBKR_RUNTIME = IBKRRuntime(CONFIG)
+    atexit.register(IBKR_RUNTIME.stop)
+
+def prepare_ibkr_payload(data):
+    """Clones the webhook payload and cleans the symbol for IBKR."""
+    # Clone data to avoid mutating original
+    payload = data.copy()
+    payload.pop('secret', None)
+
+    # Symbol Cleanup for IBKR
+    # MT5 uses "MNQ1!", IBKR uses "MNQ" (usually continuous).
+    # We strip digits and ! from the end if it looks like a TradingView ticker
+    raw = payload.get('symbol', '').upper()
+    if '1!' in raw:
+        # Assume formatted like "MNQ1!" -> "MNQ"
+        clean = raw.replace('1!', '').replace('2!', '')
+        payload['symbol'] = clean
+        payload['secType'] = 'FUT' # Force Future if it was a TV future ticker
+        payload['exchange'] = 'GLOBEX' # Good default for US Futures
+    return payload
+
 # Helper to forward to IBKR
 def forward_to_ibkr(data):
     """Forwards the webhook payload to the IBKR bridge."""
     try:
-        # Prepare URL
-        ibkr_port = CONFIG['server'].get('ibkr_port', 5001)
-        url = f"http://127.0.0.1:{ibkr_port}/webhook"
-        
-        # Clone data to avoid mutating original
-        payload = data.copy()
-        payload['secret'] = CONFIG['security']['webhook_secret']
-        
-        # Symbol Cleanup for IBKR
-        # MT5 uses "MNQ1!", IBKR uses "MNQ" (usually continuous).
-        # We strip digits and ! from the end if it looks like a TradingView ticker
-        raw = payload.get('symbol', '').upper()
-        if '1!' in raw:
-            # Assume formatted like "MNQ1!" -> "MNQ"
-            clean = raw.replace('1!', '').replace('2!', '')
-            payload['symbol'] = clean
-            payload['secType'] = 'FUT' # Force Future if it was a TV future ticker
-            payload['exchange'] = 'GLOBEX' # Good default for US Futures
-        
+        payload = prepare_ibkr_payload(data)
+
+        if IBKR_RUNTIME:
+            # Fire and forget on the in-process loop
+            IBKR_RUNTIME.execute_trade(payload)
+            return
+
         # Send
         # We use a short timeout so MT5 doesn't hang waiting for IBKR
         try:
-            requests.post(url, json=payload, timeout=0.5) 
+            IBKR_CHANNEL.post("/webhook", payload, timeout=0.5)
         except requests.exceptions.ReadTimeout:
             pass # We don't care about response, just fire and forget roughly
         except Exception as e:
@@ -572,24 +757,27 @@ def forward_to_ibkr(data):
     except Exception as e:
         logger.error(f"Forwarding Error: {e}")
 
-def forward_to_ibkr_blocking(data):
+def forward_to_ibkr_blocking(data, deadline=None):
     """Forwards to IBKR and WAITS for response (not fire-and-forget)."""
     start_time = time.time()
+    timeout = deadline.timeout(10.0) if deadline else 10.0
     try:
-        ibkr_port = CONFIG['server'].get('ibkr_port', 5001)
-        url = f"http://127.0.0.1:{ibkr_port}/webhook"
-
-        payload = data.copy()
-        payload['secret'] = CONFIG['security']['webhook_secret']
-
-        # Symbol cleanup for IBKR
-        raw = payload.get('symbol', '').upper()
-        if '1!' in raw:
-            payload['symbol'] = raw.replace('1!', '').replace('2!', '')
-            payload['secType'] = 'FUT'
-            payload['exchange'] = 'GLOBEX'
-
-        response = requests.post(url, json=payload, timeout=10.0)
+        payload = prepare_ibkr_payload(data)
+        if deadline:
+            deadline.check("IBKR forward")
+
+        if IBKR_RUNTIME:
+            # The coroutine gets the same budget, so it is cancelled on the loop too
+            future = IBKR_RUNTIME.execute_trade(payload, timeout=timeout)
+            try:
+                result = future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                raise
+            logger.info(f"IBKR Result (in-process): {result}")
+            return result
+
+        response = IBKR_CHANNEL.post("/webhook", payload, timeout=timeout)
         duration = (time.time() - start_time) * 1000
 
         result = response.json() if response.status_code == 200 else {'error': response.text}
@@ -599,7 +787,7 @@ def forward_to_ibkr_blocking(data):
         logger.info(f"IBKR Response: {result}")
         return result
 
-    except requests.exceptions.Timeout:
+    except (requests.exceptions.Timeout, concurrent.futures.TimeoutError, DeadlineExceeded):
         duration = (time.time() - start_time) * 1000
         logger.error(f"IBKR Timeout after {duration:.0f}ms")
         return {'status': 'timeout', 'error': 'IBKR bridge timeout', 'duration_ms': duration}
@@ -608,12 +796,12 @@ def forward_to_ibkr_blocking(data):
         logger.error(f"IBKR Error: {e}")
         return {'status': 'error', 'error': str(e), 'duration_ms': duration}
 
-def handle_topstep_logic_blocking(data):
+def handle_topstep_logic_blocking(data, deadline=None):
     """Wrapper for TopStep that returns a result dict."""
     start_time = time.time()
     try:
         # Call the existing TopStep logic
-        handle_topstep_logic(data)
+        handle_topstep_logic(data, deadline=deadline)
         duration = (time.time() - start_time) * 1000
         return {'status': 'success', 'duration_ms': duration}
     except Exception as e:
@@ -621,95 +809,140 @@ def handle_topstep_logic_blocking(data):
         logger.error(f"TopStep Error: {e}")
         return {'status': 'error', 'error': str(e), 'duration_ms': duration}
 
-def capture_pre_trade_state():
-    """Capture position state before trade for comprehensive logging."""
+def _summarize_state(account, positions):
+    """Builds the pre/post-trade state dict from account info and positions."""
     state = {'positions': [], 'equity': 0.0, 'margin': 0.0, 'free_margin': 0.0}
+    if account:
+        state['equity'] = account.equity
+        state['margin'] = account.margin
+        state['free_margin'] = account.margin_free
+    if positions:
+        state['positions'] = [{
+            'symbol': p.symbol,
+            'volume': p.volume,
+            'type': 'BUY' if p.type == 0 else 'SELL',
+            'profit': p.profit,
+            'ticket': p.ticket
+        } for p in positions]
+    return state
+
+def capture_pre_trade_state(use_cache=False):
+    """
+    Capture position state before trade for comprehensive logging.
+    use_cache=True reads the position book instead of making IPC round-trips.
+    """
+    if use_cache:
+        snapshot = POSITION_BOOK.snapshot
+        state = _summarize_state(snapshot.account, snapshot.positions)
+        state['age_ms'] = snapshot.age_ms()
+        return state
+
+    state = _summarize_state(None, None)
     try:
-        account = mt5.account_info()
-        if account:
-            state['equity'] = account.equity
-            state['margin'] = account.margin
-            state['free_margin'] = account.margin_free
-
-        positions = mt5.positions_get()
-        if positions:
-            state['positions'] = [{
-                'symbol': p.symbol,
-                'volume': p.volume,
-                'type': 'BUY' if p.type == 0 else 'SELL',
-                'profit': p.profit,
-                'ticket': p.ticket
-            } for p in positions]
+        account = mt5_call('account_info')
+        positions = mt5_call('positions_get')
+        state = _summarize_state(account, positions)
     except Exception as e:
         logger.error(f"Pre-trade state capture error: {e}")
     return state
 
-def execute_mt5_blocking(data, webhook_received_at, raw_webhook):
+def _positions_json(positions):
+    """Serializes positions for the position_after column."""
+    if not positions:
+        return ""
+    return json.dumps([{
+        "symbol": p.symbol,
+        "type": "BUY" if p.type == 0 else "SELL",
+        "volume": p.volume,
+        "profit": p.profit
+    } for p in positions])
+
+def _trade_log_fields(res, duration, webhook_received_at, raw_webhook, pre_trade_state):
+    """Columns for the MT5 trade row that are known as soon as the order returns."""
+    return dict(
+        details=str(res),
+        expected_price=res.get('expected_price', 0.0),
+        executed_price=res.get('executed_price', 0.0),
+        slippage=res.get('slippage', 0.0),
+        order_id=str(res.get('order', '')),
+        ticket=str(res.get('order', '')),
+        webhook_received_at=webhook_received_at,
+        raw_webhook=raw_webhook,
+        fill_time_ms=duration,
+        broker_response=json.dumps(res) if isinstance(res, dict) else str(res),
+        equity_before=pre_trade_state['equity'],
+        pre_trade_positions=json.dumps(pre_trade_state['positions']) if pre_trade_state['positions'] else None,
+        bid_price=res.get('bid_price', 0.0),
+        ask_price=res.get('ask_price', 0.0),
+        spread=res.get('spread', 0.0)
+    )
+
+def _journal_mt5_trade(data, status, duration, log_fields):
+    """
+    Background journaling for async_journal mode: queues the trade row, then
+    refreshes the position book and attaches post-trade equity/positions to it.
+    """
+    try:
+        trade_id = db.log_trade_async("MT5", data, status, duration, **log_fields)
+        snapshot = POSITION_BOOK.refresh()
+        db.update_trade_async(
+            trade_id,
+            equity_after=snapshot.account.equity if snapshot.account else 0.0,
+            position_after=_positions_json(snapshot.positions)
+        )
+    except Exception as e:
+        logger.error(f"MT5 trade journaling error: {e}")
+
+def execute_mt5_blocking(data, webhook_received_at, raw_webhook, deadline=None):
     """Execute MT5 trade and return result dict."""
+    # async_journal: send the order first using cached state; journal in the background
+    async_journal = MT5_CONF.get('execution', {}).get('async_journal', False)
     start_time = time.time()
     try:
         # Capture pre-trade state
-        pre_trade_state = capture_pre_trade_state()
+        pre_trade_state = capture_pre_trade_state(use_cache=async_journal)
         logger.info(f"PRE-TRADE STATE: equity={pre_trade_state['equity']:.2f}, positions={len(pre_trade_state['positions'])}")
         if pre_trade_state['positions']:
             logger.info(f"  Existing positions: {json.dumps(pre_trade_state['positions'], default=str)}")
 
-        # Get equity before trade
-        equity_before = pre_trade_state['equity']
-
-        res = execute_trade(data)
+        # duration_ms covers the order path only
+        start_time = time.time()
+        res = execute_trade(data, deadline=deadline)
         duration = (time.time() - start_time) * 1000
 
         STATE["last_trade"] = f"{data.get('action')} {data.get('symbol')}"
         status = 'success' if 'order' in res or res.get('status') == 'success' else 'error-mt5'
+        log_fields = _trade_log_fields(res, duration, webhook_received_at, raw_webhook, pre_trade_state)
 
-        # Get equity after trade
-        equity_after = 0.0
-        try:
-            account_info = mt5.account_info()
-            if account_info:
-                equity_after = account_info.equity
-        except:
-            pass
-
-        # Get current positions after trade
-        position_after = ""
-        try:
-            positions = mt5.positions_get()
-            if positions:
-                position_after = json.dumps([{
-                    "symbol": p.symbol,
-                    "type": "BUY" if p.type == 0 else "SELL",
-                    "volume": p.volume,
-                    "profit": p.profit
-                } for p in positions])
-        except:
-            pass
-
-        # Database Log with comprehensive tick data
-        db.log_trade(
-            "MT5",
-            data,
-            status,
-            duration,
-            details=str(res),
-            expected_price=res.get('expected_price', 0.0),
-            executed_price=res.get('executed_price', 0.0),
-            slippage=res.get('slippage', 0.0),
-            order_id=str(res.get('order', '')),
-            ticket=str(res.get('order', '')),
-            webhook_received_at=webhook_received_at,
-            raw_webhook=raw_webhook,
-            fill_time_ms=duration,
-            broker_response=json.dumps(res) if isinstance(res, dict) else str(res),
-            position_after=position_after,
-            equity_before=equity_before,
-            equity_after=equity_after,
-            pre_trade_positions=json.dumps(pre_trade_state['positions']) if pre_trade_state['positions'] else None,
-            bid_price=res.get('bid_price', 0.0),
-            ask_price=res.get('ask_price', 0.0),
-            spread=res.get('spread', 0.0)
-        )
+        if async_journal:
+            journal_executor.submit(_journal_mt5_trade, dict(data), status, duration, log_fields)
+        else:
+            # Get equity after trade
+            equity_after = 0.0
+            try:
+                account_info = mt5_call('account_info')
+                if account_info:
+                    equity_after = account_info.equity
+            except:
+                pass
+
+            # Get current positions after trade
+            position_after = ""
+            try:
+                position_after = _positions_json(mt5_call('positions_get'))
+            except:
+                pass
+
+            # Database Log with comprehensive tick data (queued on the journal writer)
+            db.log_trade_async(
+                "MT5",
+                data,
+                status,
+                duration,
+                position_after=position_after,
+                equity_after=equity_after,
+                **log_fields
+            )
 
         # Alert on success
         if status == 'success':
@@ -723,7 +956,7 @@ def execute_mt5_blocking(data, webhook_received_at, raw_webhook):
         duration = (time.time() - start_time) * 1000
         logger.error(f"MT5 Error: {e}")
         alerts.send_error_alert(str(e), context="MT5_Bridge_Main")
-        db.log_trade(
+        db.log_trade_async(
             "MT5",
             data,
             "error",
@@ -735,64 +968,139 @@ def execute_mt5_blocking(data, webhook_received_at, raw_webhook):
         )
         return {'status': 'error', 'error': str(e), 'duration_ms': duration}
 
-def execute_all_brokers_parallel(data, config, webhook_received_at, raw_webhook):
-    """Execute trades on all 3 brokers in TRUE parallel."""
+def execute_all_brokers_parallel(data, config, webhook_received_at, raw_webhook, deadline=None):
+    """
+    Execute trades on all 3 brokers in TRUE parallel.
+    All legs share one deadline (execution.webhook_deadline_ms unless the
+    caller passes the one created at ingress).
+    """
+    if deadline is None:
+        deadline = Deadline.from_config(config)
     results = {'mt5': None, 'ibkr': None, 'topstep': None}
     futures = {}
+    on_loop = set()  # Legs running as coroutines, which can be cancelled at the deadline
+
+    # Submit all broker executions SIMULTANEOUSLY, each to its own pool. A full
+    # pool never holds up the other venues: it is retried once they are all in flight.
+    saturated = []
+
+    def submit(broker, fn, *args):
+        future = broker_pools[broker].try_submit(fn, *args)
+        if future is None:
+            saturated.append((broker, fn, args))
+        else:
+            futures[broker] = future
 
-    # Submit all broker executions to thread pool SIMULTANEOUSLY
     if not is_broker_paused(config, 'mt5'):
-        futures['mt5'] = executor.submit(execute_mt5_blocking, data, webhook_received_at, raw_webhook)
+        submit('mt5', execute_mt5_blocking, data, webhook_received_at, raw_webhook, deadline)
     else:
         results['mt5'] = {'status': 'paused', 'reason': 'Broker paused by user'}
         logger.info("MT5 is PAUSED - Skipping trade")
 
     if not is_broker_paused(config, 'ibkr'):
-        futures['ibkr'] = executor.submit(forward_to_ibkr_blocking, data)
+        if IBKR_RUNTIME:
+            # Coroutine goes straight onto the in-process IBKR loop (no thread, no HTTP)
+            futures['ibkr'] = IBKR_RUNTIME.execute_trade(prepare_ibkr_payload(data), timeout=deadline.remaining())
+            on_loop.add('ibkr')
+        else:
+            submit('ibkr', forward_to_ibkr_blocking, data, deadline)
     else:
         results['ibkr'] = {'status': 'paused', 'reason': 'Broker paused by user'}
         logger.info("IBKR is PAUSED - Skipping trade forwarding")
 
     if not is_broker_paused(config, 'topstep'):
-        futures['topstep'] = executor.submit(handle_topstep_logic_blocking, data)
+        if ts_async_client:
+            futures['topstep'] = ts_loop.submit(handle_topstep_logic_async(data, deadline))
+            on_loop.add('topstep')
+        else:
+            submit('topstep', handle_topstep_logic_blocking, data, deadline)
     else:
         results['topstep'] = {'status': 'paused', 'reason': 'Broker paused by user'}
         logger.info("TopStep is PAUSED - Skipping trade")
 
-    # Wait for all with timeout (10s per broker)
-    for broker, future in futures.items():
+    # "block" pools may wait for a slot, but never past the deadline
+    for broker, fn, args in saturated:
         try:
-            results[broker] = future.result(timeout=10.0)
-        except concurrent.futures.TimeoutError:
-            results[broker] = {'status': 'timeout', 'error': f'{broker} execution timed out'}
+            futures[broker] = broker_pools[broker].submit_within(deadline.timeout(), fn, *args)
+        except PoolSaturated as e:
+            results[broker] = {'status': 'rejected', 'error': str(e)}
+            logger.error(f"{broker} not executed: {e}")
+
+    # Wait for all legs together against the one deadline
+    concurrent.futures.wait(futures.values(), timeout=deadline.remaining())
+    for broker, future in futures.items():
+        if not future.done():
+            if broker in on_loop:
+                # Don't let the order go out after the caller was told it timed out
+                future.cancel()
+            results[broker] = {'status': 'timeout', 'error': f'{broker} execution exceeded the {deadline.budget * 1000:.0f}ms webhook deadline'}
             logger.error(f"{broker} execution timed out")
+            continue
+        try:
+            results[broker] = future.result()
         except Exception as e:
             results[broker] = {'status': 'error', 'error': str(e)}
             logger.error(f"{broker} execution error: {e}")
 
     return results
 
+def _ibkr_inprocess_status():
+    """Connection state of the in-process IBKR client (None in process mode)."""
+    if not IBKR_RUNTIME:
+        return None
+    if not IBKR_RUNTIME.client_ready.is_set():
+        return "starting"
+    if not IBKR_RUNTIME.client.is_connected():
+        try:
+            IBKR_RUNTIME.reconnect(min_interval=CONFIG['ibkr'].get('reconnect_interval_seconds', 5))
+        except Exception as e:
+            logger.error(f"IBKR Auto-Connect Failed: {e}")
+        return "disconnected"
+    return "connected"
+
 @app.route('/health', methods=['GET'])
 def health():
-    connected = mt5.terminal_info() is not None
+    connected = mt5_call('terminal_info') is not None
     STATE['connected'] = connected
 
     # Check TopStep Status
-    ts_connected = ts_client.connected
+    ts_active = ts_async_client or ts_client
+    ts_connected = ts_active.connected
 
-    # Reload config for current pause states
-    current_config = reload_config()
-    broker_controls = current_config.get('broker_controls', {})
+    # Current pause states (in-memory snapshot, no disk read)
+    snapshot = CONFIG_STORE.snapshot
+    broker_controls = snapshot.get('broker_controls', {})
 
     return jsonify({
         "status": "connected" if connected else "disconnected",
         "last_trade": STATE['last_trade'],
         "topstep_status": "connected" if ts_connected else "disconnected",
+        "topstep_breaker": ts_active.breaker.status(),
         "mt5_paused": broker_controls.get('mt5_paused', False),
         "ibkr_paused": broker_controls.get('ibkr_paused', False),
-        "topstep_paused": broker_controls.get('topstep_paused', False)
+        "topstep_paused": broker_controls.get('topstep_paused', False),
+        "config_version": snapshot.version,
+        "position_book": POSITION_BOOK.status(),
+        "ibkr_mode": "inprocess" if IBKR_RUNTIME else "process",
+        "ibkr_status": _ibkr_inprocess_status(),
+        "ibkr_channel": IBKR_CHANNEL.status()
     })
 
+@app.route('/mt5/gateway', methods=['GET'])
+def mt5_gateway_stats():
+    """IPC latency, queue depth and coalescing counters for the MT5 gateway."""
+    return jsonify(MT5_GATEWAY.metrics())
+
+@app.route('/executors', methods=['GET'])
+def executor_stats():
+    """Queue depth, running and rejected counters for each broker pool."""
+    return jsonify({broker: pool.metrics() for broker, pool in broker_pools.items()})
+
+@app.route('/config/version', methods=['GET'])
+def config_version():
+    """Identifies the config snapshot currently used for trading."""
+    return jsonify(CONFIG_STORE.snapshot.info())
+
 @app.route('/ping', methods=['GET', 'POST'])
 def ping():
     """Simple ping endpoint to verify server is reachable."""
@@ -974,6 +1282,8 @@ def pause_broker(broker):
         return jsonify({"error": "Invalid broker"}), 400
 
     if set_broker_paused(CONFIG_PATH, broker, paused):
+        # Apply now rather than waiting for the watcher to notice the write
+        CONFIG_STORE.refresh()
         status = "paused" if paused else "resumed"
         logger.info(f"Broker {broker.upper()} {status} by user")
         return jsonify({"status": "success", "broker": broker, "paused": paused})
@@ -995,7 +1305,7 @@ def close_all_positions():
     # Close MT5 positions
     if platform in ['all', 'mt5']:
         try:
-            res = close_positions("", raw_symbol="")  # Close all
+            res = flatten_positions(POSITION_BOOK.fresh(max_age_ms=0).positions)  # Close all
             results['mt5'] = res
             logger.info(f"Close All (MT5): {res}")
         except Exception as e:
@@ -1004,7 +1314,7 @@ def close_all_positions():
     # Close TopStep positions
     if platform in ['all', 'topstep']:
         try:
-            ts_res = ts_client.execute_trade({"action": "CLOSE", "symbol": "MNQ"})
+            ts_res = topstep_execute({"action": "CLOSE", "symbol": "MNQ"})
             results['topstep'] = ts_res
             logger.info(f"Close All (TopStep): {ts_res}")
         except Exception as e:
@@ -1022,38 +1332,101 @@ def close_all_positions():
 
 @app.route('/trades', methods=['GET'])
 def get_trades():
-    """Get trade log for verification."""
+    """
+    Get trade log for verification (newest first).
+    Paging: pass next_before_id from the previous response as before_id.
+    columns: optional comma-separated projection, e.g. columns=timestamp,platform,status
+    """
     limit = request.args.get('limit', 100, type=int)
     platform = request.args.get('platform', None)
     start_date = request.args.get('start_date', None)
     end_date = request.args.get('end_date', None)
+    before_id = request.args.get('before_id', None, type=int)
+    columns = [c.strip() for c in request.args.get('columns', '').split(',') if c.strip()] or None
 
-    trades = db.get_trades(limit=limit, platform=platform, start_date=start_date, end_date=end_date)
-    return jsonify({"trades": trades, "count": len(trades)})
+    try:
+        trades = db.get_trades(limit=limit, platform=platform, start_date=start_date, end_date=end_date,
+                               before_id=before_id, columns=columns)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    next_before_id = trades[-1]['id'] if trades and len(trades) == limit else None
+    return jsonify({"trades": trades, "count": len(trades), "next_before_id": next_before_id})
 
 @app.route('/trades/summary', methods=['GET'])
 def get_trade_summary():
-    """Get trade summary statistics."""
+    """Get trade summary statistics (per platform, or per platform and day/hour with ?by=day|hour)."""
     start_date = request.args.get('start_date', None)
     end_date = request.args.get('end_date', None)
+    by = request.args.get('by', None)
 
-    summary = db.get_trade_summary(start_date=start_date, end_date=end_date)
+    try:
+        summary = db.get_trade_summary(start_date=start_date, end_date=end_date, by=by)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify({"summary": summary})
 
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_FLUSH_ROWS = 500
+
+def _export_chunks(rows, header, fmt):
+    """Serializes trades into text chunks of EXPORT_FLUSH_ROWS rows."""
+    buf = io.StringIO()
+    writer = csv.writer(buf) if fmt == "csv" else None
+    if writer:
+        writer.writerow(header)
+    for count, trade in enumerate(rows, 1):
+        if writer:
+            writer.writerow([trade[c] for c in header])
+        else:
+            buf.write(json.dumps(trade, default=str) + "\n")
+        if count % EXPORT_FLUSH_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+def _gzip_chunks(chunks):
+    """Gzips a stream of text chunks on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
 @app.route('/trades/export', methods=['GET'])
 def export_trades():
-    """Export trades to CSV."""
-    import tempfile
-    from flask import send_file
-
-    start_date = request.args.get('start_date', None)
-    end_date = request.args.get('end_date', None)
+    """
+    Stream trades (oldest first) as CSV or NDJSON - no row cap, no temp file.
+    format: csv (default) or ndjson
+    platform, start_date, end_date: same filters as /trades
+    columns: optional comma-separated projection
+    gzip=1: compress on the fly (downloads as .gz)
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Invalid format: {fmt} (expected one of {list(EXPORT_FORMATS)})"}), 400
+    columns = [c.strip() for c in request.args.get('columns', '').split(',') if c.strip()] or None
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
 
-    filepath = os.path.join(tempfile.gettempdir(), f"trades_export_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
-    if db.export_trades_csv(filepath, start_date=start_date, end_date=end_date):
-        return send_file(filepath, as_attachment=True, download_name="trades_export.csv")
-    else:
-        return jsonify({"error": "No trades to export"}), 404
+    try:
+        header = db.export_columns(columns)
+        rows = db.iter_trades(platform=request.args.get('platform', None),
+                              start_date=request.args.get('start_date', None),
+                              end_date=request.args.get('end_date', None),
+                              columns=columns)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    filename = f"trades_export.{fmt}"
+    chunks = _export_chunks(rows, header, fmt)
+    if compress:
+        chunks = _gzip_chunks(chunks)
+        filename += ".gz"
+    return Response(chunks, mimetype="application/gzip" if compress else EXPORT_FORMATS[fmt],
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
@@ -1065,16 +1438,17 @@ def webhook():
          logger.warning(f"Unauthorized Webhook Attempt: {request.remote_addr}")
          return jsonify({"error": "Unauthorized"}), 401
 
-    logger.info(f"Received Webhook: {raw_webhook}")
+    # Pin the config snapshot for the whole execution of this webhook
+    snapshot = CONFIG_STORE.snapshot
+    current_config = snapshot.data
 
-    # Reload config for live pause/settings updates
-    current_config = reload_config()
+    logger.info(f"Received Webhook (config v{snapshot.version}): {raw_webhook}")
 
     # Validate webhook (rogue trade protection)
     is_valid, rejection_reason = webhook_validator.validate_webhook(data)
     if not is_valid:
         logger.warning(f"REJECTED WEBHOOK: {rejection_reason}")
-        db.log_trade(
+        db.log_trade_async(
             "REJECTED",
             data,
             "rejected",
@@ -1086,10 +1460,16 @@ def webhook():
         )
         return jsonify({"error": "Rejected", "reason": rejection_reason}), 400
 
+    # One time budget for the whole fan-out, starting now
+    deadline = Deadline.from_config(current_config)
+
+    if current_config.get('execution', {}).get('ack_first', False):
+        return accept_webhook(data, current_config, snapshot.version, webhook_received_at, raw_webhook, deadline)
+
     # === TRUE PARALLEL EXECUTION ===
     # All 3 brokers execute simultaneously in thread pool
     start_time = time.time()
-    results = execute_all_brokers_parallel(data, current_config, webhook_received_at, raw_webhook)
+    results = execute_all_brokers_parallel(data, current_config, webhook_received_at, raw_webhook, deadline)
     total_duration = (time.time() - start_time) * 1000
 
     # Log execution summary
@@ -1101,86 +1481,197 @@ def webhook():
     return jsonify({
         "status": "completed",
         "total_duration_ms": round(total_duration, 2),
+        "config_version": snapshot.version,
         "results": results
     })
 
-def handle_topstep_logic(data):
+# execution_id -> Event set when that execution's results are journaled (for long-polls)
+_execution_events = {}
+_execution_events_lock = threading.Lock()
+
+def accept_webhook(data, config, config_version, webhook_received_at, raw_webhook, deadline=None):
+    """
+    Ack-first path: journal the webhook, hand it to the dispatcher and return
+    202 straight away. Results are served from /executions/<id>.
+    """
+    execution_id = uuid.uuid4().hex
+    if not db.create_execution(execution_id, raw_webhook, webhook_received_at, config_version):
+        # Never ack a webhook we could not make durable
+        return jsonify({"error": "Could not journal webhook"}), 503
+
+    with _execution_events_lock:
+        _execution_events[execution_id] = threading.Event()
+    dispatch_executor.submit(_dispatch_execution, execution_id, data, config, webhook_received_at, raw_webhook, deadline)
+
+    logger.info(f"Webhook accepted as execution {execution_id}")
+    return jsonify({
+        "status": "accepted",
+        "execution_id": execution_id,
+        "config_version": config_version,
+        "status_url": f"/executions/{execution_id}"
+    }), 202
+
+def _dispatch_execution(execution_id, data, config, webhook_received_at, raw_webhook, deadline=None):
+    """Runs the broker fan-out for an accepted webhook and journals the outcome."""
+    start_time = time.time()
+    try:
+        results = execute_all_brokers_parallel(data, config, webhook_received_at, raw_webhook, deadline)
+    except Exception as e:
+        logger.error(f"Execution {execution_id} dispatch error: {e}")
+        results = {"error": str(e)}
+    total_duration = (time.time() - start_time) * 1000
+
+    success_count = sum(1 for r in results.values() if isinstance(r, dict) and r.get('status') == 'success')
+    logger.info(f"Execution {execution_id} complete: {success_count}/3 succeeded in {total_duration:.0f}ms")
+
+    try:
+        db.complete_execution(execution_id, results, round(total_duration, 2))
+    finally:
+        # Always wake long-pollers and drop the event, even if journaling failed
+        with _execution_events_lock:
+            event = _execution_events.pop(execution_id, None)
+        if event:
+            event.set()
+
+@app.route('/executions/<execution_id>', methods=['GET'])
+def get_execution(execution_id):
+    """
+    Result of an ack-first webhook. Pass ?wait=<seconds> to long-poll until
+    the brokers have answered (capped at execution.max_wait_seconds).
+    """
+    wait = request.args.get('wait', 0, type=float)
+    if wait > 0:
+        with _execution_events_lock:
+            event = _execution_events.get(execution_id)
+        if event:
+            event.wait(min(wait, CONFIG.get('execution', {}).get('max_wait_seconds', 30)))
+
+    execution = db.get_execution(execution_id)
+    if execution is None:
+        return jsonify({"error": "Unknown execution"}), 404
+    return jsonify(execution)
+
+def build_topstep_payload(data):
     """
     TopStep Trade Logic:
     - Converts Mini contracts to Micro contracts
     - 1 Mini = 5 Micros (configurable via micros_per_mini)
     - Max 15 Micros (configurable via max_micros)
     - Always trades MNQ (Micro NQ) regardless of input symbol
-    """
-    try:
-        if not CONFIG.get('topstep', {}).get('enabled', False):
-            return
 
-        action = data.get('action', '').upper()
-        raw_symbol = data.get('symbol', '').upper()
+    Returns:
+        dict: TopStep order payload, or None if TopStep is disabled
+    """
+    if not CONFIG.get('topstep', {}).get('enabled', False):
+        return None
 
-        # Get conversion settings from config
-        micros_per_mini = CONFIG.get('topstep', {}).get('micros_per_mini', 5)
-        max_micros = CONFIG.get('topstep', {}).get('max_micros', 15)
+    action = data.get('action', '').upper()
+    raw_symbol = data.get('symbol', '').upper()
 
-        # Always use MNQ for TopStep (Micro NQ)
-        ts_symbol = "MNQ"
+    # Get conversion settings from config
+    micros_per_mini = CONFIG.get('topstep', {}).get('micros_per_mini', 5)
+    max_micros = CONFIG.get('topstep', {}).get('max_micros', 15)
 
-        # Calculate volume: 1 Mini = X Micros, capped at max
-        if action not in ['CLOSE', 'EXIT', 'FLATTEN']:
-            input_minis = float(data.get('volume', 1))
-            raw_micros = input_minis * micros_per_mini
-            ts_volume = min(raw_micros, max_micros)  # Cap at max
+    # Always use MNQ for TopStep (Micro NQ)
+    ts_symbol = "MNQ"
 
-            logger.info(f"TopStep Conversion: {input_minis} Mini(s) = {raw_micros} Micros -> {ts_volume} MNQ (capped at {max_micros})")
-        else:
-            ts_volume = 0
+    # Calculate volume: 1 Mini = X Micros, capped at max
+    if action not in ['CLOSE', 'EXIT', 'FLATTEN']:
+        input_minis = float(data.get('volume', 1))
+        raw_micros = input_minis * micros_per_mini
+        ts_volume = min(raw_micros, max_micros)  # Cap at max
 
-        # Prepare payload
-        ts_payload = {
-            "symbol": ts_symbol,
-            "action": action,
-            "volume": ts_volume
-        }
+        logger.info(f"TopStep Conversion: {input_minis} Mini(s) = {raw_micros} Micros -> {ts_volume} MNQ (capped at {max_micros})")
+    else:
+        ts_volume = 0
 
-        # Pass through price for LIMIT orders
-        if data.get('price'):
-            ts_payload['price'] = float(data.get('price'))
-        if data.get('sl'):
-            ts_payload['sl'] = float(data.get('sl'))
-        if data.get('tp'):
-            ts_payload['tp'] = float(data.get('tp'))
+    # Prepare payload
+    ts_payload = {
+        "symbol": ts_symbol,
+        "action": action,
+        "volume": ts_volume
+    }
 
-        # Execute trade
-        ts_res = ts_client.execute_trade(ts_payload)
+    # Pass through price for LIMIT orders
+    if data.get('price'):
+        ts_payload['price'] = float(data.get('price'))
+    if data.get('sl'):
+        ts_payload['sl'] = float(data.get('sl'))
+    if data.get('tp'):
+        ts_payload['tp'] = float(data.get('tp'))
+
+    return ts_payload
+
+def _log_topstep_result(ts_payload, ts_res):
+    # Log result
+    log_level = logging.INFO if ts_res.get('status') == 'success' else logging.ERROR
+    logger.log(log_level, f"TopStep Response: {ts_res}")
+
+    # DB Log
+    status = ts_res.get('status', 'unknown')
+    db.log_trade_async("TopStep", ts_payload, status, details=str(ts_res))
+
+def topstep_execute(ts_payload, timeout=10.0, deadline=None):
+    """Runs a TopStep order on whichever client is active and waits for the result."""
+    if deadline:
+        deadline.check("TopStep order")
+        timeout = deadline.timeout(timeout)
+    if ts_async_client:
+        future = ts_loop.submit(ts_async_client.execute_trade(ts_payload, timeout=timeout))
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return {"status": "timeout", "message": f"TopStepX order exceeded {timeout * 1000:.0f}ms budget"}
+    return ts_client.execute_trade(ts_payload, deadline=deadline or Deadline(timeout))
 
-        # Log result
-        log_level = logging.INFO if ts_res.get('status') == 'success' else logging.ERROR
-        logger.log(log_level, f"TopStep Response: {ts_res}")
+def handle_topstep_logic(data, deadline=None):
+    """Builds the TopStep order from the webhook, executes it and journals the result."""
+    try:
+        ts_payload = build_topstep_payload(data)
+        if ts_payload is None:
+            return
 
-        # DB Log
-        status = ts_res.get('status', 'unknown')
-        db.log_trade("TopStep", ts_payload, status, details=str(ts_res))
+        # Execute trade
+        ts_res = topstep_execute(ts_payload, deadline=deadline)
+        _log_topstep_result(ts_payload, ts_res)
 
     except Exception as e:
         logger.error(f"TopStep Logic Error: {e}")
 
+async def handle_topstep_logic_async(data, deadline=None):
+    """Async-client counterpart of handle_topstep_logic_blocking (runs on ts_loop)."""
+    start_time = time.time()
+    try:
+        ts_payload = build_topstep_payload(data)
+        if ts_payload is not None:
+            if deadline:
+                deadline.check("TopStep order")
+            ts_res = await ts_async_client.execute_trade(ts_payload, timeout=deadline.remaining() if deadline else None)
+            # Only queues the row; the SQLite write happens on the journal thread
+            _log_topstep_result(ts_payload, ts_res)
+        duration = (time.time() - start_time) * 1000
+        return {'status': 'success', 'duration_ms': duration}
+    except Exception as e:
+        duration = (time.time() - start_time) * 1000
+        logger.error(f"TopStep Error: {e}")
+        return {'status': 'error', 'error': str(e), 'duration_ms': duration}
+
 def hard_exit_callback(platform):
     """Callback for the scheduler to close all positions."""
     logger.warning(f"HARD EXIT: Closing all positions on {platform}")
     try:
         if platform.upper() == 'MT5':
-            # Close all MT5 positions
-            all_positions = mt5.positions_get()
+            # Close all MT5 positions in one batch from a single snapshot
+            all_positions = POSITION_BOOK.fresh(max_age_ms=0).positions
             if all_positions:
-                for pos in all_positions:
-                    close_positions(pos.symbol)
-                logger.info(f"Hard Exit: Closed {len(all_positions)} MT5 positions")
+                res = flatten_positions(all_positions)
+                logger.info(f"Hard Exit: Closed {res['closed']}/{len(all_positions)} MT5 positions in {res['duration_ms']:.0f}ms")
             else:
                 logger.info("Hard Exit: No MT5 positions to close")
 
         elif platform.upper() == 'TOPSTEP':
-            ts_client.execute_trade({"action": "CLOSE", "symbol": "MNQ"})
+            topstep_execute({"action": "CLOSE", "symbol": "MNQ"})
 
         elif platform.upper() == 'IBKR':
             forward_to_ibkr({"action": "CLOSE", "symbol": ""})
@@ -1198,10 +1689,24 @@ if __name__ == "__main__":
     if auto_connect:
         if not initialize_mt5():
             logger.warning("MT5 Init Failed - Running in Offline Mode")
+
     else:
         logger.info("MT5 Auto-connect disabled. Waiting for manual connection.")
         STATE["connected"] = False
 
+    # Watch config.json for live settings updates
+    CONFIG_STORE.start()
+
+    # Flag ack-first executions that a previous run accepted but never finished
+    db.interrupt_pending_executions()
+
+    if IBKR_RUNTIME:
+        # IBKR client runs on a loop inside this process
+        IBKR_RUNTIME.start()
+    else:
+        # Warm the keep-alive channel to the IBKR bridge before the first trade
+        IBKR_CHANNEL.start()
+
     # Start the trading scheduler for hard exit
     scheduler.start()
     logger.info(f"Trading Scheduler active - Hard exit at {CONFIG.get('trading_hours', {}).get('hard_exit_time', '16:50')} ET")
@@ -0,0 +1,217 @@
+"""
+MT5 Gateway Module
+The MetaTrader5 package talks to the terminal over a single IPC pipe and is
+not safe to call from many threads at once. The gateway owns that pipe on one
+worker thread and accepts typed commands through a queue:
+- Every terminal call runs on the gateway thread, in submission order
+- Identical read commands still waiting in the queue are coalesced into one call
+  (never across a write queued between them)
+- Per-command IPC latency and queue wait are measured in one place
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("MT5_Gateway")
+
+# Terminal calls without side effects; duplicates queued together share one result
+READ_COMMANDS = frozenset({
+    'account_info',
+    'positions_get',
+    'symbol_info',
+    'symbol_info_tick',
+    'terminal_info',
+    'last_error',
+})
+
+
+@dataclass
+class MT5Command:
+    """A single terminal call queued for the gateway thread."""
+    name: str
+    fn: object
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    key: tuple = None
+
+
+class MT5Gateway:
+    """Single-threaded actor that serializes all MetaTrader5 IPC calls."""
+
+    def __init__(self, name="MT5_Gateway"):
+        self.name = name
+        self._queue = queue.Queue()
+        self._pending_reads = {}  # coalesce key -> queued MT5Command
+        self._lock = threading.Lock()
+        self._thread = None
+        self.running = False
+
+        # name -> {count, coalesced, errors, total_ms, max_ms, last_ms, wait_ms}
+        self._stats = {}
+
+    def start(self):
+        """Start the gateway thread (idempotent)."""
+        with self._lock:
+            if self.running:
+                return
+            if self._thread is not None and self._thread.is_alive():
+                # Previous thread is still draining after stop()
+                self._thread.join(timeout=2)
+            self.running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        logger.info("MT5 Gateway started")
+
+    def stop(self, timeout=2):
+        """Stop accepting work and let the gateway thread drain."""
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def in_gateway_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, name, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) for the gateway thread.
+
+        Args:
+            name: Command name (e.g. 'positions_get'); read commands are coalesced
+            fn: The MetaTrader5 callable to invoke
+
+        Returns:
+            Future resolving to the call's return value
+        """
+        if self.in_gateway_thread():
+            # Already on the gateway thread - run inline to avoid self-deadlock
+            future = Future()
+            try:
+                future.set_result(self._invoke(MT5Command(name, fn, args, kwargs)))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if not self.running:
+            self.start()
+
+        key = None
+        if name in READ_COMMANDS:
+            try:
+                key = (name, args, tuple(sorted(kwargs.items())))
+                hash(key)
+            except TypeError:
+                key = None
+
+        with self._lock:
+            if key is not None:
+                pending = self._pending_reads.get(key)
+                if pending is not None:
+                    self._record(name, coalesced=True)
+                    return pending.future
+
+            command = MT5Command(name, fn, args, kwargs, key=key)
+            if key is not None:
+                self._pending_reads[key] = command
+            elif name not in READ_COMMANDS:
+                # A write is now queued behind any pending reads; later reads must
+                # see its effect, so they can no longer share those earlier results
+                self._pending_reads.clear()
+            self._queue.put(command)
+        return command.future
+
+    def call(self, name, fn, *args, timeout=None, **kwargs):
+        """
+        Submit a command and block until the gateway returns its result.
+        A write that times out while still queued is cancelled, so it never
+        reaches the terminal after the caller has given up on it.
+        """
+        future = self.submit(name, fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if name not in READ_COMMANDS:
+                future.cancel()
+            raise
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def metrics(self):
+        """Per-command IPC latency and coalescing statistics."""
+        with self._lock:
+            commands = {}
+            for name, s in self._stats.items():
+                executed = s['count']
+                commands[name] = {
+                    "count": executed,
+                    "coalesced": s['coalesced'],
+                    "errors": s['errors'],
+                    "avg_ms": round(s['total_ms'] / executed, 3) if executed else 0.0,
+                    "max_ms": round(s['max_ms'], 3),
+                    "last_ms": round(s['last_ms'], 3),
+                    "avg_wait_ms": round(s['wait_ms'] / executed, 3) if executed else 0.0,
+                }
+        return {"running": self.running, "queue_depth": self.queue_depth(), "commands": commands}
+
+    def _record(self, name, duration_ms=None, wait_ms=0.0, error=False, coalesced=False):
+        # Caller holds self._lock when coalesced=True
+        s = self._stats.setdefault(name, {
+            'count': 0, 'coalesced': 0, 'errors': 0,
+            'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0, 'wait_ms': 0.0
+        })
+        if coalesced:
+            s['coalesced'] += 1
+            return
+        s['count'] += 1
+        s['total_ms'] += duration_ms
+        s['max_ms'] = max(s['max_ms'], duration_ms)
+        s['last_ms'] = duration_ms
+        s['wait_ms'] += wait_ms
+        if error:
+            s['errors'] += 1
+
+    def _invoke(self, command):
+        return command.fn(*command.args, **command.kwargs)
+
+    def _run(self):
+        while True:
+            command = self._queue.get()
+            if command is None:
+                if not self.running:
+                    break
+                continue
+
+            with self._lock:
+                # From here on, new identical reads must wait for a fresh call
+                if command.key is not None and self._pending_reads.get(command.key) is command:
+                    del self._pending_reads[command.key]
+
+            if not command.future.set_running_or_notify_cancel():
+                continue
+
+            started = time.perf_counter()
+            wait_ms = (started - command.enqueued_at) * 1000
+            error = False
+            try:
+                result = self._invoke(command)
+                command.future.set_result(result)
+            except Exception as e:
+                error = True
+                command.future.set_exception(e)
+            duration_ms = (time.perf_counter() - started) * 1000
+
+            with self._lock:
+                self._record(command.name, duration_ms, wait_ms, error=error)
+
+            if duration_ms > 500:
+                logger.warning(f"Slow MT5 IPC: {command.name} took {duration_ms:.0f}ms")
@@ -0,0 +1,180 @@
+"""
+Position Book Module
+Keeps a recent copy of MT5 positions and account info in memory so the
+trade path can read them without an IPC round-trip.
+- Refreshed by a background thread on a short interval
+- Invalidated after every fill so the next read sees the new state
+- Positions indexed by symbol; lookups use the fuzzy TradingView alias set
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+logger = logging.getLogger("PositionBook")
+
+
+@lru_cache(maxsize=256)
+def _aliases(names):
+    result = set()
+    for name in names:
+        if not name:
+            continue
+        name = name.upper()
+        clean = name.replace('1!', '').replace('2!', '')
+        result.update((name, clean, clean + "_H"))
+    return frozenset(result)
+
+
+def symbol_aliases(*names):
+    """
+    Fuzzy alias set for broker suffix mismatches (e.g. NQ1! vs NQ_H).
+    Each name contributes itself, its 1!/2!-stripped form and that form + "_H".
+    """
+    return _aliases(tuple(names))
+
+
+@dataclass(frozen=True)
+class BookSnapshot:
+    """Positions and account info captured by one refresh."""
+    positions: tuple = ()
+    account: object = None
+    refreshed_at: float = 0.0  # time.monotonic() of the refresh, 0 if never refreshed
+    sequence: int = 0
+    by_symbol: dict = field(default_factory=dict)  # symbol -> tuple of positions
+    by_ticket: dict = field(default_factory=dict)  # ticket -> position
+
+    def age_ms(self):
+        """Milliseconds since this snapshot was taken (inf if never refreshed)."""
+        if not self.refreshed_at:
+            return float('inf')
+        return (time.monotonic() - self.refreshed_at) * 1000
+
+    def positions_for(self, *names):
+        """Positions whose symbol is in the alias set of any of `names`."""
+        matches = []
+        for alias in symbol_aliases(*names):
+            matches.extend(self.by_symbol.get(alias, ()))
+        return matches
+
+
+def _build_snapshot(positions, account, sequence):
+    positions = tuple(positions) if positions else ()
+    by_symbol = {}
+    for p in positions:
+        by_symbol.setdefault(p.symbol, []).append(p)
+    return BookSnapshot(
+        positions=positions,
+        account=account,
+        refreshed_at=time.monotonic(),
+        sequence=sequence,
+        by_symbol={s: tuple(ps) for s, ps in by_symbol.items()},
+        by_ticket={p.ticket: p for p in positions}
+    )
+
+
+class PositionBook:
+    """Background-refreshed cache of MT5 positions and account info."""
+
+    def __init__(self, fetch_positions, fetch_account, refresh_interval_ms=500, max_age_ms=1000):
+        """
+        Args:
+            fetch_positions: Callable returning the current positions (e.g. via the MT5 gateway)
+            fetch_account: Callable returning the current account info
+            refresh_interval_ms: Background refresh period
+            max_age_ms: Oldest snapshot `fresh()` will return without refreshing
+        """
+        self.fetch_positions = fetch_positions
+        self.fetch_account = fetch_account
+        self.refresh_interval = refresh_interval_ms / 1000.0
+        self.max_age_ms = max_age_ms
+        self.snapshot = BookSnapshot()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._generation = 0  # bumped by invalidate()
+        self._dirty = True
+        self._failing = False
+        self.running = False
+        self.thread = None
+
+    def refresh(self):
+        """
+        Fetch positions and account info and install a new snapshot.
+
+        Returns:
+            BookSnapshot: The new snapshot, or the previous one if the fetch failed
+        """
+        with self._refresh_lock:
+            generation = self._generation
+            try:
+                positions = self.fetch_positions()
+                account = self.fetch_account()
+            except Exception as e:
+                if not self._failing:
+                    logger.warning(f"Position book refresh failed: {e}")
+                self._failing = True
+                return self.snapshot
+
+            if self._failing:
+                logger.info("Position book refresh recovered")
+            self._failing = False
+            self.snapshot = _build_snapshot(positions, account, self.snapshot.sequence + 1)
+            if generation == self._generation:
+                # No fill happened while we were fetching
+                self._dirty = False
+            return self.snapshot
+
+    def fresh(self, max_age_ms=None):
+        """
+        Current snapshot, refreshed synchronously first if it was invalidated
+        by a fill or is older than max_age_ms.
+        """
+        max_age_ms = self.max_age_ms if max_age_ms is None else max_age_ms
+        snapshot = self.snapshot
+        if self._dirty or snapshot.age_ms() > max_age_ms:
+            snapshot = self.refresh()
+        return snapshot
+
+    def invalidate(self):
+        """Mark the snapshot stale (call after a fill) and wake the refresher."""
+        self._generation += 1
+        self._dirty = True
+        self._wake.set()
+
+    def age_ms(self):
+        return self.snapshot.age_ms()
+
+    def status(self):
+        """Snapshot age and size for health reporting."""
+        age = self.snapshot.age_ms()
+        return {
+            "running": self.running,
+            "age_ms": round(age, 1) if age != float('inf') else None,
+            "stale": self._dirty,
+            "positions": len(self.snapshot.positions),
+            "sequence": self.snapshot.sequence
+        }
+
+    def start(self):
+        """Start the background refresh thread."""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._refresh_loop, name="PositionBook", daemon=True)
+        self.thread.start()
+        logger.info(f"Position book started (refresh every {self.refresh_interval * 1000:.0f}ms)")
+
+    def stop(self):
+        """Stop the background refresh thread."""
+        self.running = False
+        self._wake.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def _refresh_loop(self):
+        while self.running:
+            self.refresh()
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
@@ -0,0 +1,415 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+from colorama import Fore, Style
+
+from src.topstep.contract_cache import TopStepContractCache
+from src.topstep.client import (
+    DEFAULT_TOKEN_REFRESH_SECONDS, ORDER_TYPE_MARKET, SIDE_BUY, SIDE_SELL, decode_token_expiry
+)
+from src.utils.circuit_breaker import ALLOW, PROBE, CircuitBreaker
+from src.utils.logger import LogManager
+
+# Logger specific to TopStep
+logger = LogManager.get_logger("TopStep", log_file="logs/topstep.log")
+
+
+class AsyncTopStepClient:
+    """
+    asyncio-native TopStepX client for the broker fan-out.
+    - One pooled aiohttp session (HTTP/1.1 keep-alive) for every request
+    - Single-flight auth: a burst of webhooks triggers one login, not N
+    - Contract IDs pre-resolved at validate_connection so orders skip the search
+    Same request payloads and result dicts as TopStepClient.
+    """
+
+    def __init__(self, config):
+        self.config = config.get('topstep', {})
+        self.enabled = self.config.get('enabled', False)
+        self.mock_mode = self.config.get('mock_mode', True)
+        self.username = self.config.get('username', '')
+        self.api_key = self.config.get('api_key', '')
+        self.base_url = self.config.get('base_url', 'https://api.topstepx.com/api').rstrip('/')
+        self.symbol_map = self.config.get('symbol_map', {})
+        self.max_retries = self.config.get('max_retries', 3)
+        self.pool_size = self.config.get('pool_size', 4)
+        self.timeout = self.config.get('timeout_seconds', 10)
+
+        # Trips after max_retries consecutive failures, probes again after the cool-down
+        self.breaker = CircuitBreaker(
+            "TopStepX",
+            failure_threshold=self.max_retries,
+            cooldown_seconds=self.config.get('circuit_cooldown_seconds', 30)
+        )
+        self.connected = False
+        self.access_token = None
+        self.token_expires_at = None  # epoch seconds, from the JWT 'exp' claim when present
+        self.refresh_ahead = self.config.get('token_refresh_ahead_seconds', 300)
+        self.account_id = self.config.get('account_id')  # Use configured account if set
+        self.account_name = None
+
+        # Contract ID cache (symbol -> contractId), persisted and refreshed ahead of rolls
+        self.contract_cache = TopStepContractCache(
+            self.config.get('contract_cache_path', 'topstep_contracts.json'),
+            refresh_ahead_days=self.config.get('contract_refresh_ahead_days', 10)
+        )
+
+        self._session = None
+        self._auth_lock = None
+        self._refresh_task = None
+        self.auth_count = 0
+
+    # --- HTTP ---
+
+    def _get_session(self):
+        """Pooled session, created lazily on the running loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    def _lock(self):
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        return self._auth_lock
+
+    async def _post(self, path, payload, auth=True):
+        """POST JSON. Returns (status_code, parsed body or {}, raw text)."""
+        headers = {"Authorization": f"Bearer {self.access_token}"} if auth else {}
+        async with self._get_session().post(f"{self.base_url}{path}", json=payload, headers=headers) as r:
+            text = await r.text()
+            try:
+                body = json.loads(text) if text else {}
+            except ValueError:
+                body = {}
+            return r.status, body, text
+
+    async def close(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    # --- Auth ---
+
+    async def _authenticate(self):
+        """Authenticate with TopStepX API to get access token."""
+        if not self.api_key:
+            logger.error(f"{Fore.RED}TopStepX: No API key configured{Style.RESET_ALL}")
+            return False
+
+        if not self.username:
+            logger.error(f"{Fore.RED}TopStepX: No username configured{Style.RESET_ALL}")
+            return False
+
+        try:
+            self.auth_count += 1
+            status, data, text = await self._post(
+                "/Auth/loginKey", {"userName": self.username, "apiKey": self.api_key}, auth=False
+            )
+            if status == 200:
+                self.access_token = data.get('token')
+                if self.access_token:
+                    # Tokens without a readable expiry are refreshed on the old 5 minute cadence
+                    self.token_expires_at = (decode_token_expiry(self.access_token)
+                                             or time.time() + self.refresh_ahead + DEFAULT_TOKEN_REFRESH_SECONDS)
+                    logger.info(f"{Fore.GREEN}TopStepX: Authenticated successfully as {self.username}{Style.RESET_ALL}")
+                    # Account lookup only when we don't know which account to trade yet
+                    if not self.account_id:
+                        await self._get_accounts()
+                    return True
+                logger.error(f"{Fore.RED}TopStepX: No token in response{Style.RESET_ALL}")
+                return False
+            logger.error(f"{Fore.RED}TopStepX: Auth failed - {status}: {text}{Style.RESET_ALL}")
+            return False
+
+        except Exception as e:
+            logger.error(f"{Fore.RED}TopStepX: Auth exception: {e}{Style.RESET_ALL}")
+            return False
+
+    def _seconds_until_refresh(self):
+        """Seconds until the token should be refreshed (0 = refresh now)."""
+        if not self.access_token:
+            return 0
+        if self.token_expires_at is None:
+            return DEFAULT_TOKEN_REFRESH_SECONDS
+        return max(0, self.token_expires_at - self.refresh_ahead - time.time())
+
+    def _token_usable(self, stale_token):
+        return self.access_token and self.access_token != stale_token and self._seconds_until_refresh() > 0
+
+    async def ensure_authenticated(self, stale_token=None):
+        """
+        Single-flight login. Concurrent callers wait on one request; a caller
+        that saw a 401 passes its stale token so a login that already replaced
+        it is reused instead of repeated.
+        """
+        if self._token_usable(stale_token):
+            return True
+        async with self._lock():
+            if self._token_usable(stale_token):
+                return True
+            if await self._authenticate():
+                return True
+            if stale_token and self.access_token == stale_token:
+                # Rejected token must not be reused by the next caller
+                self.access_token = None
+            return False
+
+    async def _background_refresh_loop(self):
+        """Refreshes the token before it expires and contracts before they roll."""
+        while True:
+            await asyncio.sleep(min(max(self._seconds_until_refresh(), 1), DEFAULT_TOKEN_REFRESH_SECONDS))
+            try:
+                if self._seconds_until_refresh() == 0:
+                    await self.ensure_authenticated(stale_token=self.access_token)
+                await self.prefetch_contracts()
+            except Exception as e:
+                logger.warning(f"TopStepX: Background refresh failed: {e}")
+
+    async def _get_accounts(self):
+        """Get available trading accounts using search endpoint."""
+        try:
+            status, data, _ = await self._post("/Account/search", {"onlyActiveAccounts": True})
+            if status != 200:
+                logger.warning(f"TopStepX: Account search returned {status}")
+                return
+
+            accounts = data.get('accounts', [])
+            if not accounts:
+                logger.warning(f"{Fore.YELLOW}TopStepX: No accounts found{Style.RESET_ALL}")
+                return
+
+            # If account_id is pre-configured, find that specific account
+            if self.account_id:
+                for acc in accounts:
+                    if acc.get('id') == self.account_id:
+                        self.account_name = acc.get('name')
+                        logger.info(f"{Fore.GREEN}TopStepX: Using configured account {self.account_name} (ID: {self.account_id}){Style.RESET_ALL}")
+                        return
+                logger.warning(f"{Fore.YELLOW}TopStepX: Configured account {self.account_id} not found, using first tradeable{Style.RESET_ALL}")
+
+            # Fall back to first tradeable account
+            chosen = next((acc for acc in accounts if acc.get('canTrade', False)), accounts[0])
+            self.account_id = chosen.get('id')
+            self.account_name = chosen.get('name')
+            logger.info(f"{Fore.GREEN}TopStepX: Using account {self.account_name} (ID: {self.account_id}){Style.RESET_ALL}")
+        except Exception as e:
+            logger.warning(f"TopStepX: Could not fetch accounts: {e}")
+
+    # --- Contracts ---
+
+    async def _get_contract_id(self, symbol):
+        """Get the full contract ID for a symbol (e.g., MNQ -> CON.F.US.MNQ.H26)"""
+        contract_id = self.contract_cache.get(symbol)
+        if contract_id:
+            return contract_id
+
+        contract_id = await self._search_contract(symbol)
+        if contract_id:
+            await self._save_contracts()
+        return contract_id
+
+    async def _search_contract(self, symbol):
+        """Look up the active contract for a symbol via Contract/search and cache it."""
+        try:
+            status, data, _ = await self._post("/Contract/search", {"searchText": symbol, "live": False})
+            if status == 200:
+                for c in data.get('contracts', []):
+                    if c.get('activeContract', False):
+                        self.contract_cache.put(symbol, c.get('id'))
+                        logger.info(f"TopStepX: Resolved {symbol} -> {c.get('id')}")
+                        return c.get('id')
+            logger.warning(f"TopStepX: Could not find contract for {symbol}")
+        except Exception as e:
+            logger.warning(f"TopStepX: Contract search error: {e}")
+        return None
+
+    async def _save_contracts(self):
+        # File write stays off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.contract_cache.save)
+
+    async def prefetch_contracts(self, force=False):
+        """Resolve mapped/cached symbols (plus MNQ) that are missing or close to their roll, concurrently."""
+        symbols = set(self.symbol_map.values()) | set(self.contract_cache.symbols()) | {"MNQ"}
+        stale = [s for s in sorted(symbols) if force or self.contract_cache.needs_refresh(s)]
+        if not stale:
+            return 0
+        results = await asyncio.gather(*(self._search_contract(s) for s in stale))
+        await self._save_contracts()
+        return sum(1 for r in results if r)
+
+    async def validate_connection(self):
+        """Checks connection to API on startup and pre-resolves contracts."""
+        if not self.enabled:
+            logger.info("TopStepX module is disabled.")
+            return False
+
+        if self.mock_mode:
+            logger.info(f"{Fore.YELLOW}TopStepX running in MOCK MODE. No real connection check.{Style.RESET_ALL}")
+            self.connected = True
+            return True
+
+        logger.info(f"Validating TopStepX Connection to {self.base_url} (async client)...")
+        if await self.ensure_authenticated():
+            self.connected = True
+            await self.prefetch_contracts()
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.ensure_future(self._background_refresh_loop())
+            return True
+        logger.error(f"{Fore.RED}TopStepX: Authentication failed{Style.RESET_ALL}")
+        return False
+
+    # --- Orders ---
+
+    async def execute_trade(self, data, timeout=None):
+        """
+        Executes a trade order.
+        Data expected: {"symbol": "MNQ", "action": "BUY", "volume": 5.0}
+        Actions: BUY, SELL, CLOSE/EXIT/FLATTEN
+        timeout: Overall budget in seconds for the order (e.g. the webhook's remaining deadline)
+        """
+        if timeout is not None:
+            try:
+                return await asyncio.wait_for(self.execute_trade(data), timeout)
+            except asyncio.TimeoutError:
+                return {"status": "timeout", "message": f"TopStepX order exceeded {timeout * 1000:.0f}ms budget"}
+
+        if not self.enabled:
+            return {"status": "skipped", "message": "Disabled"}
+
+        if not await self._breaker_allows():
+            logger.error(f"{Fore.RED}Circuit Breaker OPEN. Skipping TopStepX order.{Style.RESET_ALL}")
+            return {"status": "error", "message": "Circuit Breaker Open"}
+
+        symbol = data.get('symbol')
+        action = data.get('action', '').upper()
+        volume = float(data.get('volume', 0))
+        is_close = action in ['CLOSE', 'EXIT', 'FLATTEN']
+
+        if not is_close and volume <= 0:
+            return {"status": "error", "message": "Invalid Volume"}
+
+        if self.mock_mode:
+            if is_close:
+                msg = f"MOCK CLOSE: {symbol} -> TopStepX (Success)"
+            else:
+                msg = f"MOCK ORDER: {action} {int(volume)} {symbol} -> TopStepX (Success)"
+            logger.info(f"{Fore.MAGENTA}{msg}{Style.RESET_ALL}")
+            return {"status": "success", "mode": "mock", "message": msg}
+
+        if not await self.ensure_authenticated():
+            return {"status": "error", "message": "Authentication failed"}
+
+        contract_id = await self._get_contract_id(symbol)
+        if not contract_id:
+            return {"status": "error", "message": f"Could not find contract for {symbol}"}
+
+        if is_close:
+            path = "/Position/closeContract"
+            payload = {"accountId": self.account_id, "contractId": contract_id}
+        else:
+            path = "/Order/place"
+            payload = {
+                "accountId": self.account_id,
+                "contractId": contract_id,
+                "type": ORDER_TYPE_MARKET,  # 2 = Market
+                "side": SIDE_BUY if action == "BUY" else SIDE_SELL,  # 0 = Buy, 1 = Sell
+                "size": int(volume)
+            }
+        return await self._send(path, payload, symbol, action, is_close)
+
+    async def _send(self, path, payload, symbol, action, is_close):
+        start = time.perf_counter()
+        try:
+            logger.info(f"TopStepX {'Close Position' if is_close else 'Order'}: {json.dumps(payload)}")
+            token = self.access_token
+            status, result, text = await self._post(path, payload)
+
+            if status == 401:
+                # One re-login (shared with any concurrent callers), then one retry
+                logger.warning("TopStepX: Token expired, re-authenticating...")
+                if not await self.ensure_authenticated(stale_token=token):
+                    self._handle_failure("HTTP 401: Re-auth failed")
+                    return {"status": "error", "code": 401, "message": "Authentication failed"}
+                payload["accountId"] = self.account_id
+                status, result, text = await self._post(path, payload)
+
+            latency = round((time.perf_counter() - start) * 1000, 2)
+            if status != 200:
+                self._handle_failure(f"HTTP {status}: {text}")
+                return {"status": "error", "code": status, "body": text}
+
+            if result.get('success', False):
+                self.breaker.record_success()
+                if is_close:
+                    logger.info(f"{Fore.GREEN}TopStepX Position Closed: {symbol}{Style.RESET_ALL}")
+                else:
+                    logger.info(f"{Fore.GREEN}TopStepX Order Placed: {action} {payload['size']} {symbol} (Order ID: {result.get('orderId')}, {latency}ms){Style.RESET_ALL}")
+                return {"status": "success", "data": result, "latency_ms": latency}
+
+            error_msg = result.get('errorMessage', 'Unknown error')
+            if is_close:
+                logger.warning(f"TopStepX Close response: {error_msg}")
+                return {"status": "success", "data": result}  # May be no position to close
+            self._handle_failure(f"Order rejected: {error_msg}")
+            return {"status": "error", "message": error_msg, "data": result}
+
+        except Exception as e:
+            self._handle_failure(str(e))
+            return {"status": "error", "message": str(e)}
+        except BaseException:
+            # Cancelled (e.g. by the execute_trade budget) - still counts against the breaker
+            self._handle_failure("Request cancelled before completion")
+            raise
+
+    async def _probe(self):
+        """Lightweight health request (account search) used to test a half-open breaker."""
+        try:
+            if not await self.ensure_authenticated():
+                return False
+            status, _, _ = await self._post("/Account/search", {"onlyActiveAccounts": True})
+            return status == 200
+        except Exception as e:
+            logger.warning(f"TopStepX: Breaker probe failed: {e}")
+            return False
+
+    async def _breaker_allows(self):
+        """Consult the breaker; runs the half-open probe when the cool-down has elapsed."""
+        decision = self.breaker.before_request()
+        if decision == PROBE:
+            logger.info("TopStepX: Circuit breaker cool-down elapsed, probing...")
+            try:
+                healthy = await self._probe()
+            except BaseException:
+                # Cancelled mid-probe: release the half-open slot instead of latching it
+                self.breaker.record_failure("Probe cancelled")
+                raise
+            if healthy:
+                self.breaker.record_success()
+                return True
+            self.breaker.record_failure("Probe failed")
+            return False
+        return decision == ALLOW
+
+    @property
+    def circuit_open(self):
+        """Backwards-compatible flag: True while the breaker is open or half-open."""
+        return self.breaker.is_open
+
+    @property
+    def consecutive_failures(self):
+        return self.breaker.consecutive_failures
+
+    def _handle_failure(self, error_msg):
+        tripped = self.breaker.record_failure(error_msg)
+        logger.error(f"{Fore.RED}TopStepX Failure ({self.breaker.consecutive_failures}/{self.max_retries}): {error_msg}{Style.RESET_ALL}")
+
+        if tripped:
+            logger.critical(f"{Fore.RED}TopStepX CIRCUIT BREAKER TRIPPED. Pausing requests for {self.breaker.cooldown:.0f}s.{Style.RESET_ALL}")
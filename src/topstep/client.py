@@ -1,8 +1,13 @@
 import requests
+import base64
 import json
 import logging
+import threading
 import time
 from colorama import Fore, Style
+from src.topstep.contract_cache import TopStepContractCache
+from src.utils.circuit_breaker import ALLOW, PROBE, CircuitBreaker
+from src.utils.deadline import Deadline, DeadlineExceeded
 from src.utils.logger import LogManager
 
 # Logger specific to TopStep
@@ -17,6 +22,31 @@ ORDER_TYPE_STOP_LIMIT = 4
 SIDE_BUY = 0
 SIDE_SELL = 1
 
+# Re-login interval when the token carries no readable expiry
+DEFAULT_TOKEN_REFRESH_SECONDS = 300
+
+# Longest any single HTTP call may take (less when the order's deadline is closer)
+HTTP_TIMEOUT_SECONDS = 10
+
+
+def _http_timeout(deadline):
+    """Timeout for one HTTP call; raises DeadlineExceeded if the budget is spent."""
+    if deadline is None:
+        return HTTP_TIMEOUT_SECONDS
+    deadline.check("TopStepX request")
+    return deadline.timeout(HTTP_TIMEOUT_SECONDS)
+
+
+def decode_token_expiry(token):
+    """Expiry (epoch seconds) from a JWT's 'exp' claim, or None if it can't be read."""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+        return float(exp) if exp else None
+    except Exception:
+        return None
+
 
 class TopStepClient:
     def __init__(self, config):
@@ -29,36 +59,82 @@ class TopStepClient:
         self.symbol_map = self.config.get('symbol_map', {})
         self.max_retries = self.config.get('max_retries', 3)
 
-        self.consecutive_failures = 0
-        self.circuit_open = False
+        # Trips after max_retries consecutive failures, probes again after the cool-down
+        self.breaker = CircuitBreaker(
+            "TopStepX",
+            failure_threshold=self.max_retries,
+            cooldown_seconds=self.config.get('circuit_cooldown_seconds', 30)
+        )
         self.connected = False
         self.session = requests.Session()
         self.access_token = None
+        self.token_expires_at = None  # epoch seconds, from the JWT 'exp' claim when present
+        self.refresh_ahead = self.config.get('token_refresh_ahead_seconds', 300)
         self.account_id = self.config.get('account_id')  # Use configured account if set
         self.account_name = None
+        self._auth_lock = threading.Lock()
+        self.auth_count = 0
 
-        # Contract ID cache (symbol -> contractId)
-        self.contract_cache = {}
+        # Contract ID cache (symbol -> contractId), persisted and refreshed ahead of rolls
+        self.contract_cache = TopStepContractCache(
+            self.config.get('contract_cache_path', 'topstep_contracts.json'),
+            refresh_ahead_days=self.config.get('contract_refresh_ahead_days', 10)
+        )
 
         # Keep-Alive
-        import threading
         self.running = True
+        self._stop_event = threading.Event()
         self.ka_thread = threading.Thread(target=self._keep_alive_loop, daemon=True)
         self.ka_thread.start()
 
+    def _seconds_until_refresh(self):
+        """Seconds until the token should be refreshed (0 = refresh now)."""
+        if not self.access_token:
+            return 0
+        if self.token_expires_at is None:
+            return DEFAULT_TOKEN_REFRESH_SECONDS
+        return max(0, self.token_expires_at - self.refresh_ahead - time.time())
+
     def _keep_alive_loop(self):
-        """Periodically refreshes token to keep session alive."""
+        """Refreshes the token shortly before it expires so trades never wait on a login."""
         if not self.enabled or self.mock_mode:
             return
         while self.running:
-            time.sleep(300)  # Refresh every 5 minutes
+            wait = self._seconds_until_refresh() if self.connected else DEFAULT_TOKEN_REFRESH_SECONDS
+            # Wake at least every 5 minutes in case the token was replaced meanwhile
+            if self._stop_event.wait(min(max(wait, 1), DEFAULT_TOKEN_REFRESH_SECONDS)):
+                return
             try:
+                if self.connected and self._seconds_until_refresh() == 0:
+                    self.ensure_token(stale_token=self.access_token)
                 if self.connected:
-                    self._authenticate()
-            except:
-                pass
+                    self.refresh_contracts()
+            except Exception as e:
+                logger.warning(f"TopStepX: Background token refresh failed: {e}")
+
+    def stop(self):
+        self.running = False
+        self._stop_event.set()
+
+    def ensure_token(self, stale_token=None, deadline=None):
+        """
+        Single-flight (re)login. Returns True with a usable token.
+        Concurrent callers wait for one login; a caller that got a 401 passes
+        the token it used so a login that already replaced it is reused.
+        """
+        if self.access_token and self.access_token != stale_token and self._seconds_until_refresh() > 0:
+            return True
+        with self._auth_lock:
+            if self.access_token and self.access_token != stale_token and self._seconds_until_refresh() > 0:
+                return True
+            if self._authenticate(deadline):
+                return True
+            if stale_token and self.access_token == stale_token:
+                # Rejected token must not be reused by the next caller
+                self.access_token = None
+            return False
 
-    def _authenticate(self):
+    def _authenticate(self, deadline=None):
         """Authenticate with TopStepX API to get access token."""
         if not self.api_key:
             logger.error(f"{Fore.RED}TopStepX: No API key configured{Style.RESET_ALL}")
@@ -80,14 +156,20 @@ class TopStepClient:
                 "Content-Type": "application/json"
             }
 
-            response = self.session.post(auth_url, json=payload, headers=headers, timeout=10)
+            self.auth_count += 1
+            response = self.session.post(auth_url, json=payload, headers=headers, timeout=_http_timeout(deadline))
 
             if response.status_code == 200:
                 data = response.json()
                 self.access_token = data.get('token')
                 if self.access_token:
+                    # Tokens without a readable expiry are refreshed on the old 5 minute cadence
+                    self.token_expires_at = (decode_token_expiry(self.access_token)
+                                             or time.time() + self.refresh_ahead + DEFAULT_TOKEN_REFRESH_SECONDS)
                     logger.info(f"{Fore.GREEN}TopStepX: Authenticated successfully as {self.username}{Style.RESET_ALL}")
-                    self._get_accounts()
+                    # Account lookup only when we don't know which account to trade yet
+                    if not self.account_id:
+                        self._get_accounts(deadline)
                     return True
                 else:
                     logger.error(f"{Fore.RED}TopStepX: No token in response{Style.RESET_ALL}")
@@ -96,11 +178,13 @@ class TopStepClient:
                 logger.error(f"{Fore.RED}TopStepX: Auth failed - {response.status_code}: {response.text}{Style.RESET_ALL}")
                 return False
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"{Fore.RED}TopStepX: Auth exception: {e}{Style.RESET_ALL}")
             return False
 
-    def _get_accounts(self):
+    def _get_accounts(self, deadline=None):
         """Get available trading accounts using search endpoint."""
         try:
             headers = {
@@ -112,7 +196,7 @@ class TopStepClient:
                 f"{self.base_url}/Account/search",
                 json={"onlyActiveAccounts": True},
                 headers=headers,
-                timeout=10
+                timeout=_http_timeout(deadline)
             )
 
             if response.status_code == 200:
@@ -145,26 +229,46 @@ class TopStepClient:
                     logger.warning(f"{Fore.YELLOW}TopStepX: No accounts found{Style.RESET_ALL}")
             else:
                 logger.warning(f"TopStepX: Account search returned {response.status_code}")
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning(f"TopStepX: Could not fetch accounts: {e}")
 
-    def _get_contract_id(self, symbol):
+    def contract_symbols(self):
+        """Symbols kept resolved: every symbol_map target, anything already cached, and MNQ."""
+        return sorted(set(self.symbol_map.values()) | set(self.contract_cache.symbols()) | {"MNQ"})
+
+    def refresh_contracts(self, force=False):
+        """Re-resolve cached/mapped symbols that are missing or close to their roll."""
+        refreshed = 0
+        for symbol in self.contract_symbols():
+            if force or self.contract_cache.needs_refresh(symbol):
+                if self._search_contract(symbol):
+                    refreshed += 1
+        if refreshed:
+            self.contract_cache.save()
+        return refreshed
+
+    def _get_contract_id(self, symbol, deadline=None):
         """Get the full contract ID for a symbol (e.g., MNQ -> CON.F.US.MNQ.H26)"""
-        # Check cache first
-        if symbol in self.contract_cache:
-            return self.contract_cache[symbol]
-
+        # Check cache first (prefetched at startup, refreshed in the background)
+        contract_id = self.contract_cache.get(symbol)
+        if contract_id:
+            return contract_id
+
+        contract_id = self._search_contract(symbol, deadline)
+        if contract_id:
+            self.contract_cache.save()
+        return contract_id
+
+    def _search_contract(self, symbol, deadline=None):
+        """Look up the active contract for a symbol via Contract/search and cache it."""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
-
             response = self.session.post(
                 f"{self.base_url}/Contract/search",
                 json={"searchText": symbol, "live": False},  # live=False for sim/eval accounts
-                headers=headers,
-                timeout=10
+                headers=self._auth_headers(),
+                timeout=_http_timeout(deadline)
             )
 
             if response.status_code == 200:
@@ -173,10 +277,12 @@ class TopStepClient:
                 for c in contracts:
                     if c.get('activeContract', False):
                         contract_id = c.get('id')
-                        self.contract_cache[symbol] = contract_id
+                        self.contract_cache.put(symbol, contract_id)
                         logger.info(f"TopStepX: Resolved {symbol} -> {contract_id}")
                         return contract_id
             logger.warning(f"TopStepX: Could not find contract for {symbol}")
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.warning(f"TopStepX: Contract search error: {e}")
 
@@ -195,23 +301,37 @@ class TopStepClient:
 
         logger.info(f"Validating TopStepX Connection to {self.base_url}...")
 
-        if self._authenticate():
+        if self.ensure_token():
             self.connected = True
+            # Resolve contracts now so the first order skips Contract/search
+            self.refresh_contracts()
             return True
         else:
             logger.error(f"{Fore.RED}TopStepX: Authentication failed{Style.RESET_ALL}")
             return False
 
-    def execute_trade(self, data):
+    def execute_trade(self, data, timeout=None, deadline=None):
         """
         Executes a trade order.
         Data expected: {"symbol": "MNQ", "action": "BUY", "volume": 5.0}
         Actions: BUY, SELL, CLOSE/EXIT/FLATTEN
+        timeout: Overall budget in seconds for the order, if no deadline is given
+        deadline: The webhook's Deadline; login, contract lookup, probe, order
+                  and any 401 retry all share its remaining budget
         """
+        if deadline is None and timeout is not None:
+            deadline = Deadline(timeout)
+        try:
+            return self._execute_trade(data, deadline)
+        except DeadlineExceeded as e:
+            logger.error(f"TopStepX: {e}")
+            return {"status": "timeout", "message": str(e)}
+
+    def _execute_trade(self, data, deadline):
         if not self.enabled:
             return {"status": "skipped", "message": "Disabled"}
 
-        if self.circuit_open:
+        if not self._breaker_allows(deadline):
             logger.error(f"{Fore.RED}Circuit Breaker OPEN. Skipping TopStepX order.{Style.RESET_ALL}")
             return {"status": "error", "message": "Circuit Breaker Open"}
 
@@ -225,7 +345,7 @@ class TopStepClient:
                 msg = f"MOCK CLOSE: {symbol} -> TopStepX (Success)"
                 logger.info(f"{Fore.MAGENTA}{msg}{Style.RESET_ALL}")
                 return {"status": "success", "mode": "mock", "message": msg}
-            return self._close_position(symbol)
+            return self._close_position(symbol, deadline)
 
         if volume <= 0:
             return {"status": "error", "message": "Invalid Volume"}
@@ -235,28 +355,22 @@ class TopStepClient:
             logger.info(f"{Fore.MAGENTA}{msg}{Style.RESET_ALL}")
             return {"status": "success", "mode": "mock", "message": msg}
 
-        if not self.access_token:
-            if not self._authenticate():
-                return {"status": "error", "message": "Authentication failed"}
+        if not self.ensure_token(deadline=deadline):
+            return {"status": "error", "message": "Authentication failed"}
 
-        return self._send_order(symbol, action, int(volume))
+        return self._send_order(symbol, action, int(volume), deadline)
 
-    def _close_position(self, symbol):
+    def _close_position(self, symbol, deadline=None):
         """Close position for a symbol on TopStep using Position/closeContract."""
-        if not self.access_token:
-            if not self._authenticate():
-                return {"status": "error", "message": "Authentication failed"}
+        if not self.ensure_token(deadline=deadline):
+            return {"status": "error", "message": "Authentication failed"}
 
         # Get contract ID
-        contract_id = self._get_contract_id(symbol)
+        contract_id = self._get_contract_id(symbol, deadline)
         if not contract_id:
             return {"status": "error", "message": f"Could not find contract for {symbol}"}
 
         url = f"{self.base_url}/Position/closeContract"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
 
         payload = {
             "accountId": self.account_id,
@@ -265,12 +379,12 @@ class TopStepClient:
 
         try:
             logger.info(f"TopStepX Close Position: {json.dumps(payload)}")
-            response = self.session.post(url, json=payload, headers=headers, timeout=10)
+            response = self._post_authorized(url, payload, deadline)
 
             if response.status_code == 200:
                 result = response.json() if response.text else {}
                 if result.get('success', False):
-                    self.consecutive_failures = 0
+                    self.breaker.record_success()
                     logger.info(f"{Fore.GREEN}TopStepX Position Closed: {symbol}{Style.RESET_ALL}")
                     return {"status": "success", "data": result}
                 else:
@@ -278,31 +392,26 @@ class TopStepClient:
                     logger.warning(f"TopStepX Close response: {error_msg}")
                     return {"status": "success", "data": result}  # May be no position to close
             elif response.status_code == 401:
-                logger.warning("TopStepX: Token expired, re-authenticating...")
-                if self._authenticate():
-                    return self._close_position(symbol)
                 self._handle_failure(f"HTTP 401: Re-auth failed")
                 return {"status": "error", "code": 401, "message": "Authentication failed"}
             else:
                 self._handle_failure(f"HTTP {response.status_code}: {response.text}")
                 return {"status": "error", "code": response.status_code, "body": response.text}
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             self._handle_failure(str(e))
             return {"status": "error", "message": str(e)}
 
-    def _send_order(self, symbol, action, quantity):
+    def _send_order(self, symbol, action, quantity, deadline=None):
         """Send a market order to TopStepX."""
         # Get contract ID
-        contract_id = self._get_contract_id(symbol)
+        contract_id = self._get_contract_id(symbol, deadline)
         if not contract_id:
             return {"status": "error", "message": f"Could not find contract for {symbol}"}
 
         url = f"{self.base_url}/Order/place"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
 
         # TopStepX order format (confirmed working)
         payload = {
@@ -315,12 +424,12 @@ class TopStepClient:
 
         try:
             logger.info(f"TopStepX Order: {json.dumps(payload)}")
-            response = self.session.post(url, json=payload, headers=headers, timeout=10)
+            response = self._post_authorized(url, payload, deadline)
 
             if response.status_code == 200:
                 result = response.json() if response.text else {}
                 if result.get('success', False):
-                    self.consecutive_failures = 0
+                    self.breaker.record_success()
                     order_id = result.get('orderId')
                     logger.info(f"{Fore.GREEN}TopStepX Order Placed: {action} {quantity} {symbol} (Order ID: {order_id}){Style.RESET_ALL}")
                     return {"status": "success", "data": result}
@@ -329,9 +438,6 @@ class TopStepClient:
                     self._handle_failure(f"Order rejected: {error_msg}")
                     return {"status": "error", "message": error_msg, "data": result}
             elif response.status_code == 401:
-                logger.warning("TopStepX: Token expired, re-authenticating...")
-                if self._authenticate():
-                    return self._send_order(symbol, action, quantity)
                 self._handle_failure(f"HTTP 401: Re-auth failed")
                 return {"status": "error", "code": 401, "message": "Authentication failed"}
             else:
@@ -339,14 +445,88 @@ class TopStepClient:
                 logger.error(f"TopStep Error: {response.text}")
                 return {"status": "error", "code": response.status_code, "body": response.text}
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             self._handle_failure(str(e))
             return {"status": "error", "message": str(e)}
 
+    def _post_authorized(self, url, payload, deadline=None):
+        """
+        POST with the current token. On a 401, re-login once (single-flight)
+        and retry once; a second 401 is returned to the caller. Each call
+        gets only the deadline's remaining budget, and the retry is skipped
+        once that budget is spent.
+        """
+        token = self.access_token
+        response = self.session.post(url, json=payload, headers=self._auth_headers(), timeout=_http_timeout(deadline))
+        if response.status_code != 401:
+            return response
+        if deadline is not None and deadline.expired:
+            logger.warning("TopStepX: 401 with no budget left to re-authenticate")
+            return response
+
+        logger.warning("TopStepX: Token expired, re-authenticating...")
+        if not self.ensure_token(stale_token=token, deadline=deadline):
+            return response
+        if 'accountId' in payload:
+            payload['accountId'] = self.account_id
+        return self.session.post(url, json=payload, headers=self._auth_headers(), timeout=_http_timeout(deadline))
+
+    def _auth_headers(self):
+        return {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json"
+        }
+
+    def _probe(self, deadline=None):
+        """Lightweight health request (account search) used to test a half-open breaker."""
+        try:
+            if not self.ensure_token(deadline=deadline):
+                return False
+            response = self.session.post(
+                f"{self.base_url}/Account/search",
+                json={"onlyActiveAccounts": True},
+                headers=self._auth_headers(),
+                timeout=_http_timeout(deadline)
+            )
+            return response.status_code == 200
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"TopStepX: Breaker probe failed: {e}")
+            return False
+
+    def _breaker_allows(self, deadline=None):
+        """Consult the breaker; runs the half-open probe when the cool-down has elapsed."""
+        decision = self.breaker.before_request()
+        if decision == PROBE:
+            logger.info("TopStepX: Circuit breaker cool-down elapsed, probing...")
+            try:
+                healthy = self._probe(deadline)
+            except BaseException:
+                # Out of budget mid-probe: release the half-open slot instead of latching it
+                self.breaker.record_failure("Probe interrupted")
+                raise
+            if healthy:
+                self.breaker.record_success()
+                return True
+            self.breaker.record_failure("Probe failed")
+            return False
+        return decision == ALLOW
+
+    @property
+    def circuit_open(self):
+        """Backwards-compatible flag: True while the breaker is open or half-open."""
+        return self.breaker.is_open
+
+    @property
+    def consecutive_failures(self):
+        return self.breaker.consecutive_failures
+
     def _handle_failure(self, error_msg):
-        self.consecutive_failures += 1
-        logger.error(f"{Fore.RED}TopStepX Failure ({self.consecutive_failures}/{self.max_retries}): {error_msg}{Style.RESET_ALL}")
+        tripped = self.breaker.record_failure(error_msg)
+        logger.error(f"{Fore.RED}TopStepX Failure ({self.breaker.consecutive_failures}/{self.max_retries}): {error_msg}{Style.RESET_ALL}")
 
-        if self.consecutive_failures >= self.max_retries:
-            self.circuit_open = True
-            logger.critical(f"{Fore.RED}TopStepX CIRCUIT BREAKER TRIPPED. Stopping requests.{Style.RESET_ALL}")
+        if tripped:
+            logger.critical(f"{Fore.RED}TopStepX CIRCUIT BREAKER TRIPPED. Pausing requests for {self.breaker.cooldown:.0f}s.{Style.RESET_ALL}")
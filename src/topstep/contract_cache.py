@@ -0,0 +1,121 @@
+"""
+TopStep Contract Cache Module
+Persistent symbol -> TopStepX contract ID cache (e.g. MNQ -> CON.F.US.MNQ.H26).
+- Expiry derived from the contract month code in the ID (H26 = March 2026)
+- Entries go stale refresh_ahead_days before that expiry (or after max_age_hours)
+  so the next front month is picked up in the background before the roll
+- Stale entries are still served until the contract actually expires, so a
+  trade never waits on Contract/search for a known symbol
+"""
+
+import calendar
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger("TopStep")
+
+MONTH_CODES = {'F': 1, 'G': 2, 'H': 3, 'J': 4, 'K': 5, 'M': 6,
+               'N': 7, 'Q': 8, 'U': 9, 'V': 10, 'X': 11, 'Z': 12}
+
+
+def contract_expiry(contract_id):
+    """
+    Estimated last trade date for a TopStepX contract ID (third Friday of
+    the contract month), or None if the ID has no month code.
+    """
+    try:
+        code = contract_id.rsplit('.', 1)[1]
+        month = MONTH_CODES[code[0].upper()]
+        year = 2000 + int(code[1:])
+    except (AttributeError, IndexError, KeyError, ValueError):
+        return None
+    fridays = [d for d in calendar.Calendar().itermonthdates(year, month)
+               if d.month == month and d.weekday() == calendar.FRIDAY]
+    return fridays[2]
+
+
+class TopStepContractCache:
+    """Disk-backed symbol -> contract ID map with roll-aware expiry."""
+
+    def __init__(self, path, refresh_ahead_days=10, max_age_hours=24):
+        """
+        Args:
+            path: JSON file the cache is persisted to (None = memory only)
+            refresh_ahead_days: Re-resolve this many days before the contract month expires
+            max_age_hours: Re-resolve at least this often regardless of expiry
+        """
+        self.path = path
+        self.refresh_ahead = timedelta(days=refresh_ahead_days)
+        self.max_age = max_age_hours * 3600
+        self._entries = {}  # symbol -> {"id": str, "expires": "YYYY-MM-DD" | None, "resolved_at": epoch}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+            with self._lock:
+                self._entries = entries
+            logger.info(f"TopStepX: Loaded {len(entries)} cached contracts from {self.path}")
+        except Exception as e:
+            logger.warning(f"TopStepX: Could not load contract cache {self.path}: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            entries = dict(self._entries)
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"TopStepX: Could not save contract cache: {e}")
+
+    @staticmethod
+    def _expires(entry):
+        return datetime.strptime(entry['expires'], '%Y-%m-%d').date() if entry.get('expires') else None
+
+    def get(self, symbol, today=None):
+        """Cached contract ID, or None if missing or its contract month has expired."""
+        with self._lock:
+            entry = self._entries.get(symbol)
+        if not entry:
+            return None
+        expires = self._expires(entry)
+        if expires and (today or date.today()) > expires:
+            return None
+        return entry['id']
+
+    def put(self, symbol, contract_id):
+        expires = contract_expiry(contract_id)
+        with self._lock:
+            self._entries[symbol] = {
+                "id": contract_id,
+                "expires": expires.isoformat() if expires else None,
+                "resolved_at": time.time()
+            }
+
+    def needs_refresh(self, symbol, today=None):
+        """True if missing, older than max_age, or inside the pre-roll window."""
+        with self._lock:
+            entry = self._entries.get(symbol)
+        if not entry or time.time() - entry.get('resolved_at', 0) > self.max_age:
+            return True
+        expires = self._expires(entry)
+        return bool(expires) and (today or date.today()) >= expires - self.refresh_ahead
+
+    def symbols(self):
+        with self._lock:
+            return list(self._entries)
+
+    def __contains__(self, symbol):
+        return self.get(symbol) is not None
@@ -0,0 +1,149 @@
+"""
+Bounded Executor Module
+Per-broker worker pools with a capped backlog.
+- Each broker gets its own threads, so a hung venue only exhausts its own pool
+- At most max_workers + max_queue tasks are admitted; beyond that the
+  rejection policy applies ("reject" fails fast, "block" waits up to
+  block_timeout_seconds for a slot)
+- try_submit() never waits, so a caller fanning out to several pools can
+  admit every venue before waiting on a saturated one
+- Queued / running / completed / rejected counters for /health
+"""
+
+import concurrent.futures
+import logging
+import threading
+import time
+
+logger = logging.getLogger("BoundedExecutor")
+
+REJECT = "reject"
+BLOCK = "block"
+
+
+class PoolSaturated(RuntimeError):
+    """Raised by submit() when a pool's backlog is full."""
+
+
+class BoundedExecutor:
+    """ThreadPoolExecutor with a bounded backlog and saturation metrics."""
+
+    def __init__(self, name, max_workers=4, max_queue=8, policy=REJECT, block_timeout=1.0):
+        """
+        Args:
+            name: Pool label (thread name prefix and metrics)
+            max_workers: Threads in the pool
+            max_queue: Tasks allowed to wait for a thread
+            policy: "reject" or "block" when the backlog is full
+            block_timeout: Max seconds a "block" submit waits for a slot
+        """
+        if policy not in (REJECT, BLOCK):
+            raise ValueError(f"Unknown rejection policy: {policy}")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_wait_ms = 0.0
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn on this pool. Raises PoolSaturated if no slot is available."""
+        return self.submit_within(None, fn, *args, **kwargs)
+
+    def submit_within(self, timeout, fn, *args, **kwargs):
+        """
+        Like submit(), but a "block" pool waits at most `timeout` seconds for a
+        slot (None = block_timeout), e.g. the caller's remaining deadline.
+        """
+        if self.policy == BLOCK:
+            wait = self.block_timeout if timeout is None else min(max(0.0, timeout), self.block_timeout)
+            admitted = self._slots.acquire(timeout=wait)
+        else:
+            admitted = self._slots.acquire(blocking=False)
+        if not admitted:
+            with self._lock:
+                self.rejected += 1
+            logger.warning(f"{self.name} pool saturated ({self.max_workers} running, {self.max_queue} queued) - rejecting task")
+            raise PoolSaturated(f"{self.name} pool saturated")
+        return self._start(fn, args, kwargs)
+
+    def try_submit(self, fn, *args, **kwargs):
+        """
+        Schedule fn only if a slot is free right now, never waiting.
+
+        Returns:
+            Future, or None if the pool is full (not counted as a rejection)
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        return self._start(fn, args, kwargs)
+
+    def _start(self, fn, args, kwargs):
+        # Caller holds a slot
+        with self._lock:
+            self.queued += 1
+        enqueued_at = time.time()
+        try:
+            return self._pool.submit(self._run, enqueued_at, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise
+
+    def _run(self, enqueued_at, fn, args, kwargs):
+        wait_ms = (time.time() - enqueued_at) * 1000
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.max_queue_wait_ms = max(self.max_queue_wait_ms, wait_ms)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def shutdown(self, wait=False):
+        self._pool.shutdown(wait=wait)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "policy": self.policy,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "max_queue_wait_ms": round(self.max_queue_wait_ms, 2)
+            }
+
+
+def build_broker_pools(config, brokers=("mt5", "ibkr", "topstep")):
+    """
+    One BoundedExecutor per broker from the execution.pools config section, e.g.
+    {"mt5": {"max_workers": 4, "max_queue": 8, "policy": "reject"}}.
+    """
+    pools_conf = config.get('execution', {}).get('pools', {})
+    pools = {}
+    for broker in brokers:
+        conf = pools_conf.get(broker, {})
+        pools[broker] = BoundedExecutor(
+            f"{broker.upper()}_Pool",
+            max_workers=conf.get('max_workers', 4),
+            max_queue=conf.get('max_queue', 8),
+            policy=conf.get('policy', REJECT),
+            block_timeout=conf.get('block_timeout_seconds', 1.0)
+        )
+    return pools
@@ -0,0 +1,128 @@
+"""
+Circuit Breaker Module
+Closed / open / half-open breaker for broker API clients.
+- Opens after failure_threshold consecutive failures
+- After cooldown_seconds the next caller is told to probe (half-open);
+  everyone else is rejected until the probe resolves
+- The probe slot is a lease: if its holder never reports back (e.g. it was
+  cancelled mid-request), the slot is handed out again after another cooldown
+- A successful probe (or trial request) closes the breaker again
+- Transition counts and timestamps are kept for /health
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger("CircuitBreaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# before_request() decisions
+ALLOW = "allow"
+PROBE = "probe"
+REJECT = "reject"
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker with time-based recovery."""
+
+    def __init__(self, name, failure_threshold=3, cooldown_seconds=30.0, clock=time.monotonic):
+        """
+        Args:
+            name: Label used in logs and status
+            failure_threshold: Consecutive failures that open the breaker
+            cooldown_seconds: Time the breaker stays open before a probe is allowed
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown_seconds
+        self.clock = clock
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+        self.last_failure = None
+        self.transitions = {}  # "closed->open" -> count
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        """True unless the breaker is closed (open or half-open)."""
+        return self.state != CLOSED
+
+    def before_request(self):
+        """
+        Decide whether a request may go out.
+
+        Returns:
+            ALLOW: breaker closed, send the request
+            PROBE: cool-down elapsed and this caller holds the half-open slot;
+                   probe (or send the request as the trial) and report the outcome
+            REJECT: breaker open or a probe is already in flight
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return ALLOW
+            now = self.clock()
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self._transition(HALF_OPEN)
+                self.probe_started_at = now
+                return PROBE
+            if self.state == HALF_OPEN and now - self.probe_started_at >= self.cooldown:
+                # Abandoned probe: its holder never recorded an outcome
+                logger.warning(f"{self.name} circuit breaker probe lease expired, granting a new probe")
+                self.probe_started_at = now
+                return PROBE
+            return REJECT
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+                logger.info(f"{self.name} circuit breaker closed (recovered)")
+
+    def record_failure(self, reason=""):
+        """
+        Count a failure.
+
+        Returns:
+            bool: True if this failure opened (or re-opened) the breaker
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_failure = reason
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self._transition(OPEN)
+                self.opened_at = self.clock()
+                return True
+            return False
+
+    def reset(self):
+        """Force the breaker closed (manual override)."""
+        self.record_success()
+
+    def _transition(self, new_state):
+        key = f"{self.state}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.state = new_state
+
+    def status(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.cooldown - (self.clock() - self.opened_at)), 1)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown_seconds": self.cooldown,
+                "retry_in_seconds": retry_in,
+                "last_failure": self.last_failure,
+                "transitions": dict(self.transitions)
+            }
@@ -0,0 +1,185 @@
+"""
+Config Store Module
+Holds an in-memory snapshot of config.json so hot paths never touch disk.
+- Snapshot is swapped atomically when the file's contents change (compared by
+  hash, so same-second writes that leave mtime unchanged are still picked up)
+- File changes are detected with watchdog (falls back to polling)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+logger = logging.getLogger("ConfigStore")
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Immutable view of one successfully loaded config.json."""
+    version: int
+    data: dict
+    mtime: float
+    checksum: str
+    loaded_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    file_digest: str = ''  # Hash of the raw file bytes, for change detection
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def info(self):
+        """Metadata describing this snapshot (no config values)."""
+        return {
+            "version": self.version,
+            "checksum": self.checksum,
+            "mtime": self.mtime,
+            "loaded_at": self.loaded_at
+        }
+
+
+class ConfigStore:
+    """
+    Keeps the current ConfigSnapshot in memory.
+
+    Readers call `snapshot` (a plain attribute read, no locking or I/O).
+    Reloads happen on a background watcher thread and replace the snapshot
+    reference in one assignment, so a reader sees either the old or the new
+    config, never a half-loaded one. The dict inside a snapshot must be
+    treated as read-only.
+    """
+
+    def __init__(self, path, loader=None, poll_interval=1.0):
+        """
+        Args:
+            path: Path to config.json
+            loader: Optional callable(path) -> dict (e.g. to apply env overrides)
+            poll_interval: Seconds between change checks when watchdog is unavailable
+        """
+        self.path = os.path.abspath(path)
+        self.loader = loader or self._default_loader
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._observer = None
+        self._poll_thread = None
+        self.running = False
+
+        self.snapshot = self._load(version=1)
+
+    @staticmethod
+    def _default_loader(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _file_digest(self):
+        with open(self.path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _load(self, version, file_digest=None):
+        mtime = os.path.getmtime(self.path)
+        file_digest = file_digest or self._file_digest()
+        data = self.loader(self.path)
+        checksum = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        return ConfigSnapshot(version=version, data=data, mtime=mtime, checksum=checksum,
+                              file_digest=file_digest)
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    def add_listener(self, callback):
+        """Register callback(snapshot) invoked after each successful swap."""
+        self._listeners.append(callback)
+
+    def refresh(self, force=False):
+        """
+        Reload the file if its contents changed (or if force=True). The raw
+        bytes are hashed rather than trusting mtime, which may not move for
+        writes within the same second.
+        Keeps the previous snapshot when the file is missing or invalid,
+        e.g. while an editor is halfway through writing it.
+
+        Returns:
+            bool: True if a new snapshot was installed
+        """
+        with self._lock:
+            current = self.snapshot
+            try:
+                file_digest = self._file_digest()
+                if not force and file_digest == current.file_digest:
+                    return False
+                new_snapshot = self._load(version=current.version + 1, file_digest=file_digest)
+            except Exception as e:
+                logger.error(f"Config reload failed, keeping v{current.version}: {e}")
+                return False
+
+            if not force and new_snapshot.checksum == current.checksum:
+                # Rewritten but semantically unchanged - just remember the new bytes
+                self.snapshot = ConfigSnapshot(
+                    version=current.version, data=current.data, mtime=new_snapshot.mtime,
+                    checksum=current.checksum, loaded_at=current.loaded_at,
+                    file_digest=new_snapshot.file_digest
+                )
+                return False
+
+            self.snapshot = new_snapshot
+
+        logger.info(f"Config reloaded: v{new_snapshot.version} ({new_snapshot.checksum})")
+        for callback in self._listeners:
+            try:
+                callback(new_snapshot)
+            except Exception as e:
+                logger.error(f"Config listener error: {e}")
+        return True
+
+    def start(self):
+        """Start watching the config file for changes."""
+        if self.running:
+            return
+        self.running = True
+
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            logger.warning("watchdog not installed. Polling config.json instead.")
+            self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+            self._poll_thread.start()
+            return
+
+        store = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = {getattr(event, 'src_path', None), getattr(event, 'dest_path', None)}
+                if any(p and os.path.abspath(p) == store.path for p in paths):
+                    store.refresh()
+
+        self._observer = Observer()
+        self._observer.daemon = True
+        self._observer.schedule(_Handler(), os.path.dirname(self.path), recursive=False)
+        self._observer.start()
+        logger.info(f"Watching {self.path} for config changes")
+
+    def stop(self):
+        """Stop the watcher."""
+        self.running = False
+        if self._observer:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        if self._poll_thread:
+            self._poll_thread.join(timeout=2)
+            self._poll_thread = None
+
+    def _poll_loop(self):
+        while self.running:
+            self.refresh()
+            time.sleep(self.poll_interval)
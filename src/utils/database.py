@@ -1,19 +1,362 @@
 import sqlite3
+import json
 import logging
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime
 
+from src.utils.latency_sketch import LatencySketch
+from src.utils.sqlite_pool import SQLitePool
+
 logger = logging.getLogger("Database")
 
+# Trade columns after (timestamp, platform, symbol, action, volume, status, latency_ms), with defaults
+TRADE_FIELD_DEFAULTS = {
+    "details": "",
+    "expected_price": 0.0,
+    "executed_price": 0.0,
+    "slippage": 0.0,
+    "order_id": None,
+    "ticket": None,
+    "webhook_received_at": None,
+    "raw_webhook": None,
+    "fill_time_ms": 0.0,
+    "broker_response": None,
+    "position_after": None,
+    "equity_before": 0.0,
+    "equity_after": 0.0,
+    "commission": 0.0,
+    "pnl": 0.0,
+    "rejected_reason": None,
+    "pre_trade_positions": None,
+    "bid_price": 0.0,
+    "ask_price": 0.0,
+    "spread": 0.0,
+}
+TRADE_COLUMNS = ("timestamp", "platform", "symbol", "action", "volume", "status", "latency_ms",
+                 *TRADE_FIELD_DEFAULTS)
+INSERT_TRADE_SQL = (f"INSERT INTO trades ({', '.join(TRADE_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(TRADE_COLUMNS))})")
+
+# Trade columns that feed the trade_rollups summary table
+ROLLUP_SOURCE_COLUMNS = ("timestamp", "platform", "status", "latency_ms", "slippage", "pnl", "commission")
+
+
+def _rollup_bucket(timestamp):
+    """(day, hour) bucket for an ISO timestamp."""
+    try:
+        return timestamp[:10], int(timestamp[11:13])
+    except (TypeError, ValueError):
+        return "unknown", 0
+
+
+# Rollup key for trades without a platform. SQLite never treats NULLs in a
+# primary key as equal, so a NULL platform would get a new row on every upsert.
+NO_PLATFORM = ''
+
+
+def _rollup_platform(platform):
+    return NO_PLATFORM if platform is None else platform
+
+
+def _rollup_hour_key(bound):
+    """'YYYY-MM-DDTHH' bucket key for a date or datetime filter bound (a bare date means hour 00)."""
+    hour = bound[11:13]
+    return f"{bound[:10]}T{hour if hour.isdigit() else '00'}"
+
+
+def apply_rollups(conn, trades):
+    """
+    Adds trades (dicts with ROLLUP_SOURCE_COLUMNS) to trade_rollups. Runs on
+    the caller's connection so it commits or rolls back with the trade insert.
+    """
+    buckets = {}
+    for t in trades:
+        day, hour = _rollup_bucket(t['timestamp'])
+        key = (_rollup_platform(t['platform']), day, hour)
+        b = buckets.get(key)
+        if b is None:
+            b = buckets[key] = {
+                "total": 0, "successful": 0, "failed": 0, "latency_sum": 0.0, "latency_count": 0,
+                "slippage_sum": 0.0, "slippage_count": 0, "pnl_sum": 0.0, "pnl_count": 0,
+                "commission_sum": 0.0, "commission_count": 0, "sketch": LatencySketch()
+            }
+        b["total"] += 1
+        if t['status'] == 'success':
+            b["successful"] += 1
+        elif t['status'] is not None:
+            b["failed"] += 1
+        if t['latency_ms'] is not None:
+            b["latency_sum"] += t['latency_ms']
+            b["latency_count"] += 1
+            b["sketch"].add(t['latency_ms'])
+        for col in ("slippage", "pnl", "commission"):
+            if t[col] is not None:
+                b[f"{col}_sum"] += t[col]
+                b[f"{col}_count"] += 1
+
+    for (platform, day, hour), b in buckets.items():
+        existing = conn.execute(
+            "SELECT latency_sketch FROM trade_rollups WHERE platform = ? AND day = ? AND hour = ?",
+            (platform, day, hour)
+        ).fetchone()
+        sketch = b["sketch"]
+        if existing:
+            sketch = LatencySketch.from_json(existing[0]).merge(sketch)
+        conn.execute('''
+            INSERT INTO trade_rollups (
+                platform, day, hour, total_trades, successful, failed, latency_sum, latency_count,
+                slippage_sum, slippage_count, pnl_sum, pnl_count, commission_sum, commission_count,
+                latency_sketch
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (platform, day, hour) DO UPDATE SET
+                total_trades = total_trades + excluded.total_trades,
+                successful = successful + excluded.successful,
+                failed = failed + excluded.failed,
+                latency_sum = latency_sum + excluded.latency_sum,
+                latency_count = latency_count + excluded.latency_count,
+                slippage_sum = slippage_sum + excluded.slippage_sum,
+                slippage_count = slippage_count + excluded.slippage_count,
+                pnl_sum = pnl_sum + excluded.pnl_sum,
+                pnl_count = pnl_count + excluded.pnl_count,
+                commission_sum = commission_sum + excluded.commission_sum,
+                commission_count = commission_count + excluded.commission_count,
+                latency_sketch = excluded.latency_sketch
+        ''', (
+            platform, day, hour, b["total"], b["successful"], b["failed"], b["latency_sum"], b["latency_count"],
+            b["slippage_sum"], b["slippage_count"], b["pnl_sum"], b["pnl_count"],
+            b["commission_sum"], b["commission_count"], sketch.to_json()
+        ))
+
+
+def apply_rollup_delta(conn, trade_id, fields):
+    """
+    Adjusts trade_rollups for an update_trade that changes status, slippage,
+    pnl or commission. Must run before the UPDATE, in the same transaction.
+    """
+    if not {"status", "slippage", "pnl", "commission"} & set(fields):
+        return
+    row = conn.execute(
+        "SELECT timestamp, platform, status, slippage, pnl, commission FROM trades WHERE id = ?", (trade_id,)
+    ).fetchone()
+    if row is None:
+        return
+    timestamp, platform, old_status = row[0], row[1], row[2]
+    old = dict(zip(("slippage", "pnl", "commission"), row[3:]))
+    new_status = fields.get("status", old_status)
+
+    def outcome(status):
+        return (1 if status == 'success' else 0, 1 if status is not None and status != 'success' else 0)
+
+    (old_ok, old_fail), (new_ok, new_fail) = outcome(old_status), outcome(new_status)
+    params = [new_ok - old_ok, new_fail - old_fail]
+    for col in ("slippage", "pnl", "commission"):
+        before, after = old[col], fields.get(col, old[col])
+        params += [(after or 0.0) - (before or 0.0), (after is not None) - (before is not None)]
+    day, hour = _rollup_bucket(timestamp)
+    conn.execute('''
+        UPDATE trade_rollups SET
+            successful = successful + ?, failed = failed + ?,
+            slippage_sum = slippage_sum + ?, slippage_count = slippage_count + ?,
+            pnl_sum = pnl_sum + ?, pnl_count = pnl_count + ?,
+            commission_sum = commission_sum + ?, commission_count = commission_count + ?
+        WHERE platform = ? AND day = ? AND hour = ?
+    ''', (*params, _rollup_platform(platform), day, hour))
+
+
+def _rollup_source(row):
+    """ROLLUP_SOURCE_COLUMNS dict from an INSERT_TRADE_SQL parameter tuple."""
+    values = dict(zip(TRADE_COLUMNS, row))
+    return {col: values[col] for col in ROLLUP_SOURCE_COLUMNS}
+
+
+class TradeJournal:
+    """
+    Background trade writer.
+    - Rows are queued by callers and written by one thread on one long-lived connection
+    - Up to batch_size rows (or whatever arrives within flush_interval of the
+      first one) go in a single transaction via executemany
+    - Each insert gets a Future resolving to its row id; queued updates run in
+      order, so an update can target the Future of an earlier insert
+    """
+
+    _STOP = object()
+
+    def __init__(self, pool, batch_size=100, flush_interval=0.02):
+        self.pool = pool
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.thread = None
+        self.rows_written = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.errors = 0
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name="TradeJournal", daemon=True)
+        self.thread.start()
+
+    def insert(self, row):
+        future = Future()
+        self.queue.put(("insert", row, future))
+        return future
+
+    def update(self, target, fields):
+        future = Future()
+        self.queue.put(("update", (target, fields), future))
+        return future
+
+    def flush(self, timeout=5.0):
+        """Blocks until everything queued so far has been written."""
+        future = Future()
+        self.queue.put(("flush", None, future))
+        return future.result(timeout)
+
+    def close(self, timeout=5.0):
+        if not self.thread:
+            return
+        self.queue.put((self._STOP, None, None))
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            logger.warning(f"Trade journal did not drain within {timeout}s ({self.queue.qsize()} queued)")
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            flush_at = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] is not self._STOP:
+                remaining = flush_at - time.monotonic()
+                try:
+                    batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1][0] is self._STOP:
+                stopping = True
+                batch.pop()
+            if batch:
+                try:
+                    with self.pool.writer() as conn:
+                        self._write(conn, batch)
+                except Exception as e:
+                    logger.error(f"Trade journal write failed: {e}")
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_result(None)
+
+    def _write(self, conn, batch):
+        """Writes one batch in a single transaction and resolves its futures."""
+        try:
+            with conn:
+                outcomes = self._apply(conn, batch, {})
+        except Exception as e:
+            # Fall back to one transaction per op so one bad row doesn't drop the rest
+            logger.error(f"Trade journal batch of {len(batch)} failed ({e}), retrying individually")
+            self.errors += 1
+            outcomes = []
+            assigned = {}
+            for op in batch:
+                try:
+                    with conn:
+                        outcomes.extend(self._apply(conn, [op], assigned))
+                except Exception as op_error:
+                    logger.error(f"Failed to journal trade: {op_error}")
+                    outcomes.append(None if op[0] == "insert" else False)
+
+        inserted = 0
+        for (kind, _, future), outcome in zip(batch, outcomes):
+            if kind == "insert" and outcome is not None:
+                inserted += 1
+            future.set_result(outcome)
+        self.rows_written += inserted
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(batch))
+
+    @staticmethod
+    def _apply(conn, batch, assigned):
+        """
+        Executes the ops (runs of inserts via executemany). Returns one outcome
+        per op; assigned maps insert futures of this batch to their row ids.
+        """
+        outcomes = []
+        i = 0
+        while i < len(batch):
+            kind, payload, _ = batch[i]
+            if kind == "insert":
+                run = []
+                while i < len(batch) and batch[i][0] == "insert":
+                    run.append(batch[i])
+                    i += 1
+                conn.executemany(INSERT_TRADE_SQL, [row for _, row, _ in run])
+                # Single writer holding the write lock: the run's ids are contiguous
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                apply_rollups(conn, [_rollup_source(row) for _, row, _ in run])
+                for offset, (_, _, future) in enumerate(run):
+                    row_id = last_id - len(run) + 1 + offset
+                    assigned[future] = row_id
+                    outcomes.append(row_id)
+                continue
+            if kind == "update":
+                target, fields = payload
+                if not isinstance(target, Future):
+                    trade_id = target
+                elif target in assigned:
+                    trade_id = assigned[target]
+                else:
+                    # Earlier batch (already resolved) or a failed insert (not done)
+                    trade_id = target.result() if target.done() else None
+                if trade_id is None:
+                    outcomes.append(False)
+                else:
+                    apply_rollup_delta(conn, trade_id, fields)
+                    assignments = ", ".join(f"{col} = ?" for col in fields)
+                    conn.execute(f"UPDATE trades SET {assignments} WHERE id = ?", (*fields.values(), trade_id))
+                    outcomes.append(True)
+            else:  # flush marker
+                outcomes.append(True)
+            i += 1
+        return outcomes
+
+    def status(self):
+        return {
+            "queued": self.queue.qsize(),
+            "rows_written": self.rows_written,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+            "errors": self.errors
+        }
+
+
 class DatabaseManager:
-    def __init__(self, db_path='trades.db'):
+    def __init__(self, db_path='trades.db', options=None):
+        """
+        Args:
+            db_path: SQLite database file
+            options: The "database" config section (journal batching and
+                     connection tuning, see SQLitePool.DEFAULT_OPTIONS)
+        """
+        options = options or {}
         self.db_path = db_path
+        self.pool = SQLitePool(db_path, options)
+        self.journal_options = {
+            "batch_size": options.get('journal_batch_size', 100),
+            "flush_interval": options.get('journal_flush_ms', 20) / 1000.0
+        }
+        self._journal = None
+        self._journal_lock = threading.Lock()
+        self.trade_columns = ["id", *TRADE_COLUMNS]  # Replaced by the live schema in _init_db
         self._init_db()
 
     def _init_db(self):
         """Creates tables if they don't exist and handles migrations."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
                 # Create initial table
                 cursor.execute('''
@@ -65,10 +408,96 @@ class DatabaseManager:
                         except Exception as e:
                             logger.error(f"Migration failed for {col}: {e}")
 
+                # Migration: indexes for the /trades filters (platform / status + time range)
+                existing_indexes = [row[1] for row in cursor.execute("PRAGMA index_list(trades)")]
+                new_indexes = {
+                    "idx_trades_platform_timestamp": "platform, timestamp",
+                    "idx_trades_status_timestamp": "status, timestamp",
+                }
+                for name, cols in new_indexes.items():
+                    if name not in existing_indexes:
+                        try:
+                            logger.info(f"Migrating DB: Adding index {name}...")
+                            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON trades ({cols})")
+                        except Exception as e:
+                            logger.error(f"Migration failed for {name}: {e}")
+
+                self.trade_columns = [row[1] for row in cursor.execute("PRAGMA table_info(trades)")]
+
+                # Rollups behind /trades/summary, maintained in the same transaction as each
+                # insert; backfilled from existing trades the first time the table is created
+                has_rollups = cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trade_rollups'"
+                ).fetchone()
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS trade_rollups (
+                        platform TEXT,
+                        day TEXT,
+                        hour INTEGER,
+                        total_trades INTEGER DEFAULT 0,
+                        successful INTEGER DEFAULT 0,
+                        failed INTEGER DEFAULT 0,
+                        latency_sum REAL DEFAULT 0,
+                        latency_count INTEGER DEFAULT 0,
+                        slippage_sum REAL DEFAULT 0,
+                        slippage_count INTEGER DEFAULT 0,
+                        pnl_sum REAL DEFAULT 0,
+                        pnl_count INTEGER DEFAULT 0,
+                        commission_sum REAL DEFAULT 0,
+                        commission_count INTEGER DEFAULT 0,
+                        latency_sketch TEXT,
+                        PRIMARY KEY (platform, day, hour)
+                    )
+                ''')
+                if not has_rollups or cursor.execute(
+                        "SELECT 1 FROM trade_rollups WHERE platform IS NULL LIMIT 1").fetchone():
+                    # Also rebuilds tables written before NULL platforms were keyed as NO_PLATFORM
+                    self._backfill_rollups(conn)
+
+                # Intake journal for ack-first webhooks: a row is written before
+                # the 202 goes back, then updated once the brokers have answered
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS executions (
+                        id TEXT PRIMARY KEY,
+                        received_at TEXT,
+                        config_version INTEGER,
+                        raw_webhook TEXT,
+                        status TEXT,
+                        results TEXT,
+                        duration_ms REAL,
+                        completed_at TEXT
+                    )
+                ''')
+
                 conn.commit()
         except Exception as e:
             logger.error(f"DB Init Failed: {e}")
 
+    @staticmethod
+    def _backfill_rollups(conn, chunk_size=1000):
+        """Rebuilds trade_rollups from the trades table (chunked, on the caller's transaction)."""
+        conn.execute("DELETE FROM trade_rollups")
+        cursor = conn.execute(f"SELECT {', '.join(ROLLUP_SOURCE_COLUMNS)} FROM trades ORDER BY id")
+        total = 0
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            apply_rollups(conn, [dict(zip(ROLLUP_SOURCE_COLUMNS, row)) for row in rows])
+            total += len(rows)
+        if total:
+            logger.info(f"Backfilled trade rollups from {total} trades")
+        return total
+
+    def rebuild_rollups(self):
+        """Recomputes trade_rollups from scratch (e.g. after manual edits to trades)."""
+        try:
+            with self.pool.writer() as conn:
+                return self._backfill_rollups(conn)
+        except Exception as e:
+            logger.error(f"Failed to rebuild trade rollups: {e}")
+            return None
+
     def log_trade(self, platform, data, status, latency_ms=0, details="", expected_price=0.0,
                   executed_price=0.0, slippage=0.0, order_id=None, ticket=None,
                   webhook_received_at=None, raw_webhook=None, fill_time_ms=0.0,
@@ -77,62 +506,269 @@ class DatabaseManager:
                   pre_trade_positions=None, bid_price=0.0, ask_price=0.0, spread=0.0):
         """Logs a trade execution with comprehensive metrics for verification."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            row = self._trade_row(platform, data, status, latency_ms, dict(
+                details=details, expected_price=expected_price, executed_price=executed_price,
+                slippage=slippage, order_id=order_id, ticket=ticket,
+                webhook_received_at=webhook_received_at, raw_webhook=raw_webhook,
+                fill_time_ms=fill_time_ms, broker_response=broker_response,
+                position_after=position_after, equity_before=equity_before,
+                equity_after=equity_after, commission=commission, pnl=pnl,
+                rejected_reason=rejected_reason, pre_trade_positions=pre_trade_positions,
+                bid_price=bid_price, ask_price=ask_price, spread=spread
+            ))
+            with self.pool.writer() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO trades (
-                        timestamp, platform, symbol, action, volume, status, latency_ms,
-                        details, expected_price, executed_price, slippage, order_id, ticket,
-                        webhook_received_at, raw_webhook, fill_time_ms, broker_response,
-                        position_after, equity_before, equity_after, commission, pnl, rejected_reason,
-                        pre_trade_positions, bid_price, ask_price, spread
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    datetime.now().isoformat(),
-                    platform,
-                    data.get('symbol'),
-                    data.get('action'),
-                    float(data.get('volume', 0)),
-                    status,
-                    latency_ms,
-                    str(details),
-                    expected_price,
-                    executed_price,
-                    slippage,
-                    order_id,
-                    ticket,
-                    webhook_received_at,
-                    raw_webhook,
-                    fill_time_ms,
-                    broker_response,
-                    position_after,
-                    equity_before,
-                    equity_after,
-                    commission,
-                    pnl,
-                    rejected_reason,
-                    pre_trade_positions,
-                    bid_price,
-                    ask_price,
-                    spread
-                ))
+                cursor.execute(INSERT_TRADE_SQL, row)
+                trade_id = cursor.lastrowid
+                apply_rollups(conn, [_rollup_source(row)])
                 conn.commit()
-                return cursor.lastrowid
+                return trade_id
         except Exception as e:
             logger.error(f"Failed to log trade: {e}")
             return None
 
-    def get_trades(self, limit=100, platform=None, start_date=None, end_date=None):
-        """Retrieve trades with optional filters for verification."""
+    @staticmethod
+    def _trade_row(platform, data, status, latency_ms, fields):
+        """Parameter tuple for INSERT_TRADE_SQL."""
+        unknown = set(fields) - set(TRADE_FIELD_DEFAULTS)
+        if unknown:
+            raise TypeError(f"Unknown trade fields: {sorted(unknown)}")
+        values = {**TRADE_FIELD_DEFAULTS, **fields}
+        values['details'] = str(values['details'])
+        return (
+            datetime.now().isoformat(),
+            platform,
+            data.get('symbol'),
+            data.get('action'),
+            float(data.get('volume', 0)),
+            status,
+            latency_ms,
+            *(values[col] for col in TRADE_FIELD_DEFAULTS)
+        )
+
+    def log_trade_async(self, platform, data, status, latency_ms=0, **fields):
+        """
+        Queues a trade row on the background journal writer (same fields as
+        log_trade) and returns immediately.
+
+        Returns:
+            Future: resolves to the new row id (None if the write failed)
+        """
+        try:
+            row = self._trade_row(platform, data, status, latency_ms, fields)
+        except Exception as e:
+            logger.error(f"Failed to log trade: {e}")
+            future = Future()
+            future.set_result(None)
+            return future
+        return self.journal.insert(row)
+
+    def update_trade_async(self, trade_id, **fields):
+        """
+        Queues an update_trade on the journal writer. trade_id may be the Future
+        returned by log_trade_async; the update is applied after that insert.
+        """
+        unknown = set(fields) - set(self.UPDATABLE_COLUMNS)
+        if unknown:
+            logger.error(f"Cannot update trade: unknown columns {sorted(unknown)}")
+            future = Future()
+            future.set_result(False)
+            return future
+        return self.journal.update(trade_id, fields)
+
+    @property
+    def journal(self):
+        """Background TradeJournal, started on first use."""
+        with self._journal_lock:
+            if self._journal is None:
+                self._journal = TradeJournal(self.pool, **self.journal_options)
+                self._journal.start()
+            return self._journal
+
+    def close(self, timeout=5.0):
+        """Drains and stops the journal writer (pending rows are written first), then closes connections."""
+        with self._journal_lock:
+            journal, self._journal = self._journal, None
+        if journal:
+            journal.close(timeout)
+        self.pool.close()
+
+    # Columns that may be filled in after the trade row was first written
+    UPDATABLE_COLUMNS = (
+        "status", "details", "expected_price", "executed_price", "slippage", "order_id",
+        "ticket", "fill_time_ms", "broker_response", "position_after", "equity_before",
+        "equity_after", "commission", "pnl", "rejected_reason", "pre_trade_positions",
+        "bid_price", "ask_price", "spread"
+    )
+
+    def update_trade(self, trade_id, **fields):
+        """Attaches late-arriving data (e.g. post-trade equity) to an existing trade row."""
+        if trade_id is None:
+            return False
+        unknown = set(fields) - set(self.UPDATABLE_COLUMNS)
+        if unknown:
+            logger.error(f"Cannot update trade {trade_id}: unknown columns {sorted(unknown)}")
+            return False
+        if not fields:
+            return True
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.writer() as conn:
+                apply_rollup_delta(conn, trade_id, fields)
+                assignments = ", ".join(f"{col} = ?" for col in fields)
+                conn.execute(f"UPDATE trades SET {assignments} WHERE id = ?", (*fields.values(), trade_id))
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Failed to update trade {trade_id}: {e}")
+            return False
+
+    # Intake journal status values
+    EXECUTION_ACCEPTED = "accepted"
+    EXECUTION_COMPLETED = "completed"
+    EXECUTION_INTERRUPTED = "interrupted"
+
+    def create_execution(self, execution_id, raw_webhook, received_at=None, config_version=None):
+        """
+        Durably records an accepted webhook before it is dispatched (committed
+        with synchronous=FULL: the 202 promises it survives a power cut).
+        Returns True on success.
+        """
+        try:
+            with self.pool.writer(durable=True) as conn:
+                conn.execute(
+                    "INSERT INTO executions (id, received_at, config_version, raw_webhook, status) VALUES (?, ?, ?, ?, ?)",
+                    (execution_id, received_at or datetime.now().isoformat(), config_version,
+                     raw_webhook, self.EXECUTION_ACCEPTED)
+                )
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Failed to journal execution {execution_id}: {e}")
+            return False
+
+    def complete_execution(self, execution_id, results, duration_ms=0.0):
+        """Stores the per-broker results of a dispatched execution."""
+        try:
+            with self.pool.writer() as conn:
+                conn.execute(
+                    "UPDATE executions SET status = ?, results = ?, duration_ms = ?, completed_at = ? WHERE id = ?",
+                    (self.EXECUTION_COMPLETED, json.dumps(results, default=str), duration_ms,
+                     datetime.now().isoformat(), execution_id)
+                )
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Failed to complete execution {execution_id}: {e}")
+            return False
+
+    def get_execution(self, execution_id):
+        """Returns the journal row for an execution (results decoded), or None."""
+        try:
+            with self.pool.reader() as conn:
+                conn.row_factory = sqlite3.Row
+                row = conn.execute("SELECT * FROM executions WHERE id = ?", (execution_id,)).fetchone()
+            if row is None:
+                return None
+            execution = dict(row)
+            execution['results'] = json.loads(execution['results']) if execution['results'] else None
+            return execution
+        except Exception as e:
+            logger.error(f"Failed to get execution {execution_id}: {e}")
+            return None
+
+    def interrupt_pending_executions(self):
+        """
+        Marks executions that were accepted but never completed (process died
+        mid-dispatch) as interrupted. They are not replayed: the broker side may
+        already have filled, so they are left for manual review.
+        """
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.execute(
+                    "UPDATE executions SET status = ?, completed_at = ? WHERE status = ?",
+                    (self.EXECUTION_INTERRUPTED, datetime.now().isoformat(), self.EXECUTION_ACCEPTED)
+                )
+                conn.commit()
+                if cursor.rowcount:
+                    logger.warning(f"{cursor.rowcount} execution(s) were interrupted before completing")
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Failed to recover pending executions: {e}")
+            return 0
+
+    def trade_projection(self, columns=None):
+        """
+        SELECT list for the given trade columns (all columns if None). id is
+        always included so results can be paged. Raises ValueError on unknown columns.
+        """
+        if not columns:
+            return "*"
+        unknown = [c for c in columns if c not in self.trade_columns]
+        if unknown:
+            raise ValueError(f"Unknown trade columns: {unknown}")
+        return ", ".join(["id"] + [c for c in dict.fromkeys(columns) if c != "id"])
+
+    def export_columns(self, columns=None):
+        """Column names (in order) of the rows iter_trades yields for this projection."""
+        projection = self.trade_projection(columns)
+        return list(self.trade_columns) if projection == "*" else projection.split(", ")
+
+    def iter_trades(self, platform=None, start_date=None, end_date=None, columns=None, chunk_size=500):
+        """
+        Iterate every matching trade oldest first, chunk_size rows at a time -
+        memory stays constant however many trades match. Each chunk is a keyset
+        query (id > last id) on a reader borrowed only for that query, so a slow
+        consumer (e.g. an HTTP download) never holds a pooled connection.
+        Raises ValueError on unknown columns (before any row is read).
+        """
+        projection = self.trade_projection(columns)
+        query = f"SELECT {projection} FROM trades WHERE 1=1"
+        params = []
+        if platform:
+            query += " AND platform = ?"
+            params.append(platform)
+        if start_date:
+            query += " AND timestamp >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND timestamp <= ?"
+            params.append(end_date)
+        query += " AND id > ? ORDER BY id ASC LIMIT ?"
+        return self._iter_rows(query, params, chunk_size)
+
+    def _iter_rows(self, query, params, chunk_size):
+        last_id = 0
+        while True:
+            with self.pool.reader() as conn:
+                conn.row_factory = sqlite3.Row
+                rows = [dict(row) for row in conn.execute(query, [*params, last_id, chunk_size])]
+            # Reader is back in the pool before the caller sees the chunk
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1]['id']
+
+    def get_trades(self, limit=100, platform=None, start_date=None, end_date=None,
+                   before_id=None, columns=None):
+        """
+        Retrieve trades with optional filters for verification, newest first.
+
+        before_id: Keyset cursor - only trades with id < before_id (pass the
+                   last id of the previous page)
+        columns: Optional list of columns to return (raises ValueError if unknown)
+        """
+        projection = self.trade_projection(columns)
+        try:
+            with self.pool.reader() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
 
-                query = "SELECT * FROM trades WHERE 1=1"
+                query = f"SELECT {projection} FROM trades WHERE 1=1"
                 params = []
 
+                if before_id is not None:
+                    query += " AND id < ?"
+                    params.append(before_id)
                 if platform:
                     query += " AND platform = ?"
                     params.append(platform)
@@ -152,56 +788,95 @@ class DatabaseManager:
             logger.error(f"Failed to get trades: {e}")
             return []
 
-    def get_trade_summary(self, start_date=None, end_date=None):
-        """Get trade summary statistics for verification."""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+    SUMMARY_GROUPINGS = {None: ("platform",), "day": ("platform", "day"), "hour": ("platform", "day", "hour")}
+
+    def get_trade_summary(self, start_date=None, end_date=None, by=None):
+        """
+        Get trade summary statistics for verification, read from trade_rollups
+        (cost grows with the number of hour buckets, not trades). Date filters
+        apply at hour resolution: both bounds are truncated to their hour and
+        both hours are included, so start_date=10:30, end_date=11:00 covers
+        10:00-11:59. A bare date means 00:00 of that day.
 
+        by: None (per platform), "day" or "hour" (per platform and bucket)
+        """
+        if by not in self.SUMMARY_GROUPINGS:
+            raise ValueError(f"Invalid summary grouping: {by}")
+        key_cols = self.SUMMARY_GROUPINGS[by]
+        try:
+            with self.pool.reader() as conn:
                 query = """
-                    SELECT
-                        platform,
-                        COUNT(*) as total_trades,
-                        SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as successful,
-                        SUM(CASE WHEN status != 'success' THEN 1 ELSE 0 END) as failed,
-                        AVG(latency_ms) as avg_latency_ms,
-                        AVG(slippage) as avg_slippage,
-                        SUM(pnl) as total_pnl,
-                        SUM(commission) as total_commission
-                    FROM trades
+                    SELECT platform, day, hour, total_trades, successful, failed, latency_sum, latency_count,
+                           slippage_sum, slippage_count, pnl_sum, pnl_count, commission_sum, commission_count,
+                           latency_sketch
+                    FROM trade_rollups
                     WHERE 1=1
                 """
                 params = []
 
+                bucket = "day || 'T' || printf('%02d', hour)"
                 if start_date:
-                    query += " AND timestamp >= ?"
-                    params.append(start_date)
+                    query += f" AND {bucket} >= ?"
+                    params.append(_rollup_hour_key(start_date))
                 if end_date:
-                    query += " AND timestamp <= ?"
-                    params.append(end_date)
+                    query += f" AND {bucket} <= ?"
+                    params.append(_rollup_hour_key(end_date))
 
-                query += " GROUP BY platform"
+                groups = {}
+                for row in conn.execute(query, params):
+                    r = dict(zip(("platform", "day", "hour", "total_trades", "successful", "failed",
+                                  "latency_sum", "latency_count", "slippage_sum", "slippage_count",
+                                  "pnl_sum", "pnl_count", "commission_sum", "commission_count",
+                                  "latency_sketch"), row))
+                    key = tuple(r[c] for c in key_cols)
+                    g = groups.get(key)
+                    if g is None:
+                        g = groups[key] = {c: r[c] for c in key_cols}
+                        g.update({k: 0 for k in ("total_trades", "successful", "failed", "latency_sum",
+                                                  "latency_count", "slippage_sum", "slippage_count",
+                                                  "pnl_sum", "pnl_count", "commission_sum", "commission_count")})
+                        g["sketch"] = LatencySketch()
+                    for k in g:
+                        if k not in key_cols and k != "sketch":
+                            g[k] += r[k]
+                    g["sketch"].merge(LatencySketch.from_json(r["latency_sketch"]))
 
-                cursor.execute(query, params)
-                columns = [desc[0] for desc in cursor.description]
-                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            summary = []
+            for key in sorted(groups, key=lambda k: tuple((v is None, v) for v in k)):
+                g = groups[key]
+                entry = {c: g[c] for c in key_cols}
+                if entry.get("platform") == NO_PLATFORM:
+                    entry["platform"] = None  # Reported as stored in trades
+                entry.update({
+                    "total_trades": g["total_trades"],
+                    "successful": g["successful"],
+                    "failed": g["failed"],
+                    "avg_latency_ms": g["latency_sum"] / g["latency_count"] if g["latency_count"] else None,
+                    "avg_slippage": g["slippage_sum"] / g["slippage_count"] if g["slippage_count"] else None,
+                    "total_pnl": g["pnl_sum"] if g["pnl_count"] else None,
+                    "total_commission": g["commission_sum"] if g["commission_count"] else None,
+                })
+                entry.update({f"{k}_latency_ms": v for k, v in g["sketch"].percentiles().items()})
+                summary.append(entry)
+            return summary
         except Exception as e:
             logger.error(f"Failed to get trade summary: {e}")
             return []
 
-    def export_trades_csv(self, filepath, start_date=None, end_date=None):
-        """Export trades to CSV for external verification."""
+    def export_trades_csv(self, filepath, start_date=None, end_date=None, platform=None, columns=None):
+        """Export trades to CSV for external verification (streamed, no row cap)."""
         import csv
         try:
-            trades = self.get_trades(limit=10000, start_date=start_date, end_date=end_date)
-            if not trades:
-                return False
-
+            header = self.export_columns(columns)
+            rows = self.iter_trades(platform=platform, start_date=start_date, end_date=end_date, columns=columns)
+            written = 0
             with open(filepath, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=trades[0].keys())
-                writer.writeheader()
-                writer.writerows(trades)
-            return True
+                writer = csv.writer(f)
+                writer.writerow(header)
+                for trade in rows:
+                    writer.writerow([trade[c] for c in header])
+                    written += 1
+            return written > 0
         except Exception as e:
             logger.error(f"Failed to export trades: {e}")
             return False
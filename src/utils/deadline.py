@@ -0,0 +1,57 @@
+"""
+Deadline Module
+One time budget per webhook, created at ingress and passed down the fan-out.
+- Every downstream wait (gateway calls, HTTP timeouts, retry sleeps, future
+  waits) is capped by the time remaining instead of its own fixed timeout
+- Retry loops stop once the budget is spent rather than sleeping past it
+"""
+
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is attempted after its deadline has passed."""
+
+
+class Deadline:
+    """Absolute point in (monotonic) time by which a webhook must be answered."""
+
+    def __init__(self, timeout_seconds, clock=time.monotonic):
+        self.clock = clock
+        self.budget = timeout_seconds
+        self.expires_at = clock() + timeout_seconds
+
+    @classmethod
+    def from_config(cls, config, default_ms=10000):
+        """Deadline from execution.webhook_deadline_ms."""
+        return cls(config.get('execution', {}).get('webhook_deadline_ms', default_ms) / 1000.0)
+
+    def remaining(self):
+        """Seconds left (never negative)."""
+        return max(0.0, self.expires_at - self.clock())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, cap=None):
+        """Timeout for one downstream call: the remaining budget, optionally capped."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+    def check(self, what="operation"):
+        """Raise DeadlineExceeded if the budget is spent."""
+        if self.expired:
+            raise DeadlineExceeded(f"{what} skipped: webhook deadline ({self.budget * 1000:.0f}ms) exceeded")
+
+    def sleep(self, seconds):
+        """
+        Sleep for a retry backoff if it fits in the budget.
+
+        Returns:
+            bool: False (without sleeping) if the backoff would overrun the deadline
+        """
+        if seconds >= self.remaining():
+            return False
+        time.sleep(seconds)
+        return True
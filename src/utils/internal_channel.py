@@ -0,0 +1,116 @@
+"""
+Internal Channel Module
+Pooled keep-alive HTTP transport for bridge-to-bridge calls on localhost
+(MT5 bridge -> IBKR bridge).
+- One requests.Session with a tuned connection pool, reused for every trade
+- Authenticates with an internal token header instead of the public webhook secret
+- Background keep-alive pings keep a warm connection ready for the first trade
+"""
+
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("InternalChannel")
+
+INTERNAL_TOKEN_HEADER = "X-Bridge-Token"
+
+
+def derive_internal_token(config):
+    """
+    Token used between local bridges.
+    Uses INTERNAL_BRIDGE_TOKEN / security.internal_token if set, otherwise an
+    HMAC of the webhook secret so both processes agree without extra config
+    and the public secret itself never travels on the internal hop.
+    """
+    security = config.get('security', {})
+    explicit = os.environ.get('INTERNAL_BRIDGE_TOKEN') or security.get('internal_token')
+    if explicit:
+        return explicit
+    secret = security.get('webhook_secret', '')
+    return hmac.new(secret.encode(), b"unified-bridge-internal", hashlib.sha256).hexdigest()
+
+
+def is_internal_request(headers, token):
+    """True if the request carries the expected internal token."""
+    supplied = headers.get(INTERNAL_TOKEN_HEADER, '')
+    return bool(supplied) and hmac.compare_digest(supplied, token)
+
+
+class InternalChannel:
+    """Keep-alive HTTP channel to another local bridge."""
+
+    def __init__(self, base_url, token, pool_size=4, keepalive_interval=30):
+        """
+        Args:
+            base_url: Callable returning the peer's base URL (e.g. http://127.0.0.1:5001),
+                      evaluated per call so config reloads are picked up
+            token: Internal auth token sent in the X-Bridge-Token header
+            pool_size: Max concurrent keep-alive connections to the peer
+            keepalive_interval: Seconds between warm-up pings
+        """
+        self.base_url = base_url
+        self.keepalive_interval = keepalive_interval
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({INTERNAL_TOKEN_HEADER: token, "Connection": "keep-alive"})
+
+        self.healthy = False
+        self.last_ping_ms = None
+        self.last_ping_at = None
+        self.running = False
+        self.thread = None
+
+    def post(self, path, payload, timeout):
+        """POST JSON to the peer over a pooled connection."""
+        return self.session.post(f"{self.base_url()}{path}", json=payload, timeout=timeout)
+
+    def warm(self, timeout=2.0):
+        """Open (or keep open) a pooled connection with a cheap /ping."""
+        start = time.time()
+        try:
+            r = self.session.get(f"{self.base_url()}/ping", timeout=timeout)
+            ok = r.status_code == 200
+        except Exception as e:
+            ok = False
+            if self.healthy:
+                logger.warning(f"Internal channel ping failed: {e}")
+
+        if ok and not self.healthy:
+            logger.info(f"Internal channel to {self.base_url()} is warm")
+        self.healthy = ok
+        self.last_ping_ms = (time.time() - start) * 1000
+        self.last_ping_at = time.time()
+        return ok
+
+    def status(self):
+        return {
+            "healthy": self.healthy,
+            "last_ping_ms": round(self.last_ping_ms, 2) if self.last_ping_ms is not None else None,
+            "last_ping_age_s": round(time.time() - self.last_ping_at, 1) if self.last_ping_at else None
+        }
+
+    def start(self):
+        """Warm the connection now and keep it warm in the background."""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._keep_alive_loop, name="InternalChannel", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.session.close()
+
+    def _keep_alive_loop(self):
+        while self.running:
+            self.warm()
+            time.sleep(self.keepalive_interval)
@@ -0,0 +1,85 @@
+"""
+Latency Sketch Module
+Small mergeable quantile sketch for latency percentiles (p50/p95/p99).
+- Log-spaced buckets (DDSketch style): every reported quantile is within
+  relative_accuracy of the true value, whatever the distribution
+- Sketches of different hours/platforms merge by adding bucket counts, so
+  rollups can be combined into day or all-time percentiles without raw rows
+- Serializes to compact JSON for storage in SQLite
+"""
+
+import json
+import math
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class LatencySketch:
+    """Mergeable log-bucketed histogram of non-negative values (e.g. latency in ms)."""
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}  # bucket index -> count
+        self.zero_count = 0  # values <= 0 (not representable on a log scale)
+        self.count = 0
+
+    def add(self, value, count=1):
+        if value is None:
+            return
+        if value <= 0:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+
+    def merge(self, other):
+        """Adds another sketch's counts into this one (accuracies must match)."""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        """Estimated value at quantile q (0..1), or None if empty."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint of (gamma^(i-1), gamma^i] with bounded relative error
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def percentiles(self, points=(50, 95, 99), digits=2):
+        """{"p50": ..., "p95": ..., "p99": ...}"""
+        result = {}
+        for p in points:
+            value = self.quantile(p / 100.0)
+            result[f"p{p}"] = round(value, digits) if value is not None else None
+        return result
+
+    def to_json(self):
+        return json.dumps({"a": self.relative_accuracy, "z": self.zero_count,
+                           "b": {str(i): c for i, c in self.buckets.items()}}, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        """Rebuilds a sketch from to_json() output (empty sketch for None/'')."""
+        if not text:
+            return cls()
+        raw = json.loads(text)
+        sketch = cls(raw.get("a", DEFAULT_RELATIVE_ACCURACY))
+        sketch.zero_count = raw.get("z", 0)
+        sketch.buckets = {int(i): c for i, c in raw.get("b", {}).items()}
+        sketch.count = sketch.zero_count + sum(sketch.buckets.values())
+        return sketch
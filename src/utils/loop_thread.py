@@ -0,0 +1,42 @@
+"""
+Loop Thread Module
+A dedicated asyncio event loop running on a daemon thread, so synchronous
+code (Flask handlers, the broker fan-out) can schedule coroutines on it.
+"""
+
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger("LoopThread")
+
+
+class LoopThread:
+    """Background asyncio loop; submit() returns concurrent.futures.Future."""
+
+    def __init__(self, name):
+        self.name = name
+        self.loop = asyncio.new_event_loop()
+        self.thread = None
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop (starting it if needed)."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        logger.info(f"{self.name} event loop started")
+        self.loop.run_forever()
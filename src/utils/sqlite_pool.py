@@ -0,0 +1,161 @@
+"""
+SQLite Pool Module
+Long-lived, tuned connections for the trade database.
+- WAL journal mode so dashboard reads and trade inserts don't block each other
+- One writer connection (serialized by a lock) shared by every write path
+- A small pool of read-only reader connections for queries
+- synchronous, busy timeout, page cache and mmap size from the database config;
+  statements are reused through each connection's statement cache
+- writer(durable=True) commits that one transaction with synchronous=FULL, for
+  writes that must survive power loss (e.g. a webhook already acknowledged)
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger("Database")
+
+DEFAULT_OPTIONS = {
+    "wal": True,
+    "synchronous": "NORMAL",
+    "busy_timeout_ms": 5000,
+    "cache_size_kb": 8192,
+    "mmap_size_mb": 64,
+    "readers": 4,
+    "cached_statements": 256,
+}
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+class SQLitePool:
+    """Single writer connection plus a bounded pool of read-only connections."""
+
+    def __init__(self, db_path, options=None):
+        """
+        Args:
+            db_path: SQLite database file
+            options: Overrides for DEFAULT_OPTIONS (the "database" config section)
+        """
+        self.db_path = db_path
+        self.options = {**DEFAULT_OPTIONS, **{k: v for k, v in (options or {}).items() if k in DEFAULT_OPTIONS}}
+        if str(self.options['synchronous']).upper() not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Invalid synchronous mode: {self.options['synchronous']}")
+
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self._idle_readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+
+    def _connect(self, readonly=False):
+        timeout = self.options['busy_timeout_ms'] / 1000.0
+        if readonly:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=timeout,
+                                   check_same_thread=False,
+                                   cached_statements=self.options['cached_statements'])
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=timeout, check_same_thread=False,
+                                   cached_statements=self.options['cached_statements'])
+        conn.execute(f"PRAGMA busy_timeout = {int(self.options['busy_timeout_ms'])}")
+        conn.execute(f"PRAGMA cache_size = {-int(self.options['cache_size_kb'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.options['mmap_size_mb']) * 1024 * 1024}")
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            if self.options['wal']:
+                mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+                if mode.lower() != "wal":
+                    logger.warning(f"Could not enable WAL on {self.db_path} (journal_mode={mode})")
+            conn.execute(f"PRAGMA synchronous = {str(self.options['synchronous']).upper()}")
+        return conn
+
+    @contextmanager
+    def writer(self, durable=False):
+        """
+        Exclusive use of the writer connection. Anything still uncommitted is
+        committed on exit, or rolled back if the block raised.
+
+        durable: Commit with synchronous=FULL (fsync on commit) even when the
+                 pool runs at NORMAL, which can lose the last commits on power loss
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            mode = str(self.options['synchronous']).upper()
+            upgrade = durable and mode not in ("FULL", "EXTRA")
+            if upgrade:
+                if conn.in_transaction:
+                    conn.commit()
+                conn.execute("PRAGMA synchronous = FULL")
+            try:
+                yield conn
+            except BaseException:
+                # Never leave a half-done transaction on the shared connection
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            else:
+                if conn.in_transaction:
+                    conn.commit()
+            finally:
+                if upgrade:
+                    conn.execute(f"PRAGMA synchronous = {mode}")
+
+    @contextmanager
+    def reader(self):
+        """Borrows a read-only connection (waits up to busy_timeout if all are in use)."""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            self._idle_readers.put(conn)
+
+    def _acquire_reader(self):
+        try:
+            return self._idle_readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._reader_lock:
+            if self._reader_count < self.options['readers']:
+                # The writer creates the file (and WAL files) first
+                with self.writer():
+                    pass
+                conn = self._connect(readonly=True)
+                self._reader_count += 1
+                return conn
+        try:
+            return self._idle_readers.get(timeout=self.options['busy_timeout_ms'] / 1000.0)
+        except queue.Empty:
+            raise sqlite3.OperationalError("No reader connection available (pool exhausted)")
+
+    def close(self):
+        """Closes idle connections; the pool reconnects lazily if used again."""
+        with self._reader_lock:
+            while True:
+                try:
+                    self._idle_readers.get_nowait().close()
+                    self._reader_count -= 1
+                except queue.Empty:
+                    break
+        # Writer last: closing it checkpoints and removes the WAL file
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def status(self):
+        return {
+            "journal_mode": "wal" if self.options['wal'] else "delete",
+            "synchronous": str(self.options['synchronous']).upper(),
+            "readers_open": self._reader_count,
+            "readers_idle": self._idle_readers.qsize(),
+            "readers_max": self.options['readers'],
+        }
@@ -0,0 +1,103 @@
+"""
+Tests for the ack-first webhook mode.
+The webhook is journaled and answered with 202; results come from /executions/<id>.
+"""
+
+import unittest
+import sys
+import os
+import json
+import threading
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock mt5 before importing bridge
+sys.modules['MetaTrader5'] = MagicMock()
+
+from src.mt5 import bridge
+from src.utils.config_store import ConfigSnapshot
+from src.utils.database import DatabaseManager
+
+
+class TestAckFirstWebhook(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, 'trades.db'))
+        config = {
+            'security': {'webhook_secret': 'TEST_SECRET'},
+            'execution': {'ack_first': True, 'max_wait_seconds': 5}
+        }
+        snapshot = ConfigSnapshot(version=7, data=config, mtime=0.0, checksum='x')
+
+        self.release = threading.Event()
+        def slow_fanout(data, config, received_at, raw, deadline=None):
+            self.release.wait(5)
+            return {'mt5': {'status': 'success'}, 'ibkr': None, 'topstep': None}
+
+        self.patchers = [
+            patch.object(bridge, 'db', self.db),
+            patch.object(bridge, 'CONFIG', config),
+            patch.object(bridge.CONFIG_STORE, 'snapshot', snapshot),
+            patch.object(bridge.webhook_validator, 'validate_webhook', return_value=(True, None)),
+            patch.object(bridge, 'execute_all_brokers_parallel', side_effect=slow_fanout),
+        ]
+        for p in self.patchers:
+            p.start()
+        self.app = bridge.app.test_client()
+
+    def tearDown(self):
+        self.release.set()
+        for p in reversed(self.patchers):
+            p.stop()
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def post_webhook(self):
+        payload = {'secret': 'TEST_SECRET', 'action': 'BUY', 'symbol': 'NQ1!', 'volume': 1}
+        return self.app.post('/webhook', data=json.dumps(payload), content_type='application/json')
+
+    def test_returns_202_before_brokers_finish(self):
+        res = self.post_webhook()
+        self.assertEqual(res.status_code, 202)
+        body = res.get_json()
+        self.assertEqual(body['status'], 'accepted')
+        self.assertEqual(body['config_version'], 7)
+
+        # Journaled durably while the fan-out is still running
+        pending = self.app.get(f"/executions/{body['execution_id']}").get_json()
+        self.assertEqual(pending['status'], 'accepted')
+        self.assertIsNone(pending['results'])
+
+        self.release.set()
+        done = self.app.get(f"/executions/{body['execution_id']}?wait=5").get_json()
+        self.assertEqual(done['status'], 'completed')
+
+    def test_long_poll_returns_results(self):
+        execution_id = self.post_webhook().get_json()['execution_id']
+        self.release.set()
+
+        res = self.app.get(f"/executions/{execution_id}?wait=5")
+        body = res.get_json()
+        self.assertEqual(body['status'], 'completed')
+        self.assertEqual(body['results']['mt5'], {'status': 'success'})
+
+    def test_journal_failure_still_wakes_waiters(self):
+        self.release.set()
+        with patch.object(self.db, 'complete_execution', side_effect=RuntimeError("disk full")):
+            bridge._execution_events['boom'] = event = threading.Event()
+            with self.assertRaises(RuntimeError):
+                bridge._dispatch_execution('boom', {}, {}, None, None)
+
+        self.assertTrue(event.is_set())
+        self.assertNotIn('boom', bridge._execution_events)
+
+    def test_unknown_execution_is_404(self):
+        self.assertEqual(self.app.get('/executions/nope').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Tests for MT5 async_journal mode.
+The order is sent using the cached position book; the trade row and its
+post-trade equity/positions are written in the background.
+"""
+
+import unittest
+import sys
+import os
+import json
+import time
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock mt5 before importing bridge
+sys.modules['MetaTrader5'] = MagicMock()
+
+from src.mt5 import bridge
+from src.mt5.position_book import PositionBook
+from src.utils.database import DatabaseManager
+
+
+def make_position(symbol, volume, profit):
+    pos = MagicMock()
+    pos.symbol = symbol
+    pos.volume = volume
+    pos.type = 0
+    pos.profit = profit
+    pos.ticket = 1
+    return pos
+
+
+class TestAsyncJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, 'trades.db'))
+
+        # Every MT5 IPC made on behalf of the trade, in order
+        self.ipc = []
+        self.account = MagicMock(equity=10000.0, margin=0.0, margin_free=10000.0)
+        self.positions = []
+        def fake_mt5_call(name, *args, **kwargs):
+            self.ipc.append(name)
+            return self.account if name == 'account_info' else self.positions
+
+        self.book = PositionBook(
+            fetch_positions=lambda: fake_mt5_call('positions_get'),
+            fetch_account=lambda: fake_mt5_call('account_info')
+        )
+        self.book.refresh()
+        self.ipc.clear()
+
+        self.patchers = [
+            patch.object(bridge, 'db', self.db),
+            patch.object(bridge, 'MT5_CONF', {'execution': {'async_journal': True}}),
+            patch.object(bridge, 'POSITION_BOOK', self.book),
+            patch.object(bridge, 'mt5_call', side_effect=fake_mt5_call),
+            patch.object(bridge, 'alerts', MagicMock()),
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self.patchers):
+            p.stop()
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def fill(self, data, deadline=None):
+        """execute_trade stand-in: the order fills and changes account state."""
+        self.ipc.append('order_send')
+        self.account = MagicMock(equity=10025.0, margin=500.0, margin_free=9525.0)
+        self.positions = [make_position('NQ_H', 1.0, 25.0)]
+        return {'order': 42, 'executed_price': 100.5}
+
+    def run_trade(self, execute_trade):
+        data = {'action': 'BUY', 'symbol': 'NQ1!', 'volume': 1}
+        with patch.object(bridge, 'execute_trade', side_effect=execute_trade):
+            res = bridge.execute_mt5_blocking(data, '2026-01-01T00:00:00', '{}')
+        # Journal executor is single-threaded: this returns once the journaling job ran
+        bridge.journal_executor.submit(lambda: None).result(5)
+        self.db.journal.flush()
+        return res
+
+    def test_pre_trade_state_from_position_book(self):
+        res = self.run_trade(self.fill)
+
+        self.assertEqual(res['status'], 'success')
+        # No account_info/positions_get round-trips ahead of the order
+        self.assertEqual(self.ipc[0], 'order_send')
+        trade = self.db.get_trades(limit=1)[0]
+        self.assertEqual(trade['equity_before'], 10000.0)
+        self.assertIsNone(trade['pre_trade_positions'])
+
+    def test_duration_covers_order_path_only(self):
+        def slow_snapshot(use_cache=False):
+            time.sleep(0.3)
+            return {'positions': [], 'equity': 10000.0}
+
+        def order(data, deadline=None):
+            time.sleep(0.05)
+            return self.fill(data)
+
+        with patch.object(bridge, 'capture_pre_trade_state', side_effect=slow_snapshot):
+            res = self.run_trade(order)
+
+        self.assertGreaterEqual(res['duration_ms'], 50)
+        self.assertLess(res['duration_ms'], 250)
+        trade = self.db.get_trades(limit=1)[0]
+        self.assertEqual(trade['fill_time_ms'], res['duration_ms'])
+
+    def test_post_trade_state_written_to_same_row(self):
+        self.run_trade(self.fill)
+
+        trades = self.db.get_trades(limit=10)
+        self.assertEqual(len(trades), 1)
+        trade = trades[0]
+        self.assertEqual(trade['order_id'], '42')
+        self.assertEqual(trade['equity_after'], 10025.0)
+        self.assertEqual(json.loads(trade['position_after']),
+                         [{'symbol': 'NQ_H', 'type': 'BUY', 'volume': 1.0, 'profit': 25.0}])
+        # The post-trade state came from a book refresh after the order
+        self.assertEqual(self.ipc, ['order_send', 'positions_get', 'account_info'])
+
+
+if __name__ == '__main__':
+    unittest.main()
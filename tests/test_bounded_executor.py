@@ -0,0 +1,90 @@
+"""
+Tests for the per-broker bounded worker pools.
+"""
+
+import unittest
+import sys
+import os
+import threading
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.bounded_executor import BoundedExecutor, PoolSaturated, build_broker_pools, BLOCK
+
+
+class TestBoundedExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+
+    def tearDown(self):
+        self.release.set()
+
+    def blocker(self):
+        self.started.release()
+        self.release.wait(5)
+        return "done"
+
+    def test_rejects_when_backlog_full(self):
+        pool = BoundedExecutor("Test", max_workers=1, max_queue=1)
+        futures = [pool.submit(self.blocker), pool.submit(self.blocker)]
+        self.assertTrue(self.started.acquire(timeout=2))
+
+        with self.assertRaises(PoolSaturated):
+            pool.submit(self.blocker)
+
+        metrics = pool.metrics()
+        self.assertEqual(metrics['running'], 1)
+        self.assertEqual(metrics['queued'], 1)
+        self.assertEqual(metrics['rejected'], 1)
+
+        self.release.set()
+        self.assertEqual([f.result(timeout=2) for f in futures], ["done", "done"])
+        self.assertEqual(pool.metrics()['completed'], 2)
+        # Slots are released once tasks finish
+        self.assertEqual(pool.submit(lambda: 1).result(timeout=2), 1)
+        pool.shutdown(wait=True)
+
+    def test_block_policy_waits_then_rejects(self):
+        pool = BoundedExecutor("Test", max_workers=1, max_queue=0, policy=BLOCK, block_timeout=0.05)
+        pool.submit(self.blocker)
+        with self.assertRaises(PoolSaturated):
+            pool.submit(self.blocker)
+        self.release.set()
+        pool.shutdown(wait=True)
+
+    def test_try_submit_never_waits_or_counts_rejection(self):
+        pool = BoundedExecutor("Test", max_workers=1, max_queue=0, policy=BLOCK, block_timeout=5)
+        pool.submit(self.blocker)
+        self.assertIsNone(pool.try_submit(self.blocker))
+        self.assertEqual(pool.metrics()['rejected'], 0)
+
+        # The block wait is capped by the caller's timeout
+        with self.assertRaises(PoolSaturated):
+            pool.submit_within(0.05, self.blocker)
+        self.assertEqual(pool.metrics()['rejected'], 1)
+        self.release.set()
+        pool.shutdown(wait=True)
+
+    def test_saturated_pool_does_not_affect_others(self):
+        pools = build_broker_pools({'execution': {'pools': {
+            'topstep': {'max_workers': 1, 'max_queue': 0}
+        }}})
+        pools['topstep'].submit(self.blocker)
+        with self.assertRaises(PoolSaturated):
+            pools['topstep'].submit(self.blocker)
+
+        self.assertEqual(pools['mt5'].submit(lambda: "filled").result(timeout=2), "filled")
+        self.release.set()
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+
+    def test_unknown_policy_raises(self):
+        with self.assertRaises(ValueError):
+            BoundedExecutor("Test", policy="drop")
+
+
+if __name__ == '__main__':
+    unittest.main()
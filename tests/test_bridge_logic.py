@@ -68,6 +68,18 @@ class TestMT5BridgeRobustness(unittest.TestCase):
         self.assertEqual(res.retcode, mock_mt5.TRADE_RETCODE_DONE)
         self.assertEqual(mock_mt5.order_send.call_count, 3)
 
+    @patch('src.mt5.bridge.mt5')
+    def test_safe_order_send_stops_retrying_at_deadline(self, mock_mt5):
+        mock_res_fail = MagicMock()
+        mock_res_fail.retcode = mock_mt5.TRADE_RETCODE_CONNECTION
+        mock_mt5.order_send.return_value = mock_res_fail
+
+        # 0.1s backoff fits in the budget, the 0.3s one does not
+        res = bridge.safe_order_send({}, deadline=bridge.Deadline(0.15))
+
+        self.assertIsNone(res)
+        self.assertEqual(mock_mt5.order_send.call_count, 2)
+
     @patch('src.mt5.bridge.mt5')
     def test_execute_trade_forces_limit_and_sl_tp(self, mock_mt5):
         # Mock Ticks - must have both bid and ask for spread calculation
@@ -109,5 +121,74 @@ class TestMT5BridgeRobustness(unittest.TestCase):
         self.assertEqual(req['sl'], 0.0)
         self.assertEqual(req['tp'], 0.0)
 
+    @patch('src.mt5.bridge.mt5')
+    def test_flatten_positions_one_tick_per_symbol(self, mock_mt5):
+        mock_tick = MagicMock()
+        mock_tick.ask = 100.0
+        mock_tick.bid = 99.5
+        mock_mt5.symbol_info_tick.return_value = mock_tick
+
+        mock_res = MagicMock()
+        mock_res.retcode = mock_mt5.TRADE_RETCODE_DONE
+        mock_res.price = 99.5
+        mock_mt5.order_send.return_value = mock_res
+
+        positions = []
+        for ticket, symbol in [(1, 'NQ_H'), (2, 'NQ_H'), (3, 'ES_H')]:
+            pos = MagicMock()
+            pos.ticket = ticket
+            pos.symbol = symbol
+            pos.volume = 1.0
+            pos.type = mock_mt5.ORDER_TYPE_BUY
+            positions.append(pos)
+
+        res = bridge.flatten_positions(positions)
+
+        self.assertEqual(res['closed'], 3)
+        self.assertEqual(mock_mt5.symbol_info_tick.call_count, 2)
+        self.assertEqual(mock_mt5.order_send.call_count, 3)
+        self.assertEqual([r['ticket'] for r in res['results']], [1, 2, 3])
+        self.assertTrue(all('duration_ms' in r for r in res['results']))
+
+    @patch('src.mt5.bridge.mt5')
+    def test_flatten_timeout_cancels_queued_closes(self, mock_mt5):
+        import threading
+        bridge.MT5_CONF['gateway'] = {'call_timeout_seconds': 10.0, 'close_min_wait_seconds': 0.2}
+        mock_tick = MagicMock()
+        mock_tick.ask = 100.0
+        mock_tick.bid = 99.5
+        mock_mt5.symbol_info_tick.return_value = mock_tick
+
+        release = threading.Event()
+        def slow_order_send(req):
+            release.wait(5)
+            res = MagicMock()
+            res.retcode = mock_mt5.TRADE_RETCODE_DONE
+            return res
+        mock_mt5.order_send.side_effect = slow_order_send
+
+        positions = []
+        for ticket in (1, 2):
+            pos = MagicMock()
+            pos.ticket = ticket
+            pos.symbol = 'NQ_H'
+            pos.volume = 1.0
+            pos.type = mock_mt5.ORDER_TYPE_BUY
+            positions.append(pos)
+
+        # Deadline already spent: the queued closes still get the minimum wait
+        deadline = bridge.Deadline(0)
+        try:
+            res = bridge.flatten_positions(positions, deadline=deadline)
+        finally:
+            release.set()
+
+        statuses = {r['ticket']: r['status'] for r in res['results']}
+        self.assertEqual(statuses, {1: 'pending', 2: 'cancelled'})
+        self.assertEqual(res['closed'], 0)
+        # Only the in-flight close ever reached the terminal
+        time.sleep(0.1)
+        self.assertEqual(mock_mt5.order_send.call_count, 1)
+
 if __name__ == '__main__':
     unittest.main()
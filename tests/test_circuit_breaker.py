@@ -0,0 +1,147 @@
+"""
+Tests for the closed / open / half-open circuit breaker and its use in the
+TopStepX client.
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.circuit_breaker import CircuitBreaker, ALLOW, PROBE, REJECT, CLOSED, OPEN, HALF_OPEN
+from src.topstep.client import TopStepClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("Test", failure_threshold=3, cooldown_seconds=30, clock=self.clock)
+
+    def trip(self):
+        for _ in range(3):
+            self.breaker.record_failure("boom")
+
+    def test_opens_after_threshold(self):
+        self.assertFalse(self.breaker.record_failure("a"))
+        self.assertFalse(self.breaker.record_failure("b"))
+        self.assertTrue(self.breaker.record_failure("c"))
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.before_request(), REJECT)
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure("a")
+        self.breaker.record_failure("b")
+        self.breaker.record_success()
+        self.assertFalse(self.breaker.record_failure("c"))
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_single_probe_after_cooldown(self):
+        self.trip()
+        self.clock.now += 29
+        self.assertEqual(self.breaker.before_request(), REJECT)
+
+        self.clock.now += 1
+        self.assertEqual(self.breaker.before_request(), PROBE)
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        # Only one caller gets to probe
+        self.assertEqual(self.breaker.before_request(), REJECT)
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.before_request(), ALLOW)
+
+    def test_failed_probe_reopens_and_restarts_cooldown(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.before_request(), PROBE)
+        self.assertTrue(self.breaker.record_failure("probe"))
+        self.assertEqual(self.breaker.state, OPEN)
+
+        self.clock.now += 10
+        self.assertEqual(self.breaker.before_request(), REJECT)
+        self.assertEqual(self.breaker.status()['retry_in_seconds'], 20.0)
+
+    def test_abandoned_probe_lease_expires(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.before_request(), PROBE)
+        # Probe holder never reports back
+        self.clock.now += 29
+        self.assertEqual(self.breaker.before_request(), REJECT)
+        self.clock.now += 1
+        self.assertEqual(self.breaker.before_request(), PROBE)
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+    def test_status_counts_transitions(self):
+        self.trip()
+        self.clock.now += 30
+        self.breaker.before_request()
+        self.breaker.record_success()
+
+        status = self.breaker.status()
+        self.assertEqual(status['state'], CLOSED)
+        self.assertEqual(status['transitions'], {
+            "closed->open": 1, "open->half_open": 1, "half_open->closed": 1
+        })
+        self.assertEqual(status['last_failure'], "boom")
+
+
+class TestTopStepBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.client = TopStepClient({'topstep': {
+            'enabled': True, 'mock_mode': False, 'username': 'u', 'api_key': 'k',
+            'account_id': 11, 'max_retries': 2, 'circuit_cooldown_seconds': 30,
+            'contract_cache_path': None
+        }})
+        self.clock = FakeClock()
+        self.client.breaker.clock = self.clock
+
+    def tearDown(self):
+        self.client.stop()
+
+    def test_open_breaker_skips_order(self):
+        self.client._handle_failure("one")
+        self.client._handle_failure("two")
+        self.assertTrue(self.client.circuit_open)
+        self.assertEqual(self.client.consecutive_failures, 2)
+
+        self.client.session = MagicMock()
+        res = self.client.execute_trade({'symbol': 'MNQ', 'action': 'BUY', 'volume': 1})
+
+        self.assertEqual(res, {"status": "error", "message": "Circuit Breaker Open"})
+        self.client.session.post.assert_not_called()
+
+    def test_probe_recovers_after_cooldown(self):
+        self.client._handle_failure("one")
+        self.client._handle_failure("two")
+        self.clock.now += 30
+
+        self.client._probe = MagicMock(return_value=True)
+        self.assertTrue(self.client._breaker_allows())
+        self.assertFalse(self.client.circuit_open)
+
+    def test_failed_probe_keeps_breaker_open(self):
+        self.client._handle_failure("one")
+        self.client._handle_failure("two")
+        self.clock.now += 30
+
+        self.client._probe = MagicMock(return_value=False)
+        self.assertFalse(self.client._breaker_allows())
+        self.assertTrue(self.client.circuit_open)
+        self.assertEqual(self.client.breaker.status()['transitions']['half_open->open'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
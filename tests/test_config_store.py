@@ -0,0 +1,94 @@
+"""
+Tests for the in-memory config snapshot store.
+"""
+
+import unittest
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.config_store import ConfigStore
+
+
+class TestConfigStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'config.json')
+        self._write({'broker_controls': {'mt5_paused': False}})
+        self.store = ConfigStore(self.path)
+
+    def tearDown(self):
+        self.store.stop()
+        os.remove(self.path)
+        os.rmdir(self.tmpdir)
+
+    def _write(self, data, bump=0.0):
+        with open(self.path, 'w') as f:
+            json.dump(data, f)
+        if bump:
+            # Ensure a distinct mtime on filesystems with coarse resolution
+            st = os.stat(self.path)
+            os.utime(self.path, (st.st_atime, st.st_mtime + bump))
+
+    def test_initial_snapshot(self):
+        snap = self.store.snapshot
+        self.assertEqual(snap.version, 1)
+        self.assertFalse(snap['broker_controls']['mt5_paused'])
+
+    def test_refresh_noop_when_unchanged(self):
+        self.assertFalse(self.store.refresh())
+        self.assertEqual(self.store.version, 1)
+
+    def test_refresh_swaps_snapshot_on_change(self):
+        old = self.store.snapshot
+        self._write({'broker_controls': {'mt5_paused': True}}, bump=1.0)
+
+        self.assertTrue(self.store.refresh())
+        self.assertEqual(self.store.version, 2)
+        self.assertTrue(self.store.snapshot['broker_controls']['mt5_paused'])
+        # Old snapshot held by an in-flight request is untouched
+        self.assertFalse(old['broker_controls']['mt5_paused'])
+
+    def test_refresh_detects_change_with_same_mtime(self):
+        st = os.stat(self.path)
+        self._write({'broker_controls': {'mt5_paused': True}})
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        self.assertTrue(self.store.refresh())
+        self.assertTrue(self.store.snapshot['broker_controls']['mt5_paused'])
+
+    def test_invalid_file_keeps_previous_snapshot(self):
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        st = os.stat(self.path)
+        os.utime(self.path, (st.st_atime, st.st_mtime + 1.0))
+
+        self.assertFalse(self.store.refresh())
+        self.assertEqual(self.store.version, 1)
+
+    def test_listener_called_on_swap(self):
+        seen = []
+        self.store.add_listener(lambda snap: seen.append(snap.version))
+        self._write({'broker_controls': {'mt5_paused': True}}, bump=1.0)
+        self.store.refresh()
+        self.assertEqual(seen, [2])
+
+    def test_watcher_picks_up_change(self):
+        self.store.start()
+        self._write({'broker_controls': {'mt5_paused': True}}, bump=1.0)
+
+        deadline = time.time() + 5
+        while time.time() < deadline and self.store.version == 1:
+            time.sleep(0.05)
+
+        self.assertEqual(self.store.version, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,6 +20,7 @@ class TestDatabase(unittest.TestCase):
         import time
         # Close connection if open? (Manager handles it per call, but let's be safe)
         if hasattr(self, 'db'):
+             self.db.close()  # Stop the journal writer thread
              del self.db # Ensure no object ref holds it
              
         if os.path.exists(self.test_db):
@@ -54,5 +55,244 @@ class TestDatabase(unittest.TestCase):
             self.assertEqual(row[7], 10.5)
             self.assertEqual(row[10], 15000.0)
 
+    def test_update_trade_attaches_to_same_row(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        trade_id = self.db.log_trade('MT5', data, 'success', latency_ms=5.0, equity_before=1000.0)
+
+        self.assertTrue(self.db.update_trade(trade_id, equity_after=1010.0, position_after='[]'))
+
+        trades = self.db.get_trades()
+        self.assertEqual(len(trades), 1)
+        self.assertEqual(trades[0]['equity_before'], 1000.0)
+        self.assertEqual(trades[0]['equity_after'], 1010.0)
+        self.assertEqual(trades[0]['position_after'], '[]')
+
+    def test_update_trade_rejects_unknown_columns(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        trade_id = self.db.log_trade('MT5', data, 'success')
+        self.assertFalse(self.db.update_trade(trade_id, platform='IBKR'))
+
+    def test_log_trade_async_returns_row_id(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        futures = [self.db.log_trade_async('MT5', data, 'success', latency_ms=i) for i in range(5)]
+        ids = [f.result(timeout=2) for f in futures]
+        self.assertEqual(len(set(ids)), 5)
+
+        trades = {t['id']: t for t in self.db.get_trades()}
+        self.assertEqual([trades[i]['latency_ms'] for i in ids], [0, 1, 2, 3, 4])
+
+    def test_update_attaches_to_pending_insert(self):
+        data = {'symbol': 'NQ', 'action': 'SELL', 'volume': 2.0}
+        trade_id = self.db.log_trade_async('MT5', data, 'success', equity_before=1000.0)
+        updated = self.db.update_trade_async(trade_id, equity_after=990.0)
+
+        self.assertTrue(updated.result(timeout=2))
+        trade = self.db.get_trades()[0]
+        self.assertEqual(trade['id'], trade_id.result())
+        self.assertEqual(trade['equity_after'], 990.0)
+
+    def test_journal_batches_rows(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        self.db.journal_options = {"batch_size": 50, "flush_interval": 0.2}
+        futures = [self.db.log_trade_async('MT5', data, 'success') for _ in range(20)]
+        [f.result(timeout=2) for f in futures]
+
+        self.assertLess(self.db.journal.batches, 20)
+        self.assertEqual(self.db.journal.rows_written, 20)
+
+    def test_bad_row_does_not_drop_batch(self):
+        good = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        self.db.journal_options = {"batch_size": 10, "flush_interval": 0.1}
+        futures = [
+            self.db.log_trade_async('MT5', good, 'success'),
+            self.db.log_trade_async('MT5', good, 'success', details=object(), order_id=object()),
+            self.db.log_trade_async('MT5', good, 'success'),
+        ]
+        results = [f.result(timeout=2) for f in futures]
+
+        self.assertIsNotNone(results[0])
+        self.assertIsNone(results[1])
+        self.assertIsNotNone(results[2])
+        self.assertEqual(len(self.db.get_trades()), 2)
+
+    def test_close_drains_queue(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        for _ in range(10):
+            self.db.log_trade_async('MT5', data, 'success')
+        self.db.close()
+        self.assertEqual(len(self.db.get_trades()), 10)
+
+    def test_trade_indexes_created(self):
+        with sqlite3.connect(self.test_db) as conn:
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(trades)")}
+            plan = " ".join(str(row) for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM trades WHERE platform = ? AND timestamp >= ?", ('MT5', '2024')))
+        self.assertIn('idx_trades_platform_timestamp', indexes)
+        self.assertIn('idx_trades_status_timestamp', indexes)
+        self.assertIn('idx_trades_platform_timestamp', plan)
+
+    def test_get_trades_keyset_pagination(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        ids = [self.db.log_trade('MT5', data, 'success') for _ in range(5)]
+
+        page1 = self.db.get_trades(limit=2)
+        page2 = self.db.get_trades(limit=2, before_id=page1[-1]['id'])
+        page3 = self.db.get_trades(limit=2, before_id=page2[-1]['id'])
+
+        self.assertEqual([t['id'] for t in page1 + page2 + page3], ids[::-1])
+
+    def test_get_trades_column_projection(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        self.db.log_trade('MT5', data, 'success', raw_webhook='{"big": "blob"}')
+
+        trade = self.db.get_trades(columns=['platform', 'status'])[0]
+        self.assertEqual(set(trade), {'id', 'platform', 'status'})
+
+        with self.assertRaises(ValueError):
+            self.db.get_trades(columns=['platform', 'status; DROP TABLE trades'])
+
+    def test_iter_trades_streams_all_rows_in_chunks(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        ids = [self.db.log_trade('MT5' if i % 2 else 'IBKR', data, 'success') for i in range(7)]
+
+        streamed = list(self.db.iter_trades(chunk_size=3))
+        self.assertEqual([t['id'] for t in streamed], ids)
+
+        mt5_only = list(self.db.iter_trades(platform='MT5', columns=['platform'], chunk_size=2))
+        self.assertEqual([t['id'] for t in mt5_only], ids[1::2])
+        self.assertEqual(set(mt5_only[0]), {'id', 'platform'})
+
+        with self.assertRaises(ValueError):
+            self.db.iter_trades(columns=['nope'])
+
+    def test_iter_trades_returns_reader_between_chunks(self):
+        self.db.close()
+        self.db = DatabaseManager(self.test_db, {'readers': 1, 'busy_timeout_ms': 200})
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        for _ in range(5):
+            self.db.log_trade('MT5', data, 'success')
+
+        stream = self.db.iter_trades(chunk_size=2)
+        next(stream)
+        # The only reader is free while the stream is paused mid-export
+        self.assertEqual(len(self.db.get_trades(limit=10)), 5)
+        self.assertEqual(len(list(stream)), 4)
+
+    def _legacy_summary(self):
+        with sqlite3.connect(self.test_db) as conn:
+            rows = conn.execute("""
+                SELECT platform, COUNT(*), SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN status != 'success' THEN 1 ELSE 0 END), AVG(latency_ms),
+                       AVG(slippage), SUM(pnl)
+                FROM trades GROUP BY platform
+            """).fetchall()
+        return {r[0]: r[1:] for r in rows}
+
+    def test_summary_from_rollups_matches_full_scan(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        for i in range(10):
+            self.db.log_trade('MT5', data, 'success' if i % 3 else 'error-mt5', latency_ms=10 + i, slippage=0.25 * i, pnl=i)
+        futures = [self.db.log_trade_async('TopStep', data, 'success', latency_ms=100 + i) for i in range(5)]
+        [f.result(timeout=2) for f in futures]
+
+        legacy = self._legacy_summary()
+        summary = {s['platform']: s for s in self.db.get_trade_summary()}
+        for platform, (total, ok, failed, avg_lat, avg_slip, pnl) in legacy.items():
+            s = summary[platform]
+            self.assertEqual((s['total_trades'], s['successful'], s['failed']), (total, ok, failed))
+            self.assertAlmostEqual(s['avg_latency_ms'], avg_lat)
+            self.assertAlmostEqual(s['avg_slippage'], avg_slip)
+            self.assertAlmostEqual(s['total_pnl'], pnl)
+        self.assertAlmostEqual(summary['TopStep']['p50_latency_ms'], 102, delta=2)
+        self.assertAlmostEqual(summary['TopStep']['p99_latency_ms'], 104, delta=2)
+
+    def test_update_trade_keeps_rollups_consistent(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        trade_id = self.db.log_trade('MT5', data, 'pending', pnl=None)
+        self.db.update_trade(trade_id, status='success', pnl=25.0)
+        self.db.update_trade_async(trade_id, commission=2.5).result(timeout=2)
+
+        s = self.db.get_trade_summary()[0]
+        self.assertEqual((s['successful'], s['failed']), (1, 0))
+        self.assertEqual(s['total_pnl'], 25.0)
+        self.assertEqual(s['total_commission'], 2.5)
+
+    def test_rollups_backfilled_for_existing_trades(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        for i in range(3):
+            self.db.log_trade('MT5', data, 'success', latency_ms=5)
+        self.db.close()
+        with sqlite3.connect(self.test_db) as conn:
+            conn.execute("DROP TABLE trade_rollups")
+
+        self.db = DatabaseManager(self.test_db)
+        s = self.db.get_trade_summary()[0]
+        self.assertEqual(s['total_trades'], 3)
+        self.assertEqual(s['p50_latency_ms'], 5.0)
+
+    def test_rollups_key_missing_platform_once(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        for latency in (10, 20, 30):
+            trade_id = self.db.log_trade(None, data, 'success', latency_ms=latency)
+        self.db.update_trade(trade_id, status='error-mt5')
+
+        with sqlite3.connect(self.test_db) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM trade_rollups").fetchone()[0], 1)
+        s = self.db.get_trade_summary()[0]
+        self.assertIsNone(s['platform'])
+        self.assertEqual((s['total_trades'], s['successful'], s['failed']), (3, 2, 1))
+        self.assertAlmostEqual(s['p50_latency_ms'], 20, delta=0.5)
+
+    def test_summary_by_hour(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        self.db.log_trade('MT5', data, 'success')
+        rows = self.db.get_trade_summary(by='hour')
+        self.assertTrue(set(rows[0]).issuperset({'platform', 'day', 'hour', 'p95_latency_ms'}))
+        with self.assertRaises(ValueError):
+            self.db.get_trade_summary(by='minute')
+
+    def test_summary_date_bounds_at_hour_edges(self):
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        for _ in range(3):
+            self.db.log_trade('MT5', data, 'success')
+        self.db.close()
+        with sqlite3.connect(self.test_db) as conn:
+            for trade_id, ts in enumerate(['2026-03-02T10:15:00', '2026-03-02T10:45:00', '2026-03-02T11:05:00'], 1):
+                conn.execute("UPDATE trades SET timestamp = ? WHERE id = ?", (ts, trade_id))
+        self.db = DatabaseManager(self.test_db)
+        self.db.rebuild_rollups()
+
+        def total(**bounds):
+            rows = self.db.get_trade_summary(**bounds)
+            return rows[0]['total_trades'] if rows else 0
+
+        # Both bounds truncate to their hour and both hours are included
+        self.assertEqual(total(start_date='2026-03-02T10:30:00', end_date='2026-03-02T11:00:00'), 3)
+        self.assertEqual(total(end_date='2026-03-02T10:59:59'), 2)
+        self.assertEqual(total(start_date='2026-03-02 11:00'), 1)
+        # A bare date is 00:00 of that day
+        self.assertEqual(total(start_date='2026-03-02'), 3)
+        self.assertEqual(total(end_date='2026-03-02'), 0)
+
+    def test_execution_journal_roundtrip(self):
+        self.assertTrue(self.db.create_execution('abc', '{"action": "BUY"}', config_version=3))
+        self.assertEqual(self.db.get_execution('abc')['status'], 'accepted')
+
+        self.db.complete_execution('abc', {'mt5': {'status': 'success'}}, duration_ms=12.5)
+        execution = self.db.get_execution('abc')
+        self.assertEqual(execution['status'], 'completed')
+        self.assertEqual(execution['results'], {'mt5': {'status': 'success'}})
+        self.assertEqual(execution['config_version'], 3)
+        self.assertIsNone(self.db.get_execution('missing'))
+
+    def test_pending_executions_marked_interrupted(self):
+        self.db.create_execution('done', '{}')
+        self.db.complete_execution('done', {})
+        self.db.create_execution('lost', '{}')
+
+        self.assertEqual(self.db.interrupt_pending_executions(), 1)
+        self.assertEqual(self.db.get_execution('lost')['status'], 'interrupted')
+        self.assertEqual(self.db.get_execution('done')['status'], 'completed')
+
 if __name__ == '__main__':
     unittest.main()
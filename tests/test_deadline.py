@@ -0,0 +1,153 @@
+"""
+Tests for the per-webhook deadline and its use in the broker fan-out.
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock mt5 before importing bridge
+sys.modules['MetaTrader5'] = MagicMock()
+
+from src.mt5 import bridge
+from src.utils.bounded_executor import build_broker_pools
+from src.utils.deadline import Deadline, DeadlineExceeded
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline(unittest.TestCase):
+
+    def test_remaining_and_timeout_cap(self):
+        clock = FakeClock()
+        deadline = Deadline(2.0, clock=clock)
+        self.assertEqual(deadline.timeout(cap=0.5), 0.5)
+
+        clock.now += 1.8
+        self.assertAlmostEqual(deadline.timeout(cap=0.5), 0.2)
+        self.assertFalse(deadline.expired)
+
+        clock.now += 1.0
+        self.assertEqual(deadline.remaining(), 0.0)
+        self.assertTrue(deadline.expired)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.check("order")
+
+    def test_sleep_refuses_to_overrun(self):
+        deadline = Deadline(0.05)
+        self.assertFalse(deadline.sleep(0.5))
+        self.assertTrue(deadline.sleep(0.0))
+
+    def test_from_config(self):
+        deadline = Deadline.from_config({'execution': {'webhook_deadline_ms': 2500}})
+        self.assertEqual(deadline.budget, 2.5)
+        self.assertEqual(Deadline.from_config({}).budget, 10.0)
+
+
+class TestFanOutDeadline(unittest.TestCase):
+
+    def setUp(self):
+        self.config = {'broker_controls': {}}
+
+    def test_all_legs_share_one_deadline(self):
+        def slow(*args):
+            time.sleep(0.5)
+            return {'status': 'success'}
+
+        with patch.object(bridge, 'execute_mt5_blocking', side_effect=slow), \
+             patch.object(bridge, 'forward_to_ibkr_blocking', side_effect=slow), \
+             patch.object(bridge, 'handle_topstep_logic_blocking', side_effect=slow), \
+             patch.object(bridge, 'IBKR_RUNTIME', None), \
+             patch.object(bridge, 'ts_async_client', None):
+            start = time.time()
+            results = bridge.execute_all_brokers_parallel({}, self.config, None, None, Deadline(0.2))
+            elapsed = time.time() - start
+
+        # Waited once for the shared budget, not 0.2s per broker
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual({r['status'] for r in results.values()}, {'timeout'})
+
+    def test_deadline_is_passed_to_each_leg(self):
+        deadline = Deadline(1.0)
+        legs = {}
+
+        def record(name):
+            def leg(*args):
+                legs[name] = args[-1]
+                return {'status': 'success'}
+            return leg
+
+        with patch.object(bridge, 'execute_mt5_blocking', side_effect=record('mt5')), \
+             patch.object(bridge, 'forward_to_ibkr_blocking', side_effect=record('ibkr')), \
+             patch.object(bridge, 'handle_topstep_logic_blocking', side_effect=record('topstep')), \
+             patch.object(bridge, 'IBKR_RUNTIME', None), \
+             patch.object(bridge, 'ts_async_client', None):
+            results = bridge.execute_all_brokers_parallel({}, self.config, None, None, deadline)
+
+        self.assertEqual({r['status'] for r in results.values()}, {'success'})
+        self.assertEqual(legs, {'mt5': deadline, 'ibkr': deadline, 'topstep': deadline})
+
+    def test_inprocess_ibkr_cancelled_at_deadline(self):
+        future = MagicMock()
+        future.result.side_effect = bridge.concurrent.futures.TimeoutError()
+        runtime = MagicMock()
+        runtime.execute_trade.return_value = future
+
+        with patch.object(bridge, 'IBKR_RUNTIME', runtime):
+            result = bridge.forward_to_ibkr_blocking({'symbol': 'MNQ1!', 'action': 'BUY'}, Deadline(0.5))
+
+        self.assertEqual(result['status'], 'timeout')
+        # The coroutine got the remaining budget and was cancelled when it ran out
+        self.assertLessEqual(runtime.execute_trade.call_args.kwargs['timeout'], 0.5)
+        future.cancel.assert_called_once()
+
+    def test_saturated_pool_does_not_delay_other_venues(self):
+        pools = build_broker_pools({'execution': {'pools': {
+            'mt5': {'max_workers': 1, 'max_queue': 0, 'policy': 'block', 'block_timeout_seconds': 5}
+        }}})
+        release = threading.Event()
+        pools['mt5'].submit(release.wait, 5)
+        started = {}
+
+        def record(name):
+            def leg(*args):
+                started[name] = time.time()
+                return {'status': 'success'}
+            return leg
+
+        try:
+            with patch.object(bridge, 'broker_pools', pools), \
+                 patch.object(bridge, 'forward_to_ibkr_blocking', side_effect=record('ibkr')), \
+                 patch.object(bridge, 'handle_topstep_logic_blocking', side_effect=record('topstep')), \
+                 patch.object(bridge, 'IBKR_RUNTIME', None), \
+                 patch.object(bridge, 'ts_async_client', None):
+                start = time.time()
+                results = bridge.execute_all_brokers_parallel({}, self.config, None, None, Deadline(0.3))
+                elapsed = time.time() - start
+        finally:
+            release.set()
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        # Other venues were submitted before MT5 waited for a slot
+        self.assertLess(started['ibkr'] - start, 0.1)
+        self.assertLess(started['topstep'] - start, 0.1)
+        self.assertEqual(results['mt5']['status'], 'rejected')
+        # The block wait was capped by the deadline, not block_timeout_seconds
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Tests for the persistent IBKR futures contract cache.
+Covers roll-aware lookup, disk persistence and refresh decisions.
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ib_async import Contract
+from src.ibkr.contract_cache import ContractCache
+
+
+def fut(local_symbol, expiry, con_id):
+    return Contract(secType='FUT', conId=con_id, symbol='MNQ', lastTradeDateOrContractMonth=expiry,
+                    exchange='CME', currency='USD', localSymbol=local_symbol, multiplier='2')
+
+
+CONTRACTS = [fut('MNQZ6', '20261218', 3), fut('MNQH7', '20270319', 4), fut('MNQU6', '20260918', 2)]
+KEY = 'MNQ_FUT_CME_USD'
+
+
+class TestContractCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'contracts.json')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_front_month_skips_expired(self):
+        cache = ContractCache(self.path)
+        active = cache.put(KEY, CONTRACTS, today='20261001')
+
+        self.assertEqual(active.localSymbol, 'MNQZ6')
+        self.assertEqual(cache.get(KEY, today='20261218').localSymbol, 'MNQZ6')
+        self.assertEqual(cache.get(KEY, today='20261219').localSymbol, 'MNQH7')
+
+    def test_rolls_before_expiry(self):
+        cache = ContractCache(self.path, roll_days=8)
+        cache.put(KEY, CONTRACTS, today='20261001')
+
+        self.assertEqual(cache.get(KEY, today='20261209').localSymbol, 'MNQZ6')
+        self.assertEqual(cache.get(KEY, today='20261211').localSymbol, 'MNQH7')
+
+    def test_persists_across_instances(self):
+        cache = ContractCache(self.path)
+        cache.put(KEY, CONTRACTS, today='20261001')
+        cache.save()
+
+        reloaded = ContractCache(self.path)
+        contract = reloaded.get(KEY, today='20261001')
+        self.assertEqual(contract.conId, 3)
+        self.assertEqual(contract.secType, 'FUT')
+
+    def test_needs_refresh(self):
+        cache = ContractCache(self.path)
+        self.assertTrue(cache.needs_refresh(KEY, 3600))
+
+        cache.put(KEY, CONTRACTS, today='20261001')
+        self.assertFalse(cache.needs_refresh(KEY, 3600, today='20261001'))
+        # Only the last cached expiry left: resolve the next one ahead of time
+        self.assertTrue(cache.needs_refresh(KEY, 3600, today='20261220'))
+        self.assertTrue(cache.needs_refresh(KEY, -1, today='20261001'))
+
+    def test_corrupt_file_is_empty_cache(self):
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        self.assertIsNone(ContractCache(self.path).get(KEY))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests for IBKR equity sizing from streamed account values and cached margins.
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+from unittest.mock import MagicMock, AsyncMock
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ib_async import AccountValue, Contract, OrderState
+from src.ibkr.client import IBKRClient
+
+
+def make_client():
+    return IBKRClient({'ibkr': {
+        'client_id': 1, 'tws_host': '127.0.0.1', 'tws_port': 4002,
+        'position_sizing': {
+            'mode': 'equity',
+            'max_micros': 10,
+            'equity_mode': {
+                'enabled': True, 'risk_per_trade_pct': 10.0, 'max_position_pct': 50.0,
+                'fallback_margin_per_contract': 1000
+            }
+        }
+    }})
+
+
+class TestEquitySizing(unittest.TestCase):
+
+    def test_account_value_event_updates_equity(self):
+        client = make_client()
+        client._on_account_value(AccountValue('DU1', 'NetLiquidation', '20000', 'USD', ''))
+        client._on_account_value(AccountValue('DU1', 'NetLiquidation', '99999', 'EUR', ''))
+
+        self.assertEqual(client.account_values['NetLiquidation'], 20000.0)
+        # 10% of 20000 / 1000 fallback margin
+        self.assertEqual(client.calculate_quantity(1, 'MNQ'), 2)
+        # 10% of 20000 / 500 whatIf margin
+        self.assertEqual(client.calculate_quantity(1, 'MNQ', margin_per_contract=500), 4)
+
+    def test_initial_margin_cached_per_session(self):
+        client = make_client()
+        client.ib = MagicMock()
+        client.ib.isConnected.return_value = True
+        client.ib.whatIfOrderAsync = AsyncMock(return_value=OrderState(initMarginChange='2250.5'))
+        contract = Contract(secType='FUT', conId=42, localSymbol='MNQZ6')
+
+        async def scenario():
+            return [await client.get_initial_margin(contract) for _ in range(3)]
+
+        self.assertEqual(asyncio.run(scenario()), [2250.5] * 3)
+        self.assertEqual(client.ib.whatIfOrderAsync.await_count, 1)
+
+        client._on_disconnected()
+        self.assertEqual(client.margin_cache, {})
+
+    def test_unset_margin_uses_fallback(self):
+        client = make_client()
+        client.ib = MagicMock()
+        client.ib.isConnected.return_value = True
+        client.ib.whatIfOrderAsync = AsyncMock(return_value=OrderState(initMarginChange='1.7976931348623157E308'))
+
+        margin = asyncio.run(client.get_initial_margin(Contract(conId=7)))
+        self.assertIsNone(margin)
+        self.assertNotIn(7, client.margin_cache)
+
+    def test_margin_miss_cached_until_retry(self):
+        client = make_client()
+        client.ib = MagicMock()
+        client.ib.isConnected.return_value = True
+        client.ib.whatIfOrderAsync = AsyncMock(side_effect=RuntimeError("no permissions"))
+        contract = Contract(secType='FUT', conId=7, localSymbol='MNQZ6')
+
+        async def scenario():
+            return [await client.get_initial_margin(contract) for _ in range(3)]
+
+        self.assertEqual(asyncio.run(scenario()), [None] * 3)
+        self.assertEqual(client.ib.whatIfOrderAsync.await_count, 1)
+        # Sizing falls back to the configured margin meanwhile
+        client._on_account_value(AccountValue('DU1', 'NetLiquidation', '20000', 'USD', ''))
+        self.assertEqual(client.calculate_quantity(1, 'MNQ', None), 2)
+
+        # Retried once the negative entry expires
+        client.margin_misses[7] = 0
+        client.ib.whatIfOrderAsync = AsyncMock(return_value=OrderState(initMarginChange='2000'))
+        self.assertEqual(asyncio.run(client.get_initial_margin(contract)), 2000.0)
+        self.assertNotIn(7, client.margin_misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
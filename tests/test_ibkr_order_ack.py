@@ -0,0 +1,93 @@
+"""
+Tests for event-driven IBKR order acknowledgement.
+Drives ib_async Trade status events by hand instead of talking to TWS.
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import time
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ib_async import Trade, Order, OrderStatus, Contract
+from src.ibkr.client import IBKRClient
+
+
+def make_config(ack_timeout_ms=200):
+    return {'ibkr': {
+        'client_id': 1, 'tws_host': '127.0.0.1', 'tws_port': 4002,
+        'order_ack_timeout_ms': ack_timeout_ms
+    }}
+
+
+def make_trade(order_id=7, status='PendingSubmit'):
+    return Trade(contract=Contract(symbol='MNQ'), order=Order(orderId=order_id),
+                 orderStatus=OrderStatus(orderId=order_id, status=status))
+
+
+class TestOrderAck(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.client = IBKRClient(make_config())
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _await_ack(self, trade, emit_status=None, delay=0.01):
+        async def scenario():
+            placed_at = time.perf_counter()
+            latency = self.client._track_fill_latency(trade, placed_at)
+            if emit_status:
+                def emit():
+                    trade.orderStatus.status = emit_status
+                    trade.statusEvent.emit(trade)
+                    if emit_status == 'Filled':
+                        trade.filledEvent.emit(trade)
+                self.loop.call_later(delay, emit)
+            status = await self.client._await_order_ack(trade, placed_at, latency)
+            return status, latency
+        return self.loop.run_until_complete(scenario())
+
+    def test_returns_on_submitted_without_fixed_sleep(self):
+        status, latency = self._await_ack(make_trade(), 'Submitted')
+
+        self.assertEqual(status, 'Submitted')
+        self.assertIsNotNone(latency['ack_ms'])
+        self.assertLess(latency['ack_ms'], 150)
+        self.assertIsNone(latency['fill_ms'])
+
+    def test_fill_records_both_latencies(self):
+        status, latency = self._await_ack(make_trade(), 'Filled')
+
+        self.assertEqual(status, 'Filled')
+        self.assertIsNotNone(latency['ack_ms'])
+        self.assertIsNotNone(latency['fill_ms'])
+        self.assertIs(self.client.order_latency[7], latency)
+
+    def test_deadline_returns_current_status(self):
+        status, latency = self._await_ack(make_trade(), None)
+
+        self.assertEqual(status, 'PendingSubmit')
+        self.assertIsNone(latency['ack_ms'])
+
+    def test_inactive_rejection_returns_without_waiting(self):
+        self.client = IBKRClient(make_config(ack_timeout_ms=2000))
+        started = time.perf_counter()
+        status, latency = self._await_ack(make_trade(), 'Inactive')
+
+        self.assertEqual(status, 'Inactive')
+        self.assertIsNotNone(latency['ack_ms'])
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+    def test_already_acked_returns_immediately(self):
+        status, latency = self._await_ack(make_trade(status='Inactive'), None)
+        self.assertEqual(status, 'Inactive')
+        self.assertIsNotNone(latency['ack_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Tests for the live IBKR position index and close_position matching.
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+from unittest.mock import MagicMock
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ib_async import Contract, Position
+from src.ibkr.position_index import PositionIndex
+from src.ibkr.client import IBKRClient
+
+
+def pos(con_id, symbol, local_symbol, qty):
+    contract = Contract(secType='FUT', conId=con_id, symbol=symbol, localSymbol=local_symbol)
+    return Position(account='DU1', contract=contract, position=qty, avgCost=0.0)
+
+
+class TestPositionIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PositionIndex()
+        self.index.reset([pos(1, 'MNQ', 'MNQZ6', 2), pos(2, 'MES', 'MESZ6', -1), pos(3, 'NQ', 'NQZ6', 1)])
+
+    def test_exact_symbol_match(self):
+        matches = self.index.match('NQ')
+        self.assertEqual([p.contract.conId for p in matches], [3])
+
+    def test_local_symbol_and_conid_match(self):
+        self.assertEqual(self.index.match('MESZ6')[0].contract.conId, 2)
+        self.assertEqual(self.index.match('1')[0].contract.localSymbol, 'MNQZ6')
+
+    def test_empty_symbol_matches_all(self):
+        self.assertEqual(len(self.index.match('')), 3)
+
+    def test_position_event_updates_and_removes(self):
+        self.index.update(pos(1, 'MNQ', 'MNQZ6', 5))
+        self.assertEqual(self.index.match('MNQ')[0].position, 5)
+
+        self.index.update(pos(1, 'MNQ', 'MNQZ6', 0))
+        self.assertEqual(self.index.match('MNQ'), [])
+        self.assertEqual(self.index.match('MNQZ6'), [])
+        self.assertEqual(len(self.index), 2)
+
+
+class TestClosePosition(unittest.TestCase):
+
+    def test_close_uses_index_without_positions_request(self):
+        client = IBKRClient({'ibkr': {'client_id': 1, 'tws_host': '127.0.0.1', 'tws_port': 4002}})
+        client.ib = MagicMock()
+        client.positions.reset([pos(1, 'MNQ', 'MNQZ6', 2), pos(3, 'NQ', 'NQZ6', 1)])
+
+        res = asyncio.run(client.close_position('MNQ'))
+
+        self.assertEqual(res['closed_count'], 1)
+        client.ib.reqPositionsAsync.assert_not_called()
+        contract, order = client.ib.placeOrder.call_args[0]
+        self.assertEqual(contract.localSymbol, 'MNQZ6')
+        self.assertEqual((order.action, order.totalQuantity), ('SELL', 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
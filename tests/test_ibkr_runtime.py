@@ -0,0 +1,87 @@
+"""
+Tests for the IBKR runtime (loop thread + client host).
+Uses a fake client so no TWS / Gateway connection is needed.
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+import asyncio
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ibkr.runtime import IBKRRuntime
+
+
+class FakeClient:
+    def __init__(self, config):
+        self.connected = False
+        self.trades = []
+        self.loop_thread = None
+
+    async def connect(self):
+        self.connected = True
+        return True
+
+    def is_connected(self):
+        return self.connected
+
+    async def execute_trade(self, data):
+        self.loop_thread = threading.current_thread().name
+        if data.get('action') == 'FAIL':
+            raise RuntimeError("order rejected")
+        if data.get('action') == 'SLOW':
+            await asyncio.sleep(0.2)
+        self.trades.append(data)
+        return {"status": "success", "order_id": len(self.trades)}
+
+
+class TestIBKRRuntime(unittest.TestCase):
+
+    def setUp(self):
+        self.runtime = IBKRRuntime({'ibkr': {}}, client_factory=FakeClient)
+        self.runtime.start()
+        self.assertTrue(self.runtime.wait_ready(timeout=2))
+
+    def tearDown(self):
+        self.runtime.stop()
+
+    def test_trade_runs_on_loop_thread(self):
+        result = self.runtime.execute_trade({'action': 'BUY', 'symbol': 'MNQ'}).result(timeout=2)
+
+        self.assertEqual(result['status'], 'success')
+        self.assertIn('duration_ms', result)
+        self.assertEqual(self.runtime.client.loop_thread, 'IBKR_Loop')
+
+    def test_trade_exception_becomes_error_result(self):
+        result = self.runtime.execute_trade({'action': 'FAIL'}).result(timeout=2)
+
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('order rejected', result['message'])
+
+    def test_trade_cancelled_when_budget_runs_out(self):
+        result = self.runtime.execute_trade({'action': 'SLOW'}, timeout=0.05).result(timeout=2)
+
+        self.assertEqual(result['status'], 'timeout')
+        time.sleep(0.3)
+        # The coroutine was cancelled on the loop, so the order never went out
+        self.assertEqual(self.runtime.client.trades, [])
+
+    def test_run_blocks_for_result(self):
+        self.runtime.run(self.runtime.client.connect(), timeout=2)
+        self.assertTrue(self.runtime.is_connected())
+
+    def test_reconnect_throttled(self):
+        first = self.runtime.reconnect(min_interval=60)
+        self.assertIsNotNone(first)
+        first.result(timeout=2)
+
+        self.assertIsNone(self.runtime.reconnect(min_interval=60))
+        self.assertIsNotNone(self.runtime.reconnect(min_interval=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Tests for the IBKR Client Portal (Web API) client.
+Runs against a small aiohttp fake of the CP Gateway endpoints.
+"""
+
+import unittest
+import sys
+import os
+import threading
+import asyncio
+import tempfile
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.ibkr.rest_client import IBKRWebClient
+
+
+class FakeGateway:
+    """Records requests and replies like the CP Gateway."""
+
+    def __init__(self):
+        self.calls = []
+        self.orders = []
+        self.app = web.Application()
+        self.app.router.add_get('/v1/api/iserver/auth/status', self.auth_status)
+        self.app.router.add_get('/v1/api/portfolio/accounts', self.accounts)
+        self.app.router.add_get('/v1/api/trsrv/futures', self.futures)
+        self.app.router.add_post('/v1/api/iserver/account/DU1/orders', self.place)
+        self.app.router.add_post('/v1/api/iserver/reply/{id}', self.reply)
+        self.app.router.add_get('/v1/api/portfolio/DU1/positions/0', self.positions)
+
+    async def auth_status(self, request):
+        self.calls.append('auth')
+        return web.json_response({"authenticated": True})
+
+    async def accounts(self, request):
+        return web.json_response([{"id": "DU1"}])
+
+    async def futures(self, request):
+        self.calls.append('futures')
+        return web.json_response({"MNQ": [
+            {"conid": 2, "expirationDate": 20000317},
+            {"conid": 4, "expirationDate": 29991217},
+            {"conid": 3, "expirationDate": 29990917}
+        ]})
+
+    async def place(self, request):
+        body = await request.json()
+        self.orders.extend(body['orders'])
+        return web.json_response([{"id": "r1", "message": ["Are you sure?"]}])
+
+    async def reply(self, request):
+        self.calls.append(f"reply:{request.match_info['id']}")
+        return web.json_response([{"order_id": "555", "order_status": "Submitted"}])
+
+    async def positions(self, request):
+        return web.json_response([
+            {"conid": 3, "ticker": "MNQ", "contractDesc": "MNQ SEP99", "position": 2},
+            {"conid": 9, "ticker": "NQ", "contractDesc": "NQ SEP99", "position": -1}
+        ])
+
+
+class TestIBKRWebClient(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.loop = asyncio.new_event_loop()
+        self.gateway = FakeGateway()
+        self.server = TestServer(self.gateway.app, loop=self.loop)
+        self.loop.run_until_complete(self.server.start_server())
+        self.config = {'ibkr': {
+            'base_url': str(self.server.make_url('/v1/api')),
+            'symbol_map': {'NQ': 'MNQ'},
+            'conid_cache_path': os.path.join(self.tmpdir.name, 'conids.json'),
+            'web_tickle_seconds': 3600
+        }}
+        self.client = IBKRWebClient(self.config)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.client.close())
+        self.loop.run_until_complete(self.server.close())
+        self.loop.close()
+        self.tmpdir.cleanup()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_trade_confirms_reply_and_uses_front_month(self):
+        self.assertTrue(self.run_async(self.client.connect()))
+        res = self.run_async(self.client.execute_trade({'action': 'BUY', 'symbol': 'NQ', 'volume': 1}))
+
+        self.assertEqual(res['status'], 'success')
+        self.assertEqual(res['order_id'], '555')
+        self.assertIn('reply:r1', self.gateway.calls)
+        self.assertEqual(self.gateway.orders[0]['conid'], 3)
+        self.assertEqual(self.gateway.orders[0]['orderType'], 'MKT')
+
+    def test_conid_cache_persists(self):
+        self.run_async(self.client.connect())
+        self.run_async(self.client.resolve_conid('MNQ', 'FUT'))
+
+        fresh = IBKRWebClient(self.config)
+        self.assertEqual(self.run_async(fresh.resolve_conid('MNQ', 'FUT')), 3)
+        self.assertEqual(self.gateway.calls.count('futures'), 1)
+        self.run_async(fresh.close())
+
+    def test_conid_cache_saved_off_the_loop(self):
+        self.run_async(self.client.connect())
+        save = self.client._save_conid_cache
+        threads = []
+
+        def record(cache=None):
+            threads.append(threading.current_thread())
+            save(cache)
+
+        self.client._save_conid_cache = record
+        self.run_async(self.client.resolve_conid('MNQ', 'FUT'))
+
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.assertTrue(os.path.exists(self.config['ibkr']['conid_cache_path']))
+
+    def test_close_matches_exact_ticker(self):
+        self.run_async(self.client.connect())
+        res = self.run_async(self.client.execute_trade({'action': 'CLOSE', 'symbol': 'MNQ'}))
+
+        self.assertEqual(res['closed_count'], 1)
+        self.assertEqual(self.gateway.orders[0]['conid'], 3)
+        self.assertEqual(self.gateway.orders[0]['side'], 'SELL')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Tests for the bridge-to-bridge keep-alive channel and internal token auth.
+"""
+
+import unittest
+import sys
+import os
+import threading
+from unittest.mock import patch
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, request, jsonify
+from werkzeug.serving import make_server
+
+from src.utils.internal_channel import (
+    INTERNAL_TOKEN_HEADER, InternalChannel, derive_internal_token, is_internal_request
+)
+
+
+class TestInternalToken(unittest.TestCase):
+
+    def setUp(self):
+        self.config = {'security': {'webhook_secret': 'public_secret'}}
+
+    def test_token_is_deterministic_and_not_the_secret(self):
+        token = derive_internal_token(self.config)
+        self.assertEqual(token, derive_internal_token(self.config))
+        self.assertNotEqual(token, 'public_secret')
+
+    def test_explicit_token_wins(self):
+        self.config['security']['internal_token'] = 'explicit'
+        self.assertEqual(derive_internal_token(self.config), 'explicit')
+
+    @patch.dict(os.environ, {'INTERNAL_BRIDGE_TOKEN': 'from_env'})
+    def test_env_token_wins(self):
+        self.assertEqual(derive_internal_token(self.config), 'from_env')
+
+    def test_is_internal_request(self):
+        token = derive_internal_token(self.config)
+        self.assertTrue(is_internal_request({INTERNAL_TOKEN_HEADER: token}, token))
+        self.assertFalse(is_internal_request({INTERNAL_TOKEN_HEADER: 'wrong'}, token))
+        self.assertFalse(is_internal_request({}, token))
+
+
+class TestInternalChannel(unittest.TestCase):
+
+    def setUp(self):
+        self.received = []
+        app = Flask(__name__)
+
+        @app.route('/ping')
+        def ping():
+            return jsonify({"status": "ok"})
+
+        @app.route('/webhook', methods=['POST'])
+        def webhook():
+            self.received.append((request.headers.get(INTERNAL_TOKEN_HEADER), request.json))
+            return jsonify({"status": "success"})
+
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        port = self.server.server_port
+        self.channel = InternalChannel(lambda: f"http://127.0.0.1:{port}", token='tok', keepalive_interval=60)
+
+    def tearDown(self):
+        self.channel.stop()
+        self.server.shutdown()
+
+    def test_post_sends_internal_token(self):
+        r = self.channel.post("/webhook", {"action": "BUY"}, timeout=2)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(self.received, [('tok', {"action": "BUY"})])
+
+    def test_warm_marks_channel_healthy(self):
+        self.assertTrue(self.channel.warm())
+        status = self.channel.status()
+        self.assertTrue(status['healthy'])
+        self.assertIsNotNone(status['last_ping_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Tests for the mergeable latency sketch.
+"""
+
+import unittest
+import sys
+import os
+import random
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.latency_sketch import LatencySketch
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class TestLatencySketch(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.values = [rng.lognormvariate(3, 1) for _ in range(5000)]
+
+    def test_quantiles_within_relative_accuracy(self):
+        sketch = LatencySketch(0.01)
+        for v in self.values:
+            sketch.add(v)
+        for q in (0.5, 0.95, 0.99):
+            exact = exact_quantile(self.values, q)
+            self.assertAlmostEqual(sketch.quantile(q), exact, delta=exact * 0.02)
+
+    def test_merge_matches_single_sketch(self):
+        whole, left, right = LatencySketch(), LatencySketch(), LatencySketch()
+        for i, v in enumerate(self.values):
+            whole.add(v)
+            (left if i % 2 else right).add(v)
+
+        merged = left.merge(right)
+        self.assertEqual(merged.count, whole.count)
+        self.assertEqual(merged.percentiles(), whole.percentiles())
+
+    def test_json_roundtrip_and_zero_values(self):
+        sketch = LatencySketch()
+        for v in (0, 0, 5.0, 10.0):
+            sketch.add(v)
+        restored = LatencySketch.from_json(sketch.to_json())
+
+        self.assertEqual(restored.count, 4)
+        self.assertEqual(restored.quantile(0.25), 0.0)
+        self.assertAlmostEqual(restored.quantile(1.0), 10.0, delta=0.1)
+        self.assertIsNone(LatencySketch.from_json(None).quantile(0.5))
+
+    def test_merge_rejects_different_accuracy(self):
+        with self.assertRaises(ValueError):
+            LatencySketch(0.01).merge(LatencySketch(0.05))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Tests for the single-threaded MT5 gateway actor.
+Verifies serialization onto one thread, read coalescing and metrics.
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mt5.gateway import MT5Gateway
+
+
+class TestMT5Gateway(unittest.TestCase):
+
+    def setUp(self):
+        self.gateway = MT5Gateway()
+
+    def tearDown(self):
+        self.gateway.stop()
+
+    def test_calls_run_on_gateway_thread(self):
+        """Every command executes on the same dedicated thread."""
+        threads = set()
+
+        def record():
+            threads.add(threading.current_thread().name)
+            return True
+
+        callers = [threading.Thread(target=self.gateway.call, args=('order_send', record)) for _ in range(10)]
+        for t in callers:
+            t.start()
+        for t in callers:
+            t.join()
+
+        self.assertEqual(threads, {'MT5_Gateway'})
+
+    def test_duplicate_reads_coalesced(self):
+        """Identical reads queued behind a slow call share one IPC round-trip."""
+        calls = []
+        release = threading.Event()
+
+        def blocker():
+            release.wait(2)
+
+        def positions_get():
+            calls.append(1)
+            return ('pos',)
+
+        self.gateway.submit('order_send', blocker)
+        futures = [self.gateway.submit('positions_get', positions_get) for _ in range(5)]
+        release.set()
+
+        results = [f.result(timeout=2) for f in futures]
+        self.assertEqual(results, [('pos',)] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.gateway.metrics()['commands']['positions_get']['coalesced'], 4)
+
+    def test_read_after_write_not_coalesced_with_earlier_read(self):
+        """A read queued after a write never reuses a read queued before it."""
+        release = threading.Event()
+        state = {'positions': 0}
+
+        def blocker():
+            release.wait(2)
+
+        def order_send():
+            state['positions'] += 1
+
+        def positions_get():
+            return state['positions']
+
+        self.gateway.submit('order_send', blocker)
+        before = self.gateway.submit('positions_get', positions_get)
+        self.gateway.submit('order_send', order_send)
+        after = self.gateway.submit('positions_get', positions_get)
+        release.set()
+
+        self.assertIsNot(before, after)
+        self.assertEqual(before.result(timeout=2), 0)
+        self.assertEqual(after.result(timeout=2), 1)
+
+    def test_timed_out_write_is_not_sent(self):
+        """A write still queued when its caller times out never reaches the terminal."""
+        release = threading.Event()
+        sent = []
+        self.gateway.submit('order_send', lambda: release.wait(2))
+
+        with self.assertRaises(Exception):
+            self.gateway.call('order_send', lambda: sent.append(1), timeout=0.05)
+        release.set()
+        self.gateway.call('terminal_info', lambda: None, timeout=2)
+
+        self.assertEqual(sent, [])
+
+    def test_writes_never_coalesced(self):
+        """order_send calls are always executed individually."""
+        calls = []
+        release = threading.Event()
+
+        self.gateway.submit('order_send', lambda: release.wait(2))
+        futures = [self.gateway.submit('order_send', calls.append, i) for i in range(3)]
+        release.set()
+
+        for f in futures:
+            f.result(timeout=2)
+        self.assertEqual(calls, [0, 1, 2])
+
+    def test_exception_propagates_to_caller(self):
+        def boom():
+            raise RuntimeError("IPC broken")
+
+        with self.assertRaises(RuntimeError):
+            self.gateway.call('account_info', boom, timeout=2)
+
+        stats = self.gateway.metrics()['commands']['account_info']
+        self.assertEqual(stats['errors'], 1)
+
+    def test_metrics_track_latency(self):
+        self.gateway.call('symbol_info_tick', time.sleep, 0.01, timeout=2)
+        stats = self.gateway.metrics()['commands']['symbol_info_tick']
+        self.assertEqual(stats['count'], 1)
+        self.assertGreaterEqual(stats['max_ms'], 10.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
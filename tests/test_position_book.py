@@ -0,0 +1,90 @@
+"""
+Tests for the MT5 position book cache.
+"""
+
+import unittest
+import sys
+import os
+from collections import namedtuple
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mt5.position_book import PositionBook, symbol_aliases
+
+Position = namedtuple('Position', 'ticket symbol type volume profit')
+
+
+class TestSymbolAliases(unittest.TestCase):
+
+    def test_tradingview_aliases(self):
+        aliases = symbol_aliases('NQ_H', 'NQ1!')
+        self.assertTrue({'NQ_H', 'NQ1!', 'NQ'}.issubset(aliases))
+
+    def test_empty_names_ignored(self):
+        self.assertEqual(symbol_aliases('', None), frozenset())
+
+
+class TestPositionBook(unittest.TestCase):
+
+    def setUp(self):
+        self.positions = [
+            Position(1, 'NQ_H', 0, 1.0, 10.0),
+            Position(2, 'ES_H', 1, 2.0, -5.0),
+        ]
+        self.fetches = 0
+
+        def fetch_positions():
+            self.fetches += 1
+            return tuple(self.positions)
+
+        self.book = PositionBook(fetch_positions, lambda: None, refresh_interval_ms=50, max_age_ms=10000)
+
+    def tearDown(self):
+        self.book.stop()
+
+    def test_never_refreshed_age_is_infinite(self):
+        self.assertEqual(self.book.age_ms(), float('inf'))
+
+    def test_lookup_by_alias(self):
+        snap = self.book.refresh()
+        matches = snap.positions_for('NQ_H', 'NQ1!')
+        self.assertEqual([p.ticket for p in matches], [1])
+        self.assertEqual(snap.by_ticket[2].symbol, 'ES_H')
+
+    def test_fresh_uses_cache_until_invalidated(self):
+        self.book.fresh()
+        self.book.fresh()
+        self.assertEqual(self.fetches, 1)
+
+        self.book.invalidate()
+        self.positions.pop(0)
+        snap = self.book.fresh()
+
+        self.assertEqual(self.fetches, 2)
+        self.assertEqual(snap.positions_for('NQ1!'), [])
+
+    def test_fresh_refreshes_when_too_old(self):
+        self.book.refresh()
+        self.book.fresh(max_age_ms=0)
+        self.assertEqual(self.fetches, 2)
+
+    def test_failed_refresh_keeps_previous_snapshot(self):
+        first = self.book.refresh()
+
+        def broken():
+            raise RuntimeError("IPC down")
+        self.book.fetch_positions = broken
+
+        self.assertIs(self.book.refresh(), first)
+
+    def test_status_reports_age(self):
+        self.assertIsNone(self.book.status()['age_ms'])
+        self.book.refresh()
+        status = self.book.status()
+        self.assertGreaterEqual(status['age_ms'], 0.0)
+        self.assertEqual(status['positions'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Tests for the SQLite connection pool (WAL writer + read-only readers).
+"""
+
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.sqlite_pool import SQLitePool
+
+
+class TestSQLitePool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'pool.db')
+        self.pool = SQLitePool(self.path, {'readers': 2, 'busy_timeout_ms': 200})
+        with self.pool.writer() as conn:
+            conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmpdir.cleanup()
+
+    def test_writer_uses_wal_and_normal_sync(self):
+        with self.pool.writer() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+
+    def test_durable_writer_commits_with_full_sync(self):
+        with self.pool.writer(durable=True) as conn:
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 2)  # FULL
+            conn.execute("INSERT INTO t (v) VALUES ('acked')")
+        with self.pool.writer() as conn:
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+            self.assertEqual(conn.execute("SELECT v FROM t").fetchone()[0], 'acked')
+
+    def test_readers_are_read_only(self):
+        with self.pool.reader() as conn:
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO t (v) VALUES ('x')")
+
+    def test_writer_commits_and_rolls_back(self):
+        with self.pool.writer() as conn:
+            conn.execute("INSERT INTO t (v) VALUES ('kept')")
+        with self.assertRaises(RuntimeError):
+            with self.pool.writer() as conn:
+                conn.execute("INSERT INTO t (v) VALUES ('dropped')")
+                raise RuntimeError("boom")
+
+        with self.pool.reader() as conn:
+            self.assertEqual(conn.execute("SELECT v FROM t").fetchall(), [('kept',)])
+
+    def test_open_read_transaction_does_not_block_writer(self):
+        with self.pool.reader() as reader:
+            reader.execute("BEGIN")
+            reader.execute("SELECT COUNT(*) FROM t").fetchone()
+
+            # Insert from another thread while the read transaction is open
+            done = threading.Event()
+            def write():
+                with self.pool.writer() as conn:
+                    conn.execute("INSERT INTO t (v) VALUES ('w')")
+                done.set()
+            threading.Thread(target=write).start()
+            self.assertTrue(done.wait(1.0))
+
+            # Reader still sees its snapshot
+            self.assertEqual(reader.execute("SELECT COUNT(*) FROM t").fetchone()[0], 0)
+
+        with self.pool.reader() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 1)
+
+    def test_reader_pool_is_bounded(self):
+        with self.pool.reader(), self.pool.reader():
+            with self.assertRaises(sqlite3.OperationalError):
+                with self.pool.reader():
+                    pass
+        self.assertEqual(self.pool.status()['readers_open'], 2)
+
+    def test_invalid_synchronous_mode(self):
+        with self.assertRaises(ValueError):
+            SQLitePool(self.path, {'synchronous': 'FAST'})
+
+
+if __name__ == '__main__':
+    unittest.main()
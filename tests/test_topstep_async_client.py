@@ -0,0 +1,132 @@
+"""
+Tests for the asyncio TopStepX client.
+Runs against a small aiohttp fake of the TopStepX endpoints.
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.topstep.async_client import AsyncTopStepClient
+
+
+class FakeTopStep:
+    def __init__(self):
+        self.logins = 0
+        self.searches = 0
+        self.orders = []
+        self.reject_next_order = False
+        self.app = web.Application()
+        self.app.router.add_post('/api/Auth/loginKey', self.login)
+        self.app.router.add_post('/api/Account/search', self.accounts)
+        self.app.router.add_post('/api/Contract/search', self.contracts)
+        self.app.router.add_post('/api/Order/place', self.place)
+
+    async def login(self, request):
+        self.logins += 1
+        await asyncio.sleep(0.05)  # slow enough for a burst to pile up
+        return web.json_response({"token": f"tok{self.logins}"})
+
+    async def accounts(self, request):
+        return web.json_response({"accounts": [{"id": 11, "name": "EVAL", "canTrade": True}]})
+
+    async def contracts(self, request):
+        self.searches += 1
+        body = await request.json()
+        return web.json_response({"contracts": [
+            {"id": f"CON.F.US.{body['searchText']}.Z99", "activeContract": True}
+        ]})
+
+    async def place(self, request):
+        if self.reject_next_order:
+            self.reject_next_order = False
+            return web.json_response({}, status=401)
+        body = await request.json()
+        body['token'] = request.headers['Authorization']
+        self.orders.append(body)
+        return web.json_response({"success": True, "orderId": len(self.orders)})
+
+
+class TestAsyncTopStepClient(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.fake = FakeTopStep()
+        self.server = TestServer(self.fake.app, loop=self.loop)
+        self.loop.run_until_complete(self.server.start_server())
+        self.client = AsyncTopStepClient({'topstep': {
+            'enabled': True, 'mock_mode': False, 'username': 'u', 'api_key': 'k',
+            'base_url': str(self.server.make_url('/api')), 'symbol_map': {'NQ': 'MNQ', 'ES': 'MES'},
+            'contract_cache_path': None
+        }})
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.client.close())
+        self.loop.run_until_complete(self.server.close())
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_burst_triggers_single_login(self):
+        order = {'symbol': 'MNQ', 'action': 'BUY', 'volume': 1}
+
+        async def burst():
+            return await asyncio.gather(*(self.client.execute_trade(dict(order)) for _ in range(10)))
+
+        results = self.run_async(burst())
+        self.assertTrue(all(r['status'] == 'success' for r in results))
+        self.assertEqual(self.fake.logins, 1)
+        self.assertEqual(len(self.fake.orders), 10)
+
+    def test_validate_prefetches_contracts(self):
+        self.assertTrue(self.run_async(self.client.validate_connection()))
+        self.assertEqual(set(self.client.contract_cache.symbols()), {'MNQ', 'MES'})
+
+        searches = self.fake.searches
+        self.run_async(self.client.execute_trade({'symbol': 'MES', 'action': 'SELL', 'volume': 2}))
+        self.assertEqual(self.fake.searches, searches)
+        self.assertEqual(self.fake.orders[0]['side'], 1)
+
+    def test_401_reauthenticates_once_and_retries(self):
+        self.run_async(self.client.validate_connection())
+        self.fake.reject_next_order = True
+
+        res = self.run_async(self.client.execute_trade({'symbol': 'MNQ', 'action': 'BUY', 'volume': 1}))
+
+        self.assertEqual(res['status'], 'success')
+        self.assertEqual(self.fake.logins, 2)
+        self.assertEqual(self.fake.orders[0]['token'], 'Bearer tok2')
+
+    def test_cancelled_probe_does_not_latch_breaker(self):
+        self.client.breaker.cooldown = 0
+        for _ in range(self.client.max_retries):
+            self.client._handle_failure("down")
+        order = {'symbol': 'MNQ', 'action': 'BUY', 'volume': 1}
+
+        async def hanging_probe():
+            await asyncio.sleep(5)
+            return True
+
+        self.client._probe = hanging_probe
+        res = self.run_async(self.client.execute_trade(dict(order), timeout=0.1))
+        self.assertEqual(res['status'], 'timeout')
+        self.assertEqual(self.client.breaker.state, 'open')
+
+        async def healthy_probe():
+            return True
+
+        self.client._probe = healthy_probe
+        res = self.run_async(self.client.execute_trade(dict(order), timeout=2))
+        self.assertEqual(res['status'], 'success')
+        self.assertEqual(self.client.breaker.state, 'closed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,12 +2,33 @@
 import unittest
 import sys
 import os
+import base64
+import json
+import tempfile
+import threading
+import time
+from datetime import date
 from unittest.mock import MagicMock, patch
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.topstep.client import TopStepClient
+from src.topstep.client import TopStepClient, decode_token_expiry
+from src.topstep.contract_cache import TopStepContractCache, contract_expiry
+from src.utils.deadline import Deadline
+
+
+def make_jwt(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip('=')
+    return f"header.{payload}.signature"
+
+
+def make_response(status_code, body):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = body
+    response.text = json.dumps(body)
+    return response
 
 class TestTopStepClient(unittest.TestCase):
     
@@ -53,5 +74,145 @@ class TestTopStepClient(unittest.TestCase):
         self.assertEqual(payload['bracket']['stopLossPrice'], 14900.0)
         self.assertEqual(payload['bracket']['takeProfitPrice'], 15100.0)
 
+class TestTopStepTokenRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self.client = TopStepClient({'topstep': {
+            'enabled': True, 'mock_mode': False, 'username': 'u', 'api_key': 'k',
+            'base_url': 'https://test.api', 'account_id': 11, 'contract_cache_path': None
+        }})
+        self.client.session = MagicMock()
+        self.logins = 0
+
+    def tearDown(self):
+        self.client.stop()
+
+    def _login(self, *args, **kwargs):
+        self.logins += 1
+        time.sleep(0.05)
+        return make_response(200, {"token": make_jwt(time.time() + 3600 + self.logins)})
+
+    def test_decode_token_expiry(self):
+        self.assertEqual(decode_token_expiry(make_jwt(1900000000)), 1900000000.0)
+        self.assertIsNone(decode_token_expiry("not-a-jwt"))
+
+    def test_concurrent_callers_share_one_login(self):
+        self.client.session.post.side_effect = self._login
+        threads = [threading.Thread(target=self.client.ensure_token) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(self.logins, 1)
+        # Known account: no /Account/search after login
+        self.assertEqual(self.client.session.post.call_count, 1)
+
+    def test_token_near_expiry_is_refreshed(self):
+        self.client.access_token = make_jwt(time.time() + 60)
+        self.client.token_expires_at = time.time() + 60
+        self.client.session.post.side_effect = self._login
+
+        self.assertTrue(self.client.ensure_token())
+        self.assertEqual(self.logins, 1)
+        self.assertGreater(self.client._seconds_until_refresh(), 0)
+
+    def test_401_relogs_once_and_retries_once(self):
+        self.client.access_token = 'old'
+        self.client.token_expires_at = time.time() + 3600
+        self.client.contract_cache.put('MNQ', 'CON.F.US.MNQ.Z26')
+
+        def post(url, **kwargs):
+            if url.endswith('/Auth/loginKey'):
+                return self._login()
+            return make_response(401, {})
+
+        self.client.session.post.side_effect = post
+        res = self.client.execute_trade({'symbol': 'MNQ', 'action': 'BUY', 'volume': 1})
+
+        self.assertEqual(res['status'], 'error')
+        self.assertEqual(self.logins, 1)
+        order_posts = [c for c in self.client.session.post.call_args_list if c[0][0].endswith('/Order/place')]
+        self.assertEqual(len(order_posts), 2)
+
+    def test_calls_share_one_deadline(self):
+        now = [100.0]
+        deadline = Deadline(1.0, clock=lambda: now[0])
+        timeouts = []
+
+        def post(url, json=None, timeout=None, **kwargs):
+            timeouts.append(round(timeout, 2))
+            now[0] += 0.4
+            if url.endswith('/Auth/loginKey'):
+                return make_response(200, {"token": make_jwt(time.time() + 3600)})
+            if url.endswith('/Contract/search'):
+                return make_response(200, {"contracts": [{"id": "CON.F.US.MNQ.Z99", "activeContract": True}]})
+            return make_response(401, {})
+
+        self.client.session.post.side_effect = post
+        res = self.client.execute_trade({'symbol': 'MNQ', 'action': 'BUY', 'volume': 1}, deadline=deadline)
+
+        # Login, contract search and order each got only what was left of the budget
+        self.assertEqual(timeouts, [1.0, 0.6, 0.2])
+        # Budget spent by the 401: no re-login or retry
+        self.assertEqual(res['status'], 'error')
+
+    def test_expired_deadline_skips_request(self):
+        self.client.access_token = make_jwt(time.time() + 3600)
+        self.client.token_expires_at = time.time() + 3600
+        res = self.client.execute_trade({'symbol': 'MNQ', 'action': 'BUY', 'volume': 1}, deadline=Deadline(0))
+
+        self.assertEqual(res['status'], 'timeout')
+        self.client.session.post.assert_not_called()
+        self.assertEqual(self.client.consecutive_failures, 0)
+
+
+class TestTopStepContractCache(unittest.TestCase):
+
+    def test_expiry_from_month_code(self):
+        # Third Friday of March 2026
+        self.assertEqual(contract_expiry('CON.F.US.MNQ.H26'), date(2026, 3, 20))
+        self.assertIsNone(contract_expiry('MNQ'))
+
+    def test_refresh_window_and_hard_expiry(self):
+        cache = TopStepContractCache(None, refresh_ahead_days=10)
+        cache.put('MNQ', 'CON.F.US.MNQ.H26')
+
+        self.assertFalse(cache.needs_refresh('MNQ', today=date(2026, 3, 1)))
+        self.assertTrue(cache.needs_refresh('MNQ', today=date(2026, 3, 12)))
+        # Stale-but-live entries are still served while the refresh happens
+        self.assertEqual(cache.get('MNQ', today=date(2026, 3, 12)), 'CON.F.US.MNQ.H26')
+        self.assertIsNone(cache.get('MNQ', today=date(2026, 3, 21)))
+
+    def test_persists_to_disk(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'contracts.json')
+            cache = TopStepContractCache(path)
+            cache.put('MES', 'CON.F.US.MES.Z99')
+            cache.save()
+            self.assertEqual(TopStepContractCache(path).get('MES'), 'CON.F.US.MES.Z99')
+
+    def test_validate_prefetches_mapped_symbols(self):
+        client = TopStepClient({'topstep': {
+            'enabled': True, 'mock_mode': False, 'username': 'u', 'api_key': 'k', 'account_id': 11,
+            'base_url': 'https://test.api', 'symbol_map': {'NQ': 'MNQ', 'ES': 'MES'}, 'contract_cache_path': None
+        }})
+        client.session = MagicMock()
+
+        def post(url, json=None, **kwargs):
+            if url.endswith('/Auth/loginKey'):
+                return make_response(200, {"token": make_jwt(time.time() + 3600)})
+            return make_response(200, {"contracts": [{"id": f"CON.F.US.{json['searchText']}.Z99", "activeContract": True}]})
+
+        client.session.post.side_effect = post
+        self.assertTrue(client.validate_connection())
+        client.stop()
+
+        self.assertEqual(sorted(client.contract_cache.symbols()), ['MES', 'MNQ'])
+        calls = client.session.post.call_count
+        self.assertEqual(client._get_contract_id('MES'), 'CON.F.US.MES.Z99')
+        self.assertEqual(client.session.post.call_count, calls)
+
+
 if __name__ == '__main__':
     unittest.main()
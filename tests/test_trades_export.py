@@ -0,0 +1,93 @@
+"""
+Tests for the streaming /trades/export endpoint (CSV / NDJSON, optional gzip).
+"""
+
+import unittest
+import sys
+import os
+import csv
+import io
+import gzip
+import json
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Mock mt5 before importing bridge
+sys.modules['MetaTrader5'] = MagicMock()
+
+from src.mt5 import bridge
+from src.utils.database import DatabaseManager
+
+
+class TestTradesExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, 'trades.db'))
+        data = {'symbol': 'NQ', 'action': 'BUY', 'volume': 1.0}
+        # More rows than one flush so the response spans several chunks
+        self.count = bridge.EXPORT_FLUSH_ROWS + 20
+        for i in range(self.count):
+            self.db.log_trade('MT5' if i % 2 else 'IBKR', data, 'success')
+
+        self.patcher = patch.object(bridge, 'db', self.db)
+        self.patcher.start()
+        self.app = bridge.app.test_client()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def test_csv_export_has_no_row_cap(self):
+        response = self.app.get('/trades/export?columns=platform,status')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertIn('trades_export.csv', response.headers['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(len(rows), self.count)
+        self.assertEqual(list(rows[0]), ['id', 'platform', 'status'])
+        self.assertEqual(rows[0]['platform'], 'IBKR')
+
+    def test_ndjson_export_filters_platform(self):
+        response = self.app.get('/trades/export?format=ndjson&platform=MT5')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), self.count // 2)
+        self.assertTrue(all(json.loads(line)['platform'] == 'MT5' for line in lines))
+
+    def test_gzip_export(self):
+        response = self.app.get('/trades/export?gzip=1&columns=symbol')
+        self.assertEqual(response.mimetype, 'application/gzip')
+        self.assertIn('trades_export.csv.gz', response.headers['Content-Disposition'])
+        text = gzip.decompress(response.get_data()).decode()
+        self.assertEqual(len(text.splitlines()), self.count + 1)
+
+    def test_open_exports_do_not_starve_reads(self):
+        self.patcher.stop()
+        self.db.close()
+        self.db = DatabaseManager(os.path.join(self.tmpdir.name, 'trades.db'), {'readers': 2, 'busy_timeout_ms': 200})
+        self.patcher = patch.object(bridge, 'db', self.db)
+        self.patcher.start()
+
+        # More slow clients than reader connections, each paused after its first chunk
+        exports = [self.app.get('/trades/export', buffered=False) for _ in range(4)]
+        for export in exports:
+            next(iter(export.response))
+
+        response = self.app.get('/trades?limit=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['trades']), 5)
+        for export in exports:
+            export.close()
+
+    def test_invalid_columns_or_format_rejected(self):
+        self.assertEqual(self.app.get('/trades/export?columns=nope').status_code, 400)
+        self.assertEqual(self.app.get('/trades/export?format=xml').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()